@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2018-2019  CZ.NIC, z. s. p. o.
+# Copyright (C) 2018-2026  CZ.NIC, z. s. p. o.
 #
 # This file is part of FRED.
 #
@@ -19,15 +19,23 @@
 """Application config for fred-pain."""
 from django.apps import AppConfig
 
-from .settings import FredPainSettings
+from .settings import SETTINGS, FredPainSettings
 
 
 class FredPainConfig(AppConfig):
     """Configuration of fred_pain app."""
 
     name = 'fred_pain'
+    default_auto_field = 'django.db.models.AutoField'
     verbose_name = 'FRED interface for PAIN'
 
     def ready(self):
-        """Check whether configuration is OK."""
+        """
+        Check whether configuration is OK.
+
+        If `FRED_PAIN_CORBA_PREWARM` is set, CORBA client is initialized in advance.
+        """
         FredPainSettings.check()
+        if SETTINGS.corba_prewarm:
+            from .corba import prewarm
+            prewarm()
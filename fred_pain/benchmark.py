@@ -0,0 +1,168 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Performance benchmarks of fred-pain."""
+import timeit
+from contextlib import contextmanager
+from datetime import date
+from decimal import Decimal
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterator, List, Optional, Sequence
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django_pain.models import BankAccount, BankPayment
+from djmoney.money import Money
+from fred_idl.Registry import Accounting
+from pyfco import CorbaClient
+
+from fred_pain.client import CorbaClientWrapper
+from fred_pain.corba import ACCOUNTING, AccountingCorbaRecoder
+from fred_pain.fake import FakeAccounting
+from fred_pain.metrics import MetricsClient
+from fred_pain.probe import percentile
+from fred_pain.processors import FredPaymentProcessor
+from fred_pain.replay import ReplayClient, load_records
+
+
+def get_sample_responses() -> List[Any]:
+    """Return sample responses of Accounting methods used by payment processors."""
+    address = Accounting.PlaceAddress(street1='2311 North Los Robles Avenue', street2='', street3='', city='Pasadena',
+                                      stateorprovince='California', postalcode='91001', country_code='US')
+    registrar = Accounting.Registrar(id=1, handle='REG-BBT', name='Sheldon Cooper', organization='Caltech', cin='',
+                                     tin='', url='http://sheldon.example.com', phone=None, fax=None, address=address)
+    invoices = [Accounting.InvoiceReference(id=i, number='INV{}'.format(i), type=Accounting.InvoiceType.account)
+                for i in range(3)]
+    references = [Accounting.RegistrarReference(handle='REG-{}'.format(i), name='Registrar {}'.format(i))
+                  for i in range(100)]
+    return [(registrar, 'CZ'), (invoices, Accounting.Credit(value='42')), references]
+
+
+def benchmark_recoder(number: int = 1000, repeat: int = 3) -> Dict[str, float]:
+    """
+    Measure decoding of sample responses by generic and compiled recoding.
+
+    Return number of decoded sample sets per second for both variants and their ratio.
+    """
+    responses = get_sample_responses()
+    result = {}
+    for name, recoder in (('generic', AccountingCorbaRecoder('utf-8', fast=False)),
+                          ('fast', AccountingCorbaRecoder('utf-8'))):
+        elapsed = min(timeit.repeat(lambda: [recoder.decode(response) for response in responses],
+                                    number=number, repeat=repeat))
+        result[name] = number / elapsed
+    result['speedup'] = result['fast'] / result['generic']
+    return result
+
+
+@contextmanager
+def fake_client(fake: Any) -> Iterator[None]:
+    """Route calls of `ACCOUNTING` to the client within the context."""
+    client = ACCOUNTING.client
+    ACCOUNTING.client = MetricsClient(fake)
+    try:
+        yield
+    finally:
+        ACCOUNTING.client = client
+
+
+class SendTimesClient(CorbaClientWrapper):
+    """CORBA client wrapper which records time of the first call of each payment by payment UUID."""
+
+    def __init__(self, client: Any):
+        super().__init__(client)
+        self.times = {}  # type: Dict[Any, float]
+
+    def call(self, name: str, method: Callable, *args: Any) -> Any:
+        """Record time of the call, if it's the first call of its payment, and call the method."""
+        now = perf_counter()
+        for arg in args:
+            if isinstance(arg, BankPayment):
+                self.times.setdefault(arg.uuid, now)
+        return method(*args)
+
+
+def _create_payments(count: int) -> List[BankPayment]:
+    account = BankAccount.objects.create(account_number='fred-pain-benchmark', currency='CZK')
+    BankPayment.objects.bulk_create([
+        BankPayment(identifier='BENCHMARK{}'.format(i), account=account, amount=Money(Decimal('1000.00'), 'CZK'),
+                    transaction_date=date.today(), variable_symbol=str(i), counter_account_number='1234/5678')
+        for i in range(count)])
+    return list(BankPayment.objects.filter(account=account).select_related('account').order_by('pk'))
+
+
+def benchmark_processing(count: int = 1000, batch_sizes: Sequence[int] = (1, ), threads: int = 1,
+                         latency: float = 0, errors: Optional[Dict[str, float]] = None, invoices: int = 1,
+                         seed: int = 0, overlap: bool = False, replay: Optional[str] = None,
+                         time_scale: float = 1.0) -> List[Dict[str, Any]]:
+    """
+    Measure `FredPaymentProcessor.process_payments` against a fake Accounting servant.
+
+    If `replay` is set, calls recorded in that file are replayed instead, with latencies multiplied by `time_scale`.
+    Payments are created in the database for each batch size and all changes are rolled back afterwards.
+    Return list of results for the batch sizes with throughput, latency of payments and number of queries.
+    Latency of a payment is the time from its first call to Accounting to its result.
+    """
+    records = list(load_records(replay)) if replay else []
+    results = []
+    for batch_size in batch_sizes:
+        if replay:
+            servant = ReplayClient(records, time_scale=time_scale,
+                                   default=AccountingCorbaRecoder._encode_bankpayment)  # type: Any
+            client = servant
+        else:
+            servant = FakeAccounting(latency=latency, errors=errors, invoices=invoices, seed=seed)
+            client = CorbaClient(servant, AccountingCorbaRecoder('utf-8'), Accounting.INTERNAL_SERVER_ERROR)
+        sending = SendTimesClient(client)
+        with transaction.atomic():
+            payments = _create_payments(count)
+            settings = override_settings(FRED_PAIN_BATCH_SIZE=batch_size, FRED_PAIN_PROCESSING_THREADS=threads,
+                                         FRED_PAIN_OVERLAP_CALLS=overlap)
+            with fake_client(sending), settings, CaptureQueriesContext(connection) as queries:
+                latencies = []
+                start = perf_counter()
+                accepted = 0
+                for payment, result in zip(payments, FredPaymentProcessor().process_payments(payments)):
+                    if payment.uuid in sending.times:
+                        latencies.append(perf_counter() - sending.times[payment.uuid])
+                    accepted += result.result
+                elapsed = perf_counter() - start
+            transaction.set_rollback(True)
+
+        latencies.sort()
+        results.append({
+            'count': count,
+            'batch_size': batch_size,
+            'threads': threads,
+            'overlap': overlap,
+            'latency': latency,
+            'errors': errors or {},
+            'invoices': invoices,
+            'replay': replay,
+            'time_scale': time_scale,
+            'accepted': accepted,
+            'elapsed': elapsed,
+            'payments_per_second': count / elapsed if elapsed else 0.0,
+            'payment_latency_p50': percentile(latencies, 50),
+            'payment_latency_p95': percentile(latencies, 95),
+            'payment_latency_max': latencies[-1] if latencies else 0.0,
+            'queries': len(queries),
+            'queries_per_payment': len(queries) / count if count else 0.0,
+            'corba_calls': servant.calls,
+        })
+    return results
@@ -0,0 +1,138 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Circuit breaker for CORBA calls."""
+import logging
+from threading import Lock
+from time import monotonic
+from typing import Any, Callable, Dict, Tuple, Type
+
+from fred_pain.settings import SETTINGS
+
+LOGGER = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half-open'
+
+
+class CircuitOpenError(Exception):
+    """Call was short-circuited, because the backend is considered unreachable."""
+
+
+class CircuitBreaker(object):
+    """
+    Circuit breaker which stops calls to unreachable backend.
+
+    Breaker is opened after `FRED_PAIN_CIRCUIT_BREAKER_THRESHOLD` consecutive failures. While it is open,
+    all calls fail immediately with `CircuitOpenError`. After `FRED_PAIN_CIRCUIT_BREAKER_COOLDOWN` seconds,
+    breaker becomes half-open and lets a single call through. Breaker is closed if that call succeeds
+    and opened again otherwise.
+    """
+
+    def __init__(self, name: str, errors: Tuple[Type[BaseException], ...]):
+        self.name = name
+        self.errors = errors
+        self.state = CLOSED
+        self.failures = 0
+        self.trips = 0
+        self.short_circuits = 0
+        self._opened = 0.0
+        self._probing = False
+        self._lock = Lock()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return current state of the breaker and its counters."""
+        with self._lock:
+            return {'state': self.state, 'failures': self.failures, 'trips': self.trips,
+                    'short_circuits': self.short_circuits}
+
+    def reset(self) -> None:
+        """Close the breaker and reset its counters."""
+        with self._lock:
+            self.state = CLOSED
+            self.failures = self.trips = self.short_circuits = 0
+            self._opened = 0.0
+            self._probing = False
+
+    def available(self) -> bool:
+        """Return whether a call would be let through now."""
+        with self._lock:
+            if self.state == OPEN:
+                return monotonic() - self._opened >= SETTINGS.circuit_breaker_cooldown
+            return self.state == CLOSED or not self._probing
+
+    def call(self, func: Callable, *args: Any) -> Any:
+        """Call the function unless the breaker is open."""
+        if not SETTINGS.circuit_breaker_threshold:
+            return func(*args)
+
+        probing = self._before_call()
+        try:
+            result = func(*args)
+        except self.errors:
+            self._record_failure()
+            raise
+        except Exception:
+            # Backend responded, only with an error.
+            self._record_success()
+            raise
+        else:
+            self._record_success()
+            return result
+        finally:
+            if probing:
+                self._end_probe()
+
+    def _before_call(self) -> bool:
+        """Let the call through or raise `CircuitOpenError`. Return whether the call probes half-open breaker."""
+        with self._lock:
+            if self.state == OPEN and monotonic() - self._opened >= SETTINGS.circuit_breaker_cooldown:
+                LOGGER.info('Circuit breaker %s is half-open.', self.name)
+                self.state = HALF_OPEN
+                self._probing = False
+            if self.state == CLOSED or (self.state == HALF_OPEN and not self._probing):
+                self._probing = self.state == HALF_OPEN
+                return self._probing
+            self.short_circuits += 1
+        raise CircuitOpenError('Circuit breaker {} is open.'.format(self.name))
+
+    def _end_probe(self) -> None:
+        """Let another call probe the breaker, if the probe ended without result, e.g. by `KeyboardInterrupt`."""
+        with self._lock:
+            if self.state == HALF_OPEN:
+                self._probing = False
+
+    def _record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            if self.state != CLOSED:
+                LOGGER.info('Circuit breaker %s is closed.', self.name)
+                self.state = CLOSED
+                self._probing = False
+
+    def _record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN or (self.state == CLOSED
+                                           and self.failures >= SETTINGS.circuit_breaker_threshold):
+                LOGGER.warning('Circuit breaker %s is open after %s consecutive failures.', self.name, self.failures)
+                self.state = OPEN
+                self.trips += 1
+                self._opened = monotonic()
+                self._probing = False
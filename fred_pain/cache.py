@@ -0,0 +1,139 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Cache of data received from FRED."""
+import logging
+import time
+from threading import Thread
+from typing import List, NamedTuple
+
+from django.core.cache import caches
+from django_pain.models import BankPayment
+
+from fred_pain.corba import ACCOUNTING, get_payment_fingerprint
+from fred_pain.metrics import METRICS, Counter
+from fred_pain.settings import SETTINGS
+
+LOGGER = logging.getLogger(__name__)
+
+REGISTRAR_REFERENCES_KEY = 'fred_pain:registrar_references'
+REGISTRAR_REFERENCES_REFRESH_KEY = 'fred_pain:registrar_references:refresh'
+REJECTED_PAYMENT_KEY = 'fred_pain:rejected_payment:{}'
+
+REJECTED_PAYMENT_LOOKUPS = METRICS.register(Counter(
+    'fred_pain_rejected_payment_cache_lookups_total', 'Number of lookups in the cache of rejected payments.',
+    ('result', )))
+
+RegistrarReference = NamedTuple('RegistrarReference', [('handle', str), ('name', str)])
+
+
+def get_registrar_references() -> List[RegistrarReference]:
+    """
+    Return registrar references, cached if `FRED_PAIN_REGISTRAR_CACHE_TIMEOUT` is set.
+
+    Expired references are kept in the cache for another timeout period. If they are requested during that time,
+    they are returned and refreshed in the background.
+    """
+    timeout = SETTINGS.registrar_cache_timeout
+    if not timeout:
+        return fetch_registrar_references()
+
+    cache = caches[SETTINGS.registrar_cache]
+    entry = cache.get(REGISTRAR_REFERENCES_KEY)
+    if entry is None:
+        return _refresh_registrar_references()
+
+    references, expires = entry
+    if expires <= time.time() and cache.add(REGISTRAR_REFERENCES_REFRESH_KEY, True, timeout):
+        LOGGER.debug('Registrar references expired, refreshing them in the background.')
+        Thread(target=_refresh_registrar_references_background, daemon=True).start()
+    return references
+
+
+def invalidate_registrar_references() -> None:
+    """Remove registrar references from the cache."""
+    caches[SETTINGS.registrar_cache].delete(REGISTRAR_REFERENCES_KEY)
+
+
+def fetch_registrar_references() -> List[RegistrarReference]:
+    """Fetch registrar references from FRED."""
+    return [RegistrarReference(ref.handle, ref.name) for ref in ACCOUNTING.get_registrar_references()]
+
+
+def _refresh_registrar_references() -> List[RegistrarReference]:
+    """Fetch registrar references from FRED and store them in the cache."""
+    timeout = SETTINGS.registrar_cache_timeout
+    references = fetch_registrar_references()
+    caches[SETTINGS.registrar_cache].set(REGISTRAR_REFERENCES_KEY, (references, time.time() + timeout), 2 * timeout)
+    return references
+
+
+def _refresh_registrar_references_background() -> None:
+    """Refresh registrar references in a background thread."""
+    cache = caches[SETTINGS.registrar_cache]
+    try:
+        _refresh_registrar_references()
+    except Exception:
+        LOGGER.exception('Refresh of registrar references failed.')
+    finally:
+        cache.delete(REGISTRAR_REFERENCES_REFRESH_KEY)
+        cache.close()
+
+
+def is_payment_rejected(payment: BankPayment) -> bool:
+    """
+    Return whether payment was rejected by FRED recently, if `FRED_PAIN_REJECTED_PAYMENT_CACHE_TIMEOUT` is set.
+
+    Payment is considered rejected until its backoff period expires or its data sent to FRED change.
+    """
+    if not SETTINGS.rejected_payment_cache_timeout:
+        return False
+    entry = caches[SETTINGS.rejected_payment_cache].get(REJECTED_PAYMENT_KEY.format(payment.uuid))
+    if entry is not None:
+        fingerprint, count, expires = entry
+        if expires > time.time() and fingerprint == get_payment_fingerprint(payment):
+            REJECTED_PAYMENT_LOOKUPS.inc('hit')
+            return True
+    REJECTED_PAYMENT_LOOKUPS.inc('miss')
+    return False
+
+
+def set_payment_rejected(payment: BankPayment) -> None:
+    """
+    Store rejected payment in the cache.
+
+    Backoff period starts at `FRED_PAIN_REJECTED_PAYMENT_CACHE_TIMEOUT` and doubles with each rejection
+    of unchanged payment up to `FRED_PAIN_REJECTED_PAYMENT_CACHE_MAX_TIMEOUT`.
+    Entry is kept in the cache for another backoff period to remember the number of rejections.
+    """
+    timeout = SETTINGS.rejected_payment_cache_timeout
+    if not timeout:
+        return
+    cache = caches[SETTINGS.rejected_payment_cache]
+    key = REJECTED_PAYMENT_KEY.format(payment.uuid)
+    fingerprint = get_payment_fingerprint(payment)
+    entry = cache.get(key)
+    count = entry[1] + 1 if entry is not None and entry[0] == fingerprint else 1
+    backoff = min(timeout * 2 ** (count - 1), max(SETTINGS.rejected_payment_cache_max_timeout, timeout))
+    LOGGER.debug('Payment %s rejected %s times, backing off for %s seconds.', str(payment.uuid), count, backoff)
+    cache.set(key, (fingerprint, count, time.time() + backoff), 2 * backoff)
+
+
+def invalidate_rejected_payment(payment: BankPayment) -> None:
+    """Remove rejected payment from the cache."""
+    caches[SETTINGS.rejected_payment_cache].delete(REJECTED_PAYMENT_KEY.format(payment.uuid))
@@ -0,0 +1,69 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Wrappers of CORBA clients."""
+from functools import partial
+from threading import Lock
+from typing import Any, Callable
+
+
+class CorbaClientWrapper(object):
+    """
+    Base class for wrappers of CORBA clients.
+
+    Wrapper provides the same interface as the wrapped client, i.e. remote methods are accessed as attributes.
+    Subclasses override `call` to alter the calls.
+    """
+
+    def __init__(self, client: Any):
+        self.client = client
+
+    def __getattr__(self, name: str) -> Callable:
+        if name == 'client' or name.startswith('_'):
+            raise AttributeError(name)
+        return partial(self.call, name, getattr(self.client, name))
+
+    def call(self, name: str, method: Callable, *args: Any) -> Any:
+        """Call the method of the wrapped client."""
+        return method(*args)
+
+
+class LazyClient(CorbaClientWrapper):
+    """
+    Wrapper which creates the wrapped client by the factory on first use.
+
+    Client is created only once, even if it's first used by several threads at the same time.
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self._client = None  # type: Any
+        self._lock = Lock()
+
+    @property
+    def client(self) -> Any:
+        """Return the wrapped client."""
+        return self.setup()
+
+    def setup(self) -> Any:
+        """Create the wrapped client, if it doesn't exist yet, and return it."""
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    self._client = self.factory()
+        return self._client
@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2018-2019  CZ.NIC, z. s. p. o.
+# Copyright (C) 2018-2026  CZ.NIC, z. s. p. o.
 #
 # This file is part of FRED.
 #
@@ -17,24 +17,90 @@
 # along with FRED.  If not, see <https://www.gnu.org/licenses/>.
 
 """FRED CORBA interface."""
+import hashlib
+import inspect
+import logging
 from datetime import date
+from functools import lru_cache, partial
+from typing import Any, Callable, List, Optional, Sequence, Tuple, cast
 
-from django.utils.functional import SimpleLazyObject
 from django_pain.models import BankPayment
 from fred_idl.Registry import Accounting, IsoDate, IsoDateTime
+from omniORB import CORBA
 from pyfco import CorbaClient, CorbaClientProxy, CorbaNameServiceClient, CorbaRecoder
 from pyfco.recoder import decode_iso_date, decode_iso_datetime, encode_iso_date, encode_iso_datetime
 
+from fred_pain.breaker import OPEN, CircuitBreaker
+from fred_pain.client import LazyClient
+from fred_pain.lanes import LANES, LaneClient, LaneScheduler
+from fred_pain.memo import EncodingCache
+from fred_pain.metrics import METRICS, Gauge, MetricsClient
+from fred_pain.pool import ObjectReferencePool, get_pool_size
+from fred_pain.replay import RecordingClient
+from fred_pain.retry import RetryClient
+from fred_pain.routing import Endpoint, Router
 from fred_pain.settings import SETTINGS
+from fred_pain.timeout import TimeoutClient
+from fred_pain.tracing import TracingClient
+
+LOGGER = logging.getLogger(__name__)
+
+# CORBA system exceptions which signal the backend is unreachable.
+TRANSPORT_ERRORS = (CORBA.TRANSIENT, CORBA.COMM_FAILURE, CORBA.OBJECT_NOT_EXIST)
+
+# Accounting methods which are safe to repeat. Payments are identified by UUID, so repeated import of a payment
+# fails with CREDIT_ALREADY_PROCESSED instead of crediting it twice.
+IDEMPOTENT_METHODS = frozenset(('get_registrar_by_payment', 'get_registrar_by_handle_and_payment',
+                                'get_registrar_references', 'import_payment'))
+
+# Accounting methods which don't change anything, so their calls may be interrupted by the processing deadline.
+INTERRUPTIBLE_METHODS = frozenset(('get_registrar_by_payment', 'get_registrar_by_handle_and_payment',
+                                   'get_registrar_references'))
+
+# Types of values which are not changed by recoding.
+_PLAIN_TYPES = frozenset((str, int, float, bool, type(None)))
+
+# Structs recoded by compiled functions.
+FAST_STRUCTS = (Accounting.Registrar, Accounting.PlaceAddress, Accounting.RegistrarReference,
+                Accounting.InvoiceReference, Accounting.PaymentData)
+
+_CODEC_TEMPLATE = """def recode_struct(value):
+    return cls({})
+"""
+
+
+def compile_struct_codec(cls: type, recode: Callable[[Any], Any]) -> Optional[Callable[[Any], Any]]:
+    """
+    Compile function which recodes the struct field by field.
+
+    Values of plain types are left intact, other values are recoded by `recode`.
+    Return `None` if struct fields can't be determined.
+    """
+    try:
+        fields = inspect.getfullargspec(cast(Any, cls).__init__).args[1:]
+    except TypeError:
+        return None
+    if not fields:
+        return None
+    namespace = {'cls': cls, 'plain': _PLAIN_TYPES, 'recode': recode}
+    exec(_CODEC_TEMPLATE.format(', '.join(
+        '{0}=value.{0} if value.{0}.__class__ in plain else recode(value.{0})'.format(field) for field in fields)),
+        namespace)
+    return cast(Callable[[Any], Any], namespace['recode_struct'])
 
 
 class AccountingCorbaRecoder(CorbaRecoder):
-    """Recoder for Accounting interface."""
+    """
+    Recoder for Accounting interface.
+
+    Structs in `FAST_STRUCTS` are recoded by compiled functions, which skip generic recoding of plain values.
+    Other values, including values of unexpected types within these structs, are recoded by the generic recoder.
+    """
 
-    def __init__(self, coding='ascii'):
+    def __init__(self, coding='ascii', fast=True):
         """Add specific recode functions."""
         super().__init__(coding)
-        self.add_recode_function(BankPayment, self._identity, self._encode_bankpayment)
+        self.add_recode_function(BankPayment, self._identity, encode_payment)
         self.add_recode_function(date, self._identity, encode_iso_date)
 
         self.add_recode_function(IsoDate, decode_iso_date, self._identity)
@@ -42,7 +108,33 @@ class AccountingCorbaRecoder(CorbaRecoder):
         self.add_recode_function(Accounting.Money, self._identity, self._identity)
         self.add_recode_function(Accounting.Credit, self._identity, self._identity)
 
-    def _encode_bankpayment(self, payment: BankPayment) -> Accounting.PaymentData:
+        if fast:
+            self._fast_decoders = {}  # type: dict
+            self._fast_encoders = {}  # type: dict
+            for cls in FAST_STRUCTS:
+                decoder = compile_struct_codec(cls, self._fast_decode)
+                encoder = compile_struct_codec(cls, self._fast_encode)
+                if decoder is not None and encoder is not None:
+                    self._fast_decoders[cls] = decoder
+                    self._fast_encoders[cls] = encoder
+                    self.add_recode_function(cls, decoder, encoder)
+
+    def _fast_decode(self, value: Any) -> Any:
+        """Decode value by a compiled function, if available."""
+        decoder = self._fast_decoders.get(value.__class__)
+        if decoder is None:
+            return self.decode(value)
+        return decoder(value)
+
+    def _fast_encode(self, value: Any) -> Any:
+        """Encode value by a compiled function, if available."""
+        encoder = self._fast_encoders.get(value.__class__)
+        if encoder is None:
+            return self.encode(value)
+        return encoder(value)
+
+    @staticmethod
+    def _encode_bankpayment(payment: BankPayment) -> Accounting.PaymentData:
         """Encode bank payment to struct."""
         return Accounting.PaymentData(
             account_payment_ident=payment.identifier,
@@ -60,8 +152,140 @@ class AccountingCorbaRecoder(CorbaRecoder):
         )
 
 
-_CORBA = CorbaNameServiceClient(host_port=SETTINGS.corba_netloc, context_name=SETTINGS.corba_context)
+def _get_payment_data(payment: BankPayment) -> tuple:
+    """Return values of payment fields encoded by `AccountingCorbaRecoder._encode_bankpayment`."""
+    return (payment.identifier, payment.uuid, payment.account.account_number, payment.counter_account_number,
+            payment.counter_account_name, payment.constant_symbol, payment.variable_symbol, payment.specific_symbol,
+            payment.amount.amount, payment.transaction_date, payment.description, payment.create_time)
+
+
+# Payments are encoded once for registrar lookup, import and checks of rejected payments, unless they change.
+# Disabled by default, the cache pays off only in long-running processes sending the same payments repeatedly.
+PAYMENT_ENCODINGS = EncodingCache(AccountingCorbaRecoder._encode_bankpayment, lambda payment: payment.uuid,
+                                  _get_payment_data)
+
+
+def encode_payment(payment: BankPayment) -> Accounting.PaymentData:
+    """Encode bank payment to struct, which is cached until the payment changes. Struct must not be modified."""
+    return PAYMENT_ENCODINGS.encode(payment)
+
+
+def get_payment_fingerprint(payment: BankPayment) -> str:
+    """Return fingerprint of payment data sent to FRED. It changes whenever any of the sent fields is edited."""
+    return hashlib.sha1(repr(_struct_values(encode_payment(payment))).encode()).hexdigest()
+
+
+def _struct_values(value: Any) -> Any:
+    """Return struct name and values of its fields recursively."""
+    if value.__class__ in _PLAIN_TYPES:
+        return value
+    return (value.__class__.__name__, sorted((name, _struct_values(field)) for name, field in vars(value).items()))
+
+
+@lru_cache(maxsize=None)
+def get_corba(netloc: str) -> CorbaNameServiceClient:
+    """Return client of the naming service at the network location. ORB is initialized on the first call."""
+    return CorbaNameServiceClient(host_port=netloc, context_name=SETTINGS.corba_context)
+
+
+def _resolve_accounting(netloc: str):  # pragma: no cover
+    """Resolve Accounting object reference from the naming service."""
+    return get_corba(netloc).get_object('Accounting', Accounting.AccountingIntf)
+
+
+def _create_accounting_endpoints(pool_size: Optional[int] = None) -> List[Endpoint]:
+    """Create endpoints of Accounting replicas, whose pools allow `pool_size` references if provided."""
+    return [Endpoint(netloc, ObjectReferencePool(partial(_resolve_accounting, netloc), TRANSPORT_ERRORS, pool_size),
+                     CircuitBreaker('Accounting at {}'.format(netloc), TRANSPORT_ERRORS))
+            for netloc in SETTINGS.corba_endpoints or [SETTINGS.corba_netloc]]
+
+
+def _get_payment_uuid(args: Sequence) -> Optional[str]:
+    """Return UUID of the payment among arguments of Accounting call."""
+    for arg in args:
+        if isinstance(arg, Accounting.PaymentData):
+            return arg.uuid
+    return None
+
+
+def _get_concurrency() -> int:
+    """Return maximal number of concurrent Accounting calls, by default the number of object references."""
+    return SETTINGS.corba_concurrency or get_pool_size() * len(ACCOUNTING_ROUTER.endpoints)
+
+
+def _create_accounting_client() -> CorbaClient:
+    """Create CORBA client of Accounting."""
+    return CorbaClient(_ACCOUNTING, AccountingCorbaRecoder('utf-8'), Accounting.INTERNAL_SERVER_ERROR)
+
+
+# Nothing is initialized on import, ORB and the client are created when Accounting is used for the first time.
+# Calls of the same payment are routed to the same replica, so the import follows registrar lookup.
+ACCOUNTING_ROUTER = Router(_create_accounting_endpoints, _get_payment_uuid)
+_ACCOUNTING = TracingClient(ACCOUNTING_ROUTER, 'corba')
+_ACCOUNTING_CLIENT = LazyClient(_create_accounting_client)
+# Idle references of the failed replica are discarded by the router and the replica is ejected by its breaker,
+# so the retried call goes to another replica or uses a reference freshly resolved from the naming service.
+# Each attempt waits for a slot in its lane, timeout of the call starts when the slot is acquired.
+ACCOUNTING_LANES = LaneScheduler(_get_concurrency)
+ACCOUNTING = CorbaClientProxy(MetricsClient(RetryClient(LaneClient(TimeoutClient(
+    RecordingClient(TracingClient(_ACCOUNTING_CLIENT, 'call'), AccountingCorbaRecoder._encode_bankpayment),
+    TRANSPORT_ERRORS, INTERRUPTIBLE_METHODS), ACCOUNTING_LANES), TRANSPORT_ERRORS, IDEMPOTENT_METHODS)))
+
+
+def prewarm() -> None:
+    """
+    Initialize CORBA client of Accounting ahead of its first use.
+
+    Client is created and Accounting object references of all replicas are resolved from the naming service
+    into the pools. Failure to reach a replica is only logged, the reference is resolved again on first use.
+    """
+    _ACCOUNTING_CLIENT.setup()
+    for endpoint in ACCOUNTING_ROUTER.endpoints:
+        try:
+            with endpoint.pool.reference():
+                pass
+        except TRANSPORT_ERRORS:
+            LOGGER.warning('Accounting object reference at %s could not be resolved in advance.', endpoint.name,
+                           exc_info=True)
+
+
+def create_accounting_probe(pool_size: int) -> Tuple[Router, CorbaClientProxy]:
+    """
+    Create router of Accounting replicas and client which calls them, both separate from `ACCOUNTING`.
+
+    Pools of the replicas allow `pool_size` references. Probes measure bare latency of the calls,
+    so the client doesn't schedule calls in lanes nor retry them.
+    """
+    router = Router(partial(_create_accounting_endpoints, pool_size))
+    client = CorbaClient(router, AccountingCorbaRecoder('utf-8'), Accounting.INTERNAL_SERVER_ERROR)
+    return router, CorbaClientProxy(TimeoutClient(client, TRANSPORT_ERRORS, INTERRUPTIBLE_METHODS))
+
+
+def _get_endpoint_stats(key: Callable[[dict], Any]) -> dict:
+    """Return values of the replica stats by endpoint labels."""
+    return dict(((name, ), key(stats)) for name, stats in ACCOUNTING_ROUTER.stats().items())
+
 
-_ACCOUNTING = SimpleLazyObject(lambda: _CORBA.get_object('Accounting', Accounting.AccountingIntf))  # pragma: no cover
-ACCOUNTING = CorbaClientProxy(
-    CorbaClient(_ACCOUNTING, AccountingCorbaRecoder('utf-8'), Accounting.INTERNAL_SERVER_ERROR))
+METRICS.register(Gauge(
+    'fred_pain_corba_circuit_breaker_open', 'Whether the circuit breaker of the CORBA replica is open.',
+    lambda: _get_endpoint_stats(lambda stats: int(stats['breaker']['state'] == OPEN)), ('endpoint', )))
+METRICS.register(Gauge(
+    'fred_pain_corba_circuit_breaker_trips', 'Number of times the circuit breaker of the CORBA replica was opened.',
+    lambda: _get_endpoint_stats(lambda stats: stats['breaker']['trips']), ('endpoint', )))
+METRICS.register(Gauge(
+    'fred_pain_corba_outstanding_calls', 'Number of calls in progress on the CORBA replica.',
+    lambda: _get_endpoint_stats(lambda stats: stats['outstanding']), ('endpoint', )))
+METRICS.register(Gauge(
+    'fred_pain_corba_pool_references', 'Number of object references in the pool by replica and their state.',
+    lambda: dict(((name, state), count) for name, stats in ACCOUNTING_ROUTER.stats().items()
+                 for state, count in stats['references'].items()), ('endpoint', 'state')))
+METRICS.register(Gauge(
+    'fred_pain_corba_lane_calls', 'Number of running and waiting CORBA calls by lane.',
+    lambda: dict(((lane, state), calls[lane]) for state, calls in ACCOUNTING_LANES.stats().items() for lane in LANES),
+    ('lane', 'state')))
+METRICS.register(Gauge(
+    'fred_pain_payment_encoding_cache_entries', 'Number of encoded payments in the cache.',
+    lambda: {(): PAYMENT_ENCODINGS.stats()['entries']}))
+METRICS.register(Gauge(
+    'fred_pain_payment_encoding_cache_bytes', 'Approximate size of encoded payments in the cache in bytes.',
+    lambda: {(): PAYMENT_ENCODINGS.stats()['memory']}))
@@ -0,0 +1,128 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Fake FRED Accounting servant for benchmarks and tests.
+
+`FakeAccounting` implements methods of the Accounting interface in pure Python on the CORBA level, i.e. it accepts
+and returns IDL structs. It may be used as a CORBA object by `pyfco.CorbaClient`, so the whole client stack
+including recoding is exercised without a running FRED.
+"""
+import random
+import time
+from threading import Lock
+from typing import Dict, Optional
+
+from fred_idl.Registry import Accounting
+
+
+class FakeAccounting(object):
+    """
+    Fake Accounting servant.
+
+    Args:
+        latency: Number of seconds each call takes.
+        errors: Mapping of names of Accounting exceptions to the probability they are raised
+            by `get_registrar_by_payment` and `get_registrar_by_handle_and_payment`.
+        invoices: Number of invoices returned for each imported payment. First one is an advance invoice
+            unique to the payment, others are account invoices shared among payments.
+        account_invoices: Number of distinct account invoices.
+        registrars: Number of registrars.
+        seed: Seed of the random generator.
+    """
+
+    def __init__(self, latency: float = 0, errors: Optional[Dict[str, float]] = None, invoices: int = 1,
+                 account_invoices: int = 10, registrars: int = 100, seed: Optional[int] = None):
+        self.latency = latency
+        self.errors = [(getattr(Accounting, name), rate) for name, rate in sorted((errors or {}).items())]
+        self.invoices = invoices
+        self.account_invoices = account_invoices
+        self.registrars = registrars
+        self.calls = 0
+        self._random = random.Random(seed)
+        self._processed = set()  # type: set
+        self._invoice_id = 0
+        self._lock = Lock()
+
+    def _call(self) -> None:
+        with self._lock:
+            self.calls += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _raise_error(self) -> None:
+        with self._lock:
+            value = self._random.random()
+        for error, rate in self.errors:
+            if value < rate:
+                raise error()
+            value -= rate
+
+    def _get_registrar(self, handle: str) -> Accounting.Registrar:
+        address = Accounting.PlaceAddress(street1='Milesovska 1136/5', street2='', street3='', city='Praha',
+                                          stateorprovince='', postalcode='13000', country_code='CZ')
+        return Accounting.Registrar(id=int(handle.rsplit('-', 1)[-1]), handle=handle, name='Registrar ' + handle,
+                                    organization='Organization', cin='', tin='', url='https://example.org',
+                                    phone='+420.222745111', fax='', address=address)
+
+    def _import(self, payment: Accounting.PaymentData):
+        with self._lock:
+            if payment.uuid in self._processed:
+                raise Accounting.CREDIT_ALREADY_PROCESSED()
+            self._processed.add(payment.uuid)
+            self._invoice_id += 1
+            invoice_id = self._invoice_id
+            shared = [self._random.randrange(self.account_invoices) for i in range(self.invoices - 1)]
+        invoices = []
+        if self.invoices:
+            invoices.append(Accounting.InvoiceReference(id=-invoice_id, number='ADV{}'.format(invoice_id),
+                                                        type=Accounting.InvoiceType.advance))
+        for number in shared:
+            invoices.append(Accounting.InvoiceReference(id=number, number='ACC{}'.format(number),
+                                                        type=Accounting.InvoiceType.account))
+        return invoices, Accounting.Credit(value=payment.price.value)
+
+    def get_registrar_by_payment(self, payment: Accounting.PaymentData):
+        """Return registrar by variable symbol of the payment."""
+        self._call()
+        self._raise_error()
+        if not payment.variable_symbol:
+            raise Accounting.REGISTRAR_NOT_FOUND()
+        return self._get_registrar('REG-{}'.format(int(payment.variable_symbol) % self.registrars)), 'cz'
+
+    def get_registrar_by_handle_and_payment(self, handle: str, payment: Accounting.PaymentData):
+        """Return registrar by its handle."""
+        self._call()
+        self._raise_error()
+        return self._get_registrar(handle), 'cz'
+
+    def import_payment(self, payment: Accounting.PaymentData):
+        """Import payment, return invoices and credit."""
+        self._call()
+        return self._import(payment)
+
+    def import_payment_by_registrar_handle(self, payment: Accounting.PaymentData, handle: str, tax_date):
+        """Import payment to the registrar, return invoices and credit."""
+        self._call()
+        return self._import(payment)
+
+    def get_registrar_references(self):
+        """Return references of all registrars."""
+        self._call()
+        return [Accounting.RegistrarReference(handle='REG-{}'.format(i), name='Registrar REG-{}'.format(i))
+                for i in range(self.registrars)]
@@ -0,0 +1,128 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Priority lanes of CORBA calls."""
+import threading
+from contextlib import contextmanager
+from threading import Condition
+from time import monotonic
+from typing import Any, Callable, Iterator, Optional
+
+from fred_pain.client import CorbaClientWrapper
+from fred_pain.metrics import METRICS, Histogram
+from fred_pain.settings import SETTINGS
+from fred_pain.timeout import DeadlineExceeded, get_call_deadline
+
+INTERACTIVE = 'interactive'
+BATCH = 'batch'
+LANES = (INTERACTIVE, BATCH)
+
+LANE_WAIT = METRICS.register(Histogram(
+    'fred_pain_corba_lane_wait_seconds', 'Time CORBA calls waited for a free slot by lane.', ('lane', )))
+
+_LOCAL = threading.local()
+
+
+@contextmanager
+def call_lane(lane: str) -> Iterator[None]:
+    """Schedule CORBA calls made by the current thread in the lane."""
+    previous = getattr(_LOCAL, 'lane', None)
+    _LOCAL.lane = lane
+    try:
+        yield
+    finally:
+        _LOCAL.lane = previous
+
+
+def get_call_lane() -> str:
+    """Return lane of CORBA calls of the current thread, calls are batch work unless set otherwise."""
+    return getattr(_LOCAL, 'lane', None) or BATCH
+
+
+class LaneScheduler(object):
+    """
+    Scheduler which limits concurrent calls and prefers interactive calls to batch work.
+
+    At most `concurrency()` calls run at the same time. When a slot is free, waiting interactive calls
+    are let through first. Batch calls are throttled to `FRED_PAIN_CORBA_BATCH_CONCURRENCY` concurrent calls,
+    if set, so the remaining slots are kept free for interactive calls.
+    Calls are scheduled only within the process, calls of other processes are neither counted nor preferred.
+    """
+
+    def __init__(self, concurrency: Callable[[], int]):
+        self.concurrency = concurrency
+        self.running = dict((lane, 0) for lane in LANES)
+        self.waiting = dict((lane, 0) for lane in LANES)
+        self._condition = Condition()
+
+    def stats(self) -> dict:
+        """Return numbers of running and waiting calls by lane."""
+        with self._condition:
+            return {'running': dict(self.running), 'waiting': dict(self.waiting)}
+
+    @contextmanager
+    def slot(self, lane: str, deadline: Optional[float] = None) -> Iterator[None]:
+        """
+        Wait for a free slot in the lane and hold it.
+
+        Raise `DeadlineExceeded` if no slot becomes free before the deadline.
+        """
+        start = monotonic()
+        with self._condition:
+            self.waiting[lane] += 1
+            try:
+                while not self._is_free(lane):
+                    timeout = None if deadline is None else deadline - monotonic()
+                    if timeout is not None and timeout <= 0:
+                        raise DeadlineExceeded('Deadline expired while waiting in {} lane.'.format(lane))
+                    self._condition.wait(timeout)
+            finally:
+                self.waiting[lane] -= 1
+                if lane == INTERACTIVE:
+                    # Batch calls may be waiting only for this one.
+                    self._condition.notify_all()
+            self.running[lane] += 1
+        LANE_WAIT.observe(monotonic() - start, lane)
+        try:
+            yield
+        finally:
+            with self._condition:
+                self.running[lane] -= 1
+                self._condition.notify_all()
+
+    def _is_free(self, lane: str) -> bool:
+        """Return whether a call in the lane may start now."""
+        if sum(self.running.values()) >= max(self.concurrency(), 1):
+            return False
+        if lane == BATCH:
+            limit = SETTINGS.corba_batch_concurrency
+            return not self.waiting[INTERACTIVE] and not (limit and self.running[BATCH] >= limit)
+        return True
+
+
+class LaneClient(CorbaClientWrapper):
+    """CORBA client wrapper which schedules the calls in the lane of the current thread."""
+
+    def __init__(self, client: Any, scheduler: LaneScheduler):
+        super().__init__(client)
+        self.scheduler = scheduler
+
+    def call(self, name: str, method: Callable, *args: Any) -> Any:
+        """Call the method once the lane has a free slot."""
+        with self.scheduler.slot(get_call_lane(), get_call_deadline()):
+            return method(*args)
@@ -0,0 +1,74 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Command to run performance benchmarks."""
+import argparse
+import json
+import platform
+
+from django.core.management.base import BaseCommand
+
+import fred_pain
+from fred_pain.benchmark import benchmark_processing, benchmark_recoder
+
+
+def error_rate(value):
+    """Parse error rate in format NAME=RATE."""
+    name, sep, rate = value.partition('=')
+    try:
+        return name, float(rate)
+    except ValueError:
+        raise argparse.ArgumentTypeError('Error rate must be in format NAME=RATE.')
+
+
+class Command(BaseCommand):
+    """Run performance benchmarks and print results as JSON."""
+
+    help = 'Run performance benchmarks and print results as JSON.'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument('benchmark', choices=('recoder', 'processing'), help='Benchmark to run')
+        parser.add_argument('--number', type=int, default=1000, help='Number of iterations of recoder benchmark')
+        parser.add_argument('--count', type=int, default=1000, help='Number of processed payments')
+        parser.add_argument('--batch-size', type=int, action='append', dest='batch_sizes',
+                            help='Value of FRED_PAIN_BATCH_SIZE, may be repeated (default: 1)')
+        parser.add_argument('--threads', type=int, default=1, help='Value of FRED_PAIN_PROCESSING_THREADS')
+        parser.add_argument('--overlap', action='store_true', help='Value of FRED_PAIN_OVERLAP_CALLS')
+        parser.add_argument('--latency', type=float, default=0, help='Latency of backend calls in seconds')
+        parser.add_argument('--error', type=error_rate, action='append', dest='errors', default=[],
+                            help='Probability of Accounting exception in format NAME=RATE, may be repeated')
+        parser.add_argument('--invoices', type=int, default=1, help='Number of invoices per payment')
+        parser.add_argument('--seed', type=int, default=0, help='Seed of the random generator')
+        parser.add_argument('--replay', help='File with recorded calls to replay instead of the fake servant')
+        parser.add_argument('--time-scale', type=float, default=1.0,
+                            help='Multiplier of latencies of replayed calls')
+
+    def handle(self, *args, **options):
+        """Run the benchmark."""
+        output = {'benchmark': options['benchmark'], 'version': fred_pain.__version__,
+                  'python': platform.python_version()}
+        if options['benchmark'] == 'recoder':
+            output['result'] = benchmark_recoder(number=options['number'])
+        else:
+            output['results'] = benchmark_processing(
+                count=options['count'], batch_sizes=options['batch_sizes'] or (1, ), threads=options['threads'],
+                latency=options['latency'], errors=dict(options['errors']), invoices=options['invoices'],
+                seed=options['seed'], overlap=options['overlap'], replay=options['replay'],
+                time_scale=options['time_scale'])
+        self.stdout.write(json.dumps(output, sort_keys=True))
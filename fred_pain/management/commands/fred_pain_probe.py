@@ -0,0 +1,62 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Command to check reachability and latency of the Accounting service."""
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from fred_pain.probe import probe_accounting
+
+
+class Command(BaseCommand):
+    """Check reachability and latency of the Accounting service and print results as JSON."""
+
+    help = ('Check reachability and latency of the Accounting service and print results as JSON. '
+            'Fail if any replica is unreachable, any call fails or the results exceed the thresholds.')
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument('--calls', type=int, default=10, help='Number of calls of get_registrar_references')
+        parser.add_argument('--concurrency', type=int, default=1, help='Number of concurrent calls')
+        parser.add_argument('--max-p50', type=float, help='Maximal median latency in seconds')
+        parser.add_argument('--max-p95', type=float, help='Maximal 95th percentile of latency in seconds')
+        parser.add_argument('--max-p99', type=float, help='Maximal 99th percentile of latency in seconds')
+        parser.add_argument('--min-throughput', type=float, help='Minimal number of calls per second')
+
+    def handle(self, *args, **options):
+        """Probe the Accounting service."""
+        result = probe_accounting(calls=options['calls'], concurrency=options['concurrency'])
+        self.stdout.write(json.dumps(result, sort_keys=True))
+
+        failures = []
+        for name, endpoint in sorted(result['endpoints'].items()):
+            if 'error' in endpoint:
+                failures.append('Accounting at {} could not be resolved.'.format(name))
+        if result['errors']:
+            failures.append('{} of {} calls failed.'.format(result['errors'], result['calls']))
+        for percent in (50, 95, 99):
+            limit = options['max_p{}'.format(percent)]
+            latency = result['latency_p{}'.format(percent)]
+            if limit is not None and latency > limit:
+                failures.append('Latency p{} {:.3f} s exceeds {:.3f} s.'.format(percent, latency, limit))
+        if options['min_throughput'] is not None and result['throughput'] < options['min_throughput']:
+            failures.append('Throughput {:.1f} calls/s is below {:.1f} calls/s.'.format(
+                result['throughput'], options['min_throughput']))
+        if failures:
+            raise CommandError(' '.join(failures))
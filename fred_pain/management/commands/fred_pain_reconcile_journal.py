@@ -0,0 +1,65 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Command to backfill registrars and invoices from the payment journal."""
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+from django_pain.models import BankPayment
+
+from fred_pain.models import PaymentJournal
+from fred_pain.processors import FredPaymentProcessor
+from fred_pain.settings import SETTINGS
+
+
+class Command(BaseCommand):
+    """Backfill registrars and invoices of payments credited according to the payment journal."""
+
+    help = 'Backfill registrars and invoices of payments credited according to the payment journal.'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument('--dry-run', action='store_true', help='Only count payments to be backfilled')
+
+    def handle(self, *args, **options):
+        """Backfill missing registrars and invoices in chunks."""
+        database = SETTINGS.journal_database
+        if not database:
+            raise CommandError('Setting FRED_PAIN_JOURNAL_DATABASE is not set.')
+
+        processor = FredPaymentProcessor()
+        chunk_size = max(SETTINGS.query_chunk_size, 1)
+        entries = PaymentJournal.objects.using(database).filter(state=PaymentJournal.CREDITED).order_by('pk')
+        iterator = entries.iterator(chunk_size=chunk_size)
+        count = 0
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                break
+            payments = BankPayment.objects.filter(client__isnull=True).in_bulk(
+                [entry.payment_uuid for entry in chunk], field_name='uuid')
+            responses = [(payments[entry.payment_uuid], processor._get_journal_response(entry))
+                         for entry in chunk if entry.payment_uuid in payments]
+            if not options['dry_run']:
+                processor._save_payments(responses)
+            count += len(responses)
+
+        if options['dry_run']:
+            self.stdout.write('{} payments would be backfilled.'.format(count))
+        else:
+            self.stdout.write('{} payments backfilled.'.format(count))
@@ -0,0 +1,41 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Command to synchronize the registrar directory with FRED."""
+from django.core.management.base import BaseCommand
+
+from fred_pain.registrars import sync_registrars
+
+
+class Command(BaseCommand):
+    """Synchronize the registrar directory with registrars in FRED."""
+
+    help = 'Synchronize the registrar directory with registrars in FRED.'
+
+    def add_arguments(self, parser):
+        """Add command arguments."""
+        parser.add_argument('--dry-run', action='store_true', help='Only count registrars to be changed')
+
+    def handle(self, *args, **options):
+        """Write registrars which changed in FRED."""
+        result = sync_registrars(dry_run=options['dry_run'])
+        if options['dry_run']:
+            message = '{} registrars would be created, {} updated and {} deleted.'
+        else:
+            message = '{} registrars created, {} updated and {} deleted.'
+        self.stdout.write(message.format(*result))
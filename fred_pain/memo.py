@@ -0,0 +1,106 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Memoization of encoded CORBA structs."""
+import sys
+from collections import OrderedDict
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable
+
+from fred_pain.metrics import METRICS, Counter
+from fred_pain.settings import SETTINGS
+
+PAYMENT_ENCODING_LOOKUPS = METRICS.register(Counter(
+    'fred_pain_payment_encoding_cache_lookups_total', 'Number of lookups in the cache of encoded payments.',
+    ('result', )))
+
+
+def get_size(value: Any) -> int:
+    """Return approximate size of the value in bytes, including items of tuples and fields of structs."""
+    size = sys.getsizeof(value)
+    if isinstance(value, tuple):
+        size += sum(get_size(item) for item in value)
+    elif hasattr(value, '__dict__'):
+        size += sys.getsizeof(vars(value)) + sum(get_size(field) for field in vars(value).values())
+    return size
+
+
+class EncodingCache(object):
+    """
+    Bounded LRU cache of payments encoded by a function.
+
+    Encoded payments are cached by key together with fingerprint of their data. Cached struct is returned only
+    if the fingerprint matches, so a payment is encoded again whenever its data change.
+    The least recently used structs are evicted when there are more than `FRED_PAIN_PAYMENT_ENCODING_CACHE_SIZE`
+    of them or their approximate size exceeds `FRED_PAIN_PAYMENT_ENCODING_CACHE_MAX_MEMORY` bytes.
+    Cached structs are shared, so they must not be modified.
+    """
+
+    def __init__(self, encode: Callable[[Any], Any], key: Callable[[Any], Hashable],
+                 fingerprint: Callable[[Any], Hashable]):
+        self.func = encode
+        self.key = key
+        self.fingerprint = fingerprint
+        self.memory = 0
+        # Key: (fingerprint, encoded value, size)
+        self._entries = OrderedDict()  # type: OrderedDict
+        self._lock = Lock()
+
+    def stats(self) -> Dict[str, int]:
+        """Return number of cached structs and their approximate size in bytes."""
+        with self._lock:
+            return {'entries': len(self._entries), 'memory': self.memory}
+
+    def clear(self) -> None:
+        """Remove all cached structs."""
+        with self._lock:
+            self._entries.clear()
+            self.memory = 0
+
+    def encode(self, value: Any) -> Any:
+        """Return encoded value, from the cache if its data didn't change."""
+        max_entries = SETTINGS.payment_encoding_cache_size
+        if not max_entries:
+            return self.func(value)
+
+        key = self.key(value)
+        fingerprint = self.fingerprint(value)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] == fingerprint:
+                self._entries.move_to_end(key)
+                encoded = entry[1]
+            else:
+                encoded = None
+        if encoded is not None:
+            PAYMENT_ENCODING_LOOKUPS.inc('hit')
+            return encoded
+
+        PAYMENT_ENCODING_LOOKUPS.inc('miss')
+        encoded = self.func(value)
+        size = get_size(fingerprint) + get_size(encoded)
+        max_memory = SETTINGS.payment_encoding_cache_max_memory
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry is not None:
+                self.memory -= entry[2]
+            self._entries[key] = (fingerprint, encoded, size)
+            self.memory += size
+            while self._entries and (len(self._entries) > max_entries or (max_memory and self.memory > max_memory)):
+                self.memory -= self._entries.popitem(last=False)[1][2]
+        return encoded
@@ -0,0 +1,308 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Metrics of fred-pain in Prometheus text format.
+
+Metrics are collected in memory by the `METRICS` registry. They are exported by `export_metrics` to a sink,
+which is a callable set by `FRED_PAIN_METRICS_SINK` receiving the metrics in the Prometheus text format.
+"""
+import logging
+import os
+from bisect import bisect_left
+from threading import Lock
+from time import perf_counter
+from typing import Any, Callable, Dict, Iterable, List, Sequence, Tuple
+
+from fred_pain.client import CorbaClientWrapper
+from fred_pain.settings import SETTINGS
+
+LOGGER = logging.getLogger(__name__)
+
+# Default buckets of latency histograms in seconds.
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+
+Sample = Tuple[str, Sequence[Tuple[str, str]], float]
+
+
+def _format_labels(labels: Sequence[Tuple[str, str]]) -> str:
+    if not labels:
+        return ''
+    return '{{{}}}'.format(','.join('{}="{}"'.format(
+        name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in labels))
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(object):
+    """Base class for metrics."""
+
+    type = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = Lock()
+
+    def samples(self) -> Iterable[Sample]:
+        """Return samples of the metric as (name suffix, labels, value)."""
+        raise NotImplementedError  # pragma: no cover
+
+    def reset(self) -> None:
+        """Reset the collected values."""
+
+    def dump(self) -> Any:
+        """Return picklable copy of the collected values or `None` if there are none."""
+
+    def merge(self, values: Any) -> None:
+        """Add values dumped by the same metric, e.g. in another process."""
+
+    def render(self) -> List[str]:
+        """Return lines of the metric in Prometheus text format."""
+        lines = ['# HELP {} {}'.format(self.name, self.documentation), '# TYPE {} {}'.format(self.name, self.type)]
+        for suffix, labels, value in self.samples():
+            lines.append('{}{}{} {}'.format(self.name, suffix, _format_labels(labels), _format_value(value)))
+        return lines
+
+
+class Counter(Metric):
+    """Counter metric."""
+
+    type = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values = {}  # type: Dict[tuple, float]
+
+    def inc(self, *labelvalues: str, amount: float = 1) -> None:
+        """Increment the counter for the label values."""
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def get(self, *labelvalues: str) -> float:
+        """Return value of the counter for the label values."""
+        with self._lock:
+            return self._values.get(labelvalues, 0)
+
+    def reset(self) -> None:
+        """Reset the counters."""
+        with self._lock:
+            self._values.clear()
+
+    def dump(self) -> Dict[tuple, float]:
+        """Return copy of the counters."""
+        with self._lock:
+            return dict(self._values)
+
+    def merge(self, values: Dict[tuple, float]) -> None:
+        """Add the counters."""
+        with self._lock:
+            for labelvalues, value in values.items():
+                self._values[labelvalues] = self._values.get(labelvalues, 0) + value
+
+    def samples(self) -> Iterable[Sample]:
+        """Return value of the counter for each label values."""
+        with self._lock:
+            values = sorted(self._values.items())
+        return [('', tuple(zip(self.labelnames, labelvalues)), value) for labelvalues, value in values]
+
+
+class Histogram(Metric):
+    """Histogram metric."""
+
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Label values: ([count per bucket, count over the last bucket], sum)
+        self._values = {}  # type: Dict[tuple, list]
+
+    def observe(self, value: float, *labelvalues: str) -> None:
+        """Observe the value for the label values."""
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            if entry is None:
+                entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+            entry[0][index] += 1
+            entry[1] += value
+
+    def get_count(self, *labelvalues: str) -> int:
+        """Return number of observed values for the label values."""
+        with self._lock:
+            entry = self._values.get(labelvalues)
+            return sum(entry[0]) if entry else 0
+
+    def reset(self) -> None:
+        """Reset the observed values."""
+        with self._lock:
+            self._values.clear()
+
+    def dump(self) -> Dict[tuple, list]:
+        """Return copy of the observed values."""
+        with self._lock:
+            return dict((labelvalues, [list(counts), total]) for labelvalues, (counts, total) in self._values.items())
+
+    def merge(self, values: Dict[tuple, list]) -> None:
+        """Add the observed values."""
+        with self._lock:
+            for labelvalues, (counts, total) in values.items():
+                entry = self._values.get(labelvalues)
+                if entry is None:
+                    entry = self._values[labelvalues] = [[0] * (len(self.buckets) + 1), 0.0]
+                entry[0] = [count + other for count, other in zip(entry[0], counts)]
+                entry[1] += total
+
+    def samples(self) -> Iterable[Sample]:
+        """Return cumulative buckets, sum and count for each label values."""
+        with self._lock:
+            values = sorted((labelvalues, (list(counts), total)) for labelvalues, (counts, total)
+                            in self._values.items())
+        samples = []  # type: list
+        for labelvalues, (counts, total) in values:
+            labels = tuple(zip(self.labelnames, labelvalues))
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'), ), counts):
+                cumulative += count
+                samples.append(('_bucket', labels + (('le', _format_value(bound)), ), cumulative))
+            samples.append(('_sum', labels, total))
+            samples.append(('_count', labels, cumulative))
+        return samples
+
+
+class Gauge(Metric):
+    """Gauge metric whose values are provided by a callback when rendered."""
+
+    type = 'gauge'
+
+    def __init__(self, name: str, documentation: str, callback: Callable[[], Dict[tuple, float]],
+                 labelnames: Sequence[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.callback = callback
+
+    def samples(self) -> Iterable[Sample]:
+        """Return current values provided by the callback."""
+        return [('', tuple(zip(self.labelnames, labelvalues)), value)
+                for labelvalues, value in sorted(self.callback().items())]
+
+
+class MetricsRegistry(object):
+    """Registry of metrics."""
+
+    def __init__(self):
+        self._metrics = {}  # type: Dict[str, Metric]
+        self._lock = Lock()
+
+    def register(self, metric: Metric) -> Any:
+        """Register the metric and return it."""
+        with self._lock:
+            if metric.name in self._metrics:
+                raise ValueError('Metric {} is already registered.'.format(metric.name))
+            self._metrics[metric.name] = metric
+        return metric
+
+    def reset(self) -> None:
+        """Reset values of all metrics."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        for metric in metrics:
+            metric.reset()
+
+    def dump(self) -> Dict[str, Any]:
+        """Return picklable copy of values of all metrics."""
+        with self._lock:
+            metrics = list(self._metrics.items())
+        values = {}
+        for name, metric in metrics:
+            value = metric.dump()
+            if value is not None:
+                values[name] = value
+        return values
+
+    def merge(self, values: Dict[str, Any]) -> None:
+        """Add values dumped by the registry, e.g. in another process. Unknown metrics are ignored."""
+        with self._lock:
+            metrics = dict(self._metrics)
+        for name, value in values.items():
+            if name in metrics:
+                metrics[name].merge(value)
+
+    def render(self) -> str:
+        """Return all metrics in Prometheus text format."""
+        with self._lock:
+            metrics = sorted(self._metrics.items())
+        lines = []  # type: List[str]
+        for name, metric in metrics:
+            lines.extend(metric.render())
+        return ''.join(line + '\n' for line in lines)
+
+
+METRICS = MetricsRegistry()
+
+CORBA_CALL_DURATION = METRICS.register(Histogram(
+    'fred_pain_corba_call_duration_seconds', 'Duration of calls to the CORBA server.', ('method', )))
+CORBA_CALLS = METRICS.register(Counter(
+    'fred_pain_corba_calls_total', 'Number of calls to the CORBA server by their outcome.', ('method', 'outcome')))
+
+
+def export_metrics() -> None:
+    """Export metrics to the sink set by `FRED_PAIN_METRICS_SINK`, if any."""
+    sink = SETTINGS.metrics_sink
+    if sink is None:
+        return
+    try:
+        sink(METRICS.render())
+    except Exception:
+        LOGGER.exception('Export of metrics failed.')
+
+
+def textfile_sink(text: str) -> None:
+    """
+    Write metrics to the file `FRED_PAIN_METRICS_TEXTFILE`.
+
+    File is replaced atomically, so it may be read by the textfile collector of the node exporter.
+    """
+    path = SETTINGS.metrics_textfile
+    tmp_path = '{}.{}.tmp'.format(path, os.getpid())
+    with open(tmp_path, 'w') as tmp_file:
+        tmp_file.write(text)
+    os.replace(tmp_path, path)
+
+
+class MetricsClient(CorbaClientWrapper):
+    """CORBA client wrapper which records duration and outcome of calls."""
+
+    def call(self, name: str, method: Callable, *args: Any) -> Any:
+        """Call the method and record its duration and outcome."""
+        outcome = 'ok'
+        start = perf_counter()
+        try:
+            return method(*args)
+        except Exception as error:
+            outcome = type(error).__name__
+            raise
+        finally:
+            CORBA_CALL_DURATION.observe(perf_counter() - start, name)
+            CORBA_CALLS.inc(name, outcome)
@@ -0,0 +1,45 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Create payment journal."""
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Create payment journal."""
+
+    initial = True
+
+    dependencies = []  # type: list
+
+    operations = [
+        migrations.CreateModel(
+            name='PaymentJournal',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('payment_uuid', models.UUIDField(unique=True)),
+                ('state', models.CharField(choices=[('sent', 'sent'), ('credited', 'credited'),
+                                                    ('already_processed', 'already processed')], max_length=20)),
+                ('registrar_handle', models.TextField(blank=True)),
+                ('registrar_id', models.IntegerField(blank=True, null=True)),
+                ('invoices', models.TextField(blank=True)),
+                ('create_time', models.DateTimeField(auto_now_add=True)),
+                ('update_time', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,42 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Create registrar directory."""
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    """Create registrar directory."""
+
+    dependencies = [
+        ('fred_pain', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Registrar',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('handle', models.CharField(max_length=255, unique=True)),
+                ('name', models.TextField()),
+                ('handle_search', models.CharField(db_index=True, max_length=255)),
+                ('name_search', models.TextField(db_index=True)),
+                ('update_time', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
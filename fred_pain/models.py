@@ -0,0 +1,68 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Models of fred-pain."""
+from django.db import models
+
+
+class PaymentJournal(models.Model):
+    """
+    Journal of payments imported to FRED.
+
+    Entry is created before payment is sent to FRED and updated when the response is received,
+    so it survives rollback of the transaction in which the payment is processed.
+    Entry of a rejected payment is deleted.
+    """
+
+    SENT = 'sent'
+    CREDITED = 'credited'
+    ALREADY_PROCESSED = 'already_processed'
+    STATE_CHOICES = (
+        (SENT, 'sent'),
+        (CREDITED, 'credited'),
+        (ALREADY_PROCESSED, 'already processed'),
+    )
+
+    payment_uuid = models.UUIDField(unique=True)
+    state = models.CharField(max_length=20, choices=STATE_CHOICES)
+    registrar_handle = models.TextField(blank=True)
+    registrar_id = models.IntegerField(null=True, blank=True)
+    # JSON list of [id, number, type] of received invoices.
+    invoices = models.TextField(blank=True)
+    create_time = models.DateTimeField(auto_now_add=True)
+    update_time = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '{} ({})'.format(self.payment_uuid, self.state)
+
+
+class Registrar(models.Model):
+    """
+    Registrar synchronized from FRED.
+
+    Lowercase handle and name are stored in indexed fields for case-insensitive search.
+    """
+
+    handle = models.CharField(max_length=255, unique=True)
+    name = models.TextField()
+    handle_search = models.CharField(max_length=255, db_index=True)
+    name_search = models.TextField(db_index=True)
+    update_time = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return '{} ({})'.format(self.name, self.handle)
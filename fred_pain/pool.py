@@ -0,0 +1,130 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Pool of CORBA object references."""
+import logging
+from contextlib import contextmanager
+from threading import Condition
+from time import monotonic
+from typing import Any, Callable, Dict, Iterator, Optional, Tuple, Type
+
+from fred_pain.settings import SETTINGS
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_pool_size() -> int:
+    """
+    Return maximal number of references checked out at the same time.
+
+    Unless `FRED_PAIN_CORBA_POOL_SIZE` is set, the pool is large enough for all payments sent concurrently
+    by processing threads or asynchronous processing, twice as large if registrar lookups and imports overlap.
+    """
+    if SETTINGS.corba_pool_size:
+        return SETTINGS.corba_pool_size
+    size = max(SETTINGS.processing_threads, SETTINGS.async_concurrency, 1)
+    return size * 2 if SETTINGS.overlap_calls else size
+
+
+class ObjectReferencePool(object):
+    """
+    Thread-safe pool of CORBA object references.
+
+    At most `size` references, `get_pool_size()` by default, are checked out at the same time, other threads wait
+    until a reference is returned. References are resolved by the factory when needed. A reference is discarded
+    when a call raises one of the errors, so a fresh one is resolved on next checkout. References idle for more than
+    `FRED_PAIN_CORBA_POOL_VALIDATE_AFTER` seconds are validated on checkout.
+    """
+
+    def __init__(self, factory: Callable[[], Any], errors: Tuple[Type[BaseException], ...],
+                 size: Optional[int] = None):
+        self.factory = factory
+        self.errors = errors
+        self.size = size
+        self.created = 0
+        self.discarded = 0
+        self._idle = []  # type: list
+        self._in_use = 0
+        self._condition = Condition()
+
+    def stats(self) -> Dict[str, int]:
+        """Return current state of the pool."""
+        with self._condition:
+            return {'idle': len(self._idle), 'in_use': self._in_use, 'created': self.created,
+                    'discarded': self.discarded}
+
+    def clear(self) -> None:
+        """Discard all idle references."""
+        with self._condition:
+            self.discarded += len(self._idle)
+            self._idle = []
+
+    @contextmanager
+    def reference(self) -> Iterator[Any]:
+        """Check out a reference for the duration of the context."""
+        with self._condition:
+            while self._in_use >= (self.size or get_pool_size()):
+                self._condition.wait()
+            self._in_use += 1
+        try:
+            ref = self._checkout()
+            try:
+                yield ref
+            except self.errors:
+                LOGGER.info('Object reference failed, discarding it.')
+                with self._condition:
+                    self.discarded += 1
+                raise
+            except BaseException:
+                # Reference is fine, the call failed for other reasons.
+                self._return(ref)
+                raise
+            self._return(ref)
+        finally:
+            with self._condition:
+                self._in_use -= 1
+                self._condition.notify()
+
+    def _return(self, ref: Any) -> None:
+        with self._condition:
+            self._idle.append((ref, monotonic()))
+
+    def _checkout(self) -> Any:
+        """Return a valid idle reference or a new one."""
+        while True:
+            with self._condition:
+                if not self._idle:
+                    break
+                # Use the most recently returned reference, it is the least likely to be stale.
+                ref, returned = self._idle.pop()
+            if monotonic() - returned <= SETTINGS.corba_pool_validate_after or self._validate(ref):
+                return ref
+            LOGGER.info('Object reference is not valid, discarding it.')
+            with self._condition:
+                self.discarded += 1
+
+        ref = self.factory()
+        with self._condition:
+            self.created += 1
+        return ref
+
+    def _validate(self, ref: Any) -> bool:
+        try:
+            return not ref._non_existent()
+        except self.errors:
+            return False
@@ -0,0 +1,87 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Health probe of the Accounting service."""
+from concurrent.futures import ThreadPoolExecutor
+from time import perf_counter
+from typing import Any, Callable, Dict, Sequence
+
+from fred_pain.corba import create_accounting_probe
+from fred_pain.pool import get_pool_size
+
+
+def probe_accounting(calls: int = 10, concurrency: int = 1) -> Dict[str, Any]:
+    """
+    Measure reachability and latency of the Accounting service.
+
+    Accounting object reference of each replica is resolved from its naming service first. Then `calls` calls
+    of read-only `get_registrar_references` are made by `concurrency` threads. Calls are made by a separate client,
+    which doesn't schedule them in lanes nor retry them, and whose pools allow at least `concurrency` references,
+    so latencies include no waiting.
+    Return time of the resolution or its error for each replica, number of failed calls with the first error,
+    latency percentiles of successful calls and their number per second.
+    """
+    router, accounting = create_accounting_probe(max(get_pool_size(), concurrency))
+    endpoints = {}  # type: Dict[str, Dict[str, Any]]
+    for endpoint in router.endpoints:
+        start = perf_counter()
+        try:
+            with endpoint.pool.reference():
+                pass
+        except Exception as error:
+            endpoints[endpoint.name] = {'error': repr(error)}
+        else:
+            endpoints[endpoint.name] = {'resolve': perf_counter() - start}
+
+    latencies = []
+    errors = []
+    start = perf_counter()
+    with ThreadPoolExecutor(max_workers=max(concurrency, 1)) as executor:
+        futures = [executor.submit(_timed_call, accounting.get_registrar_references) for i in range(calls)]
+        for future in futures:
+            try:
+                latencies.append(future.result())
+            except Exception as error:
+                errors.append(repr(error))
+    elapsed = perf_counter() - start
+    latencies.sort()
+    return {
+        'endpoints': endpoints,
+        'calls': calls,
+        'concurrency': concurrency,
+        'errors': len(errors),
+        'first_error': errors[0] if errors else None,
+        'latency_p50': percentile(latencies, 50),
+        'latency_p95': percentile(latencies, 95),
+        'latency_p99': percentile(latencies, 99),
+        'throughput': len(latencies) / elapsed if elapsed else 0.0,
+    }
+
+
+def percentile(values: Sequence[float], percent: float) -> float:
+    """Return percentile of sorted values by the nearest rank method."""
+    if not values:
+        return 0.0
+    return values[max(int(round(percent / 100 * len(values))) - 1, 0)]
+
+
+def _timed_call(method: Callable) -> float:
+    """Call the method and return its duration in seconds."""
+    start = perf_counter()
+    method()
+    return perf_counter() - start
@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2018-2019  CZ.NIC, z. s. p. o.
+# Copyright (C) 2018-2026  CZ.NIC, z. s. p. o.
 #
 # This file is part of FRED.
 #
@@ -17,27 +17,56 @@
 # along with FRED.  If not, see <https://www.gnu.org/licenses/>.
 
 """FRED payment processors."""
+import asyncio
+import json
 import logging
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import date
-from typing import Iterable, Optional
+from functools import lru_cache, partial
+from itertools import islice
+from typing import Any, Callable, Iterable, Iterator, List, NamedTuple, Optional, Sequence, Tuple, cast
 
 from django.core.exceptions import ImproperlyConfigured
+from django.db import IntegrityError, connections, transaction
+from django.db.models import prefetch_related_objects
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 from django_pain.constants import InvoiceType, PaymentProcessingError
 from django_pain.models import BankPayment, Client, Invoice
 from django_pain.processors import AbstractPaymentProcessor, InvalidTaxDateError, ProcessPaymentResult
 from fred_idl.Registry import Accounting
 
+from fred_pain.cache import get_registrar_references, is_payment_rejected, set_payment_rejected
 from fred_pain.corba import ACCOUNTING
+from fred_pain.lanes import BATCH, INTERACTIVE, call_lane, get_call_lane
+from fred_pain.metrics import METRICS, Counter, export_metrics
+from fred_pain.models import PaymentJournal, Registrar
+from fred_pain.registrars import get_registrar_choices, search_registrars
 from fred_pain.settings import SETTINGS
+from fred_pain.sharding import ShardLocks, create_pool, get_shard, get_shard_key
+from fred_pain.timeout import DeadlineExceeded, call_deadline, get_deadline, is_expired
+from fred_pain.tracing import PaymentTrace, Tracer, get_trace, tracing
 
 INVOICE_TYPE_MAP = {
     Accounting.InvoiceType.advance: InvoiceType.ADVANCE,
     Accounting.InvoiceType.account: InvoiceType.ACCOUNT,
 }
+INVOICE_TYPE_VALUE_MAP = {value.value: key for key, value in INVOICE_TYPE_MAP.items()}
 
 LOGGER = logging.getLogger(__name__)
 
+DEADLINE_EXPIRATIONS = METRICS.register(Counter(
+    'fred_pain_processing_deadline_expirations_total', 'Number of payment processings stopped by the deadline.'))
+
+# Response of the FRED backend to a payment. Registrar is `None` if there is nothing to be stored.
+BackendResponse = NamedTuple('BackendResponse', [('result', ProcessPaymentResult), ('registrar', Any),
+                                                 ('invoices', Sequence)])
+# Payment with response of the FRED backend, `None` if the payment wasn't processed before the deadline.
+SentPayment = Tuple[BankPayment, Optional[BackendResponse]]
+# Registrar restored from the payment journal.
+JournaledRegistrar = NamedTuple('JournaledRegistrar', [('id', int), ('handle', str)])
+
 
 class FredPaymentProcessor(AbstractPaymentProcessor):
     """FRED payment processor."""
@@ -46,32 +75,391 @@ class FredPaymentProcessor(AbstractPaymentProcessor):
     manual_tax_date = True
 
     def process_payments(self, payments: Iterable[BankPayment]) -> Iterable[ProcessPaymentResult]:
-        """Process payment through FRED."""
-        for payment in payments:
-            yield self.process_payment(payment)
+        """
+        Process payment through FRED.
+
+        If `FRED_PAIN_PROCESSING_THREADS` is greater than one, CORBA calls for that many payments are made
+        concurrently by a thread pool. Results are still yielded in order of payments and all database writes
+        are done in the calling thread.
+
+        If `FRED_PAIN_PROCESSING_PROCESSES` is greater than one, payments are split into that many shards
+        by `FRED_PAIN_PROCESSING_SHARD_KEY` and sent by worker processes instead.
+
+        If `FRED_PAIN_BATCH_SIZE` is greater than one, responses for that many payments are collected
+        and stored in bulk in a single transaction. Otherwise invoices shared by payments are resolved only once
+        and links of each payment to its invoices are stored at once before its result is yielded.
+
+        Bank accounts of payments are fetched in chunks of `FRED_PAIN_QUERY_CHUNK_SIZE`.
+        If `FRED_PAIN_PROCESSING_DEADLINE` is set, no payments are sent to FRED after it expires.
+        Results are returned only up to the first payment not processed before the deadline, so they still match
+        payments by order. Remaining payments are left for the next processing, although responses received
+        for some of them are already stored.
+        If `FRED_PAIN_JOURNAL_DATABASE` is set, payments already credited according to the payment journal
+        are not sent to FRED again.
+        If `FRED_PAIN_TRACING` is set, time of each payment is split into phases and summary is logged at the end.
+        Metrics are exported when the processing ends.
+        """
+        deadline = get_deadline(SETTINGS.processing_deadline)
+        payments = self._iter_payments(payments)
+        tracer = Tracer()
+        try:
+            unsent = False
+            for result in self._store_responses(self._send_payments(payments, deadline, tracer), tracer):
+                if result is None and not unsent:
+                    unsent = True
+                    self._deadline_expired()
+                if not unsent:
+                    yield result
+        finally:
+            tracer.report()
+            export_metrics()
 
-    def assign_payment(self, payment: BankPayment, client_id: str, tax_date: date = None) -> ProcessPaymentResult:
+    def _store_responses(self, responses: Iterable[SentPayment],
+                         tracer: Tracer) -> Iterator[Optional[ProcessPaymentResult]]:
+        """Store responses of payments and yield their results, `None` for payments without response."""
+        batch_size = SETTINGS.batch_size
+        if batch_size <= 1:
+            index = InvoiceIndex()
+            for payment, response in responses:
+                result = None  # type: Optional[ProcessPaymentResult]
+                if response is not None:
+                    with tracer.storing([payment]):
+                        result = self._save_payment(payment, response, index)
+                yield result
+            return
+
+        batch = []  # type: list
+        for item in responses:
+            batch.append(item)
+            if len(batch) >= batch_size:
+                yield from self._save_batch(batch, tracer)
+                batch = []
+        yield from self._save_batch(batch, tracer)
+
+    def _save_batch(self, batch: Sequence[SentPayment], tracer: Tracer) -> List[Optional[ProcessPaymentResult]]:
+        with tracer.storing([payment for payment, response in batch]):
+            results = iter(self._save_payments([(payment, response) for payment, response in batch
+                                                if response is not None]))
+        return [None if response is None else next(results) for payment, response in batch]
+
+    @staticmethod
+    def _iter_payments(payments: Iterable[BankPayment]) -> Iterator[BankPayment]:
+        """
+        Iterate over payments with their bank accounts fetched in chunks.
+
+        Payments are iterated as the caller does, querysets are not queried again, because the caller pairs results
+        with its own evaluation of payments. Bank accounts are prefetched by a single query per chunk.
+        """
+        return FredPaymentProcessor._prefetch_accounts(payments, max(SETTINGS.query_chunk_size, 1))
+
+    @staticmethod
+    def _prefetch_accounts(payments: Iterable[BankPayment], chunk_size: int) -> Iterator[BankPayment]:
+        iterator = iter(payments)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            prefetch_related_objects(chunk, 'account')
+            yield from chunk
+
+    def _send_payments(self, payments: Iterable[BankPayment], deadline: Optional[float] = None,
+                       tracer: Optional[Tracer] = None) -> Iterator[SentPayment]:
+        """
+        Send payments to FRED and yield them with their responses in order.
+
+        Payments not processed before the deadline are yielded with response `None`, at least one of them
+        if the deadline expired. No payments are sent after the deadline and payments which follow
+        all received responses are not yielded.
+        Traces of sent payments are started by the tracer.
+        """
+        if tracer is None:
+            tracer = Tracer()
+        processes = SETTINGS.processing_processes
+        if processes > 1:
+            yield from self._send_payments_sharded(payments, processes, deadline, tracer)
+            return
+
+        threads = SETTINGS.processing_threads
+        if threads <= 1:
+            for payment, response in self._journal_payments(payments):
+                if response is None:
+                    if not is_expired(deadline):
+                        response = self._send_before_deadline(payment, deadline, tracer.start(payment))
+                    if response is None:
+                        yield payment, None
+                        return
+                    response = self._close_journal(payment, response)
+                yield payment, response
+            return
+
+        # Bank accounts are already fetched by the iterator, so the workers don't touch the database.
+        with ThreadPoolExecutor(max_workers=threads) as executor:
+            pending = deque()  # type: deque
+            try:
+                for payment, response in self._journal_payments(payments):
+                    if response is None and is_expired(deadline):
+                        pending.append((payment, _completed(None)))
+                        break
+                    if response is None:
+                        future = executor.submit(self._send_before_deadline, payment, deadline,
+                                                 tracer.start(payment))
+                    else:
+                        future = _completed(response)
+                    pending.append((payment, future))
+                    if len(pending) >= threads:
+                        yield self._receive(*pending.popleft())
+                while pending:
+                    yield self._receive(*pending.popleft())
+            finally:
+                # Do not send payments whose results wouldn't be stored.
+                for payment, future in pending:
+                    future.cancel()
+
+    def _send_payments_sharded(self, payments: Iterable[BankPayment], processes: int, deadline: Optional[float] = None,
+                               tracer: Optional[Tracer] = None) -> Iterator[SentPayment]:
+        """
+        Send payments to FRED by worker processes and yield them with their responses in order.
+
+        Each chunk of payments is split into shards by their shard keys, so payments with the same key are sent
+        by a single process in order. Shard keys are held by advisory locks until the processing ends.
+        Payment whose key is locked by another process is left for the next processing with all following payments.
+        If any shard stops at the deadline, responses of the whole chunk are yielded, but no further chunks are sent.
+        """
+        if tracer is None:
+            tracer = Tracer()
+        chunk_size = max(SETTINGS.query_chunk_size, 1)
+        iterator = self._journal_payments(payments)
+        locks = ShardLocks()
+        pool = create_pool(processes)
+        try:
+            while True:
+                chunk = list(islice(iterator, chunk_size))
+                if not chunk:
+                    return
+
+                shards = [[] for i in range(processes)]  # type: list
+                indexes = []
+                locked = True
+                for position, (payment, response) in enumerate(chunk):
+                    if response is None:
+                        key = get_shard_key(payment)
+                        if not locks.acquire(key):
+                            LOGGER.warning('Payment %s is locked, remaining payments are left for the next '
+                                           'processing.', str(payment.uuid))
+                            del chunk[position:]
+                            locked = False
+                            break
+                        indexes.append(get_shard(key, processes))
+                        shards[indexes[-1]].append(payment)
+                        tracer.start(payment)
+
+                tasks = [pool.apply_async(_send_shard, (self, shard, deadline)) for shard in shards]
+                responses = []
+                for shard, task in zip(shards, tasks):
+                    shard_responses, traces, metrics = task.get()
+                    METRICS.merge(metrics)
+                    responses.append(iter(shard_responses))
+                    for payment, durations in zip(shard, traces):
+                        trace = tracer.get(payment)
+                        if trace is not None and durations is not None:
+                            trace.merge(durations)
+
+                indexes.reverse()
+                expired = False
+                for payment, response in chunk:
+                    if response is None:
+                        response = next(responses[indexes.pop()], None)
+                        if response is None:
+                            # Other shards may have sent later payments, their responses must be stored.
+                            expired = True
+                            yield payment, None
+                            continue
+                        response = self._close_journal(payment, self._load_response(response))
+                    yield payment, response
+                if expired or not locked:
+                    return
+        finally:
+            pool.terminate()
+            pool.join()
+            locks.release()
+
+    def _receive(self, payment: BankPayment, future: Future) -> SentPayment:
+        """Wait for response of the payment and record it in the payment journal."""
+        response = future.result()
+        if response is None:
+            return payment, None
+        return payment, self._close_journal(payment, response)
+
+    @staticmethod
+    def _dump_response(response: BackendResponse) -> BackendResponse:
+        """Return picklable copy of the response."""
+        if response.registrar is None:
+            return response
+        return BackendResponse(response.result,
+                               JournaledRegistrar(id=response.registrar.id, handle=response.registrar.handle),
+                               FredPaymentProcessor._dump_invoices(response.invoices))
+
+    @staticmethod
+    def _load_response(response: BackendResponse) -> BackendResponse:
+        """Return response from its picklable copy."""
+        if response.registrar is None:
+            return response
+        return BackendResponse(response.result, response.registrar,
+                               FredPaymentProcessor._load_invoices(response.invoices))
+
+    @staticmethod
+    def _dump_invoices(invoices: Sequence) -> List[list]:
+        """Return invoice references as lists of id, number and type."""
+        return [[invoice.id, invoice.number, INVOICE_TYPE_MAP[invoice.type].value] for invoice in invoices]
+
+    @staticmethod
+    def _load_invoices(data: Sequence[Sequence]) -> List[Any]:
+        """Return invoice references from lists of id, number and type."""
+        return [Accounting.InvoiceReference(id=invoice_id, number=number, type=INVOICE_TYPE_VALUE_MAP[type_])
+                for invoice_id, number, type_ in data]
+
+    def _send_before_deadline(self, payment: BankPayment, deadline: Optional[float],
+                              trace: Optional[PaymentTrace] = None) -> Optional[BackendResponse]:
+        """Send payment to FRED and return its response, `None` if it isn't processed before the deadline."""
+        try:
+            return self._send_payment(payment, deadline=deadline, trace=trace)
+        except DeadlineExceeded:
+            LOGGER.warning('Payment %s is left for the next processing (deadline expired).', str(payment.uuid))
+            return None
+
+    @staticmethod
+    def _deadline_expired() -> None:
+        """Report expiration of the processing deadline."""
+        LOGGER.warning('Processing deadline expired, remaining payments are left for the next processing.')
+        DEADLINE_EXPIRATIONS.inc()
+
+    def assign_payment(self, payment: BankPayment, client_id: str,
+                       tax_date: Optional[date] = None) -> ProcessPaymentResult:
         """Force assign payment to FRED."""
         LOGGER.debug('Manually assigning payment %s to registrar %s.', str(payment.uuid), client_id)
         return self.process_payment(payment, client_id, tax_date)
 
-    def process_payment(self, payment: BankPayment, client_id: Optional[str] = None, tax_date: date = None):
+    def process_payment(self, payment: BankPayment, client_id: Optional[str] = None, tax_date: Optional[date] = None):
         """Process one payment."""
-        try:
-            if client_id is None:
-                registrar, zone = ACCOUNTING.get_registrar_by_payment(payment)
-                invoices, credit = ACCOUNTING.import_payment(payment)
+        tracer = Tracer()
+        (payment, response), = self._journal_payments([payment])
+        if response is None:
+            response = self._close_journal(
+                payment, self._send_payment(payment, client_id, tax_date, trace=tracer.start(payment)))
+        with tracer.storing([payment]):
+            return self._save_payment(payment, response)
+
+    @staticmethod
+    def _journal_payments(payments: Iterable[BankPayment]) -> Iterator[Tuple[BankPayment, Optional[BackendResponse]]]:
+        """
+        Yield payments with their responses restored from the payment journal.
+
+        Response is `None` if payment has to be sent to FRED, such payments are recorded in the journal as sent.
+        Payments which were sent, but whose response wasn't recorded, are sent again.
+        """
+        database = SETTINGS.journal_database
+        if not database:
+            for payment in payments:
+                yield payment, None
+            return
+
+        iterator = iter(payments)
+        chunk_size = max(SETTINGS.query_chunk_size, 1)
+        while True:
+            chunk = list(islice(iterator, chunk_size))
+            if not chunk:
+                return
+            journal = PaymentJournal.objects.using(database)
+            entries = journal.in_bulk([payment.uuid for payment in chunk], field_name='payment_uuid')
+            journal.bulk_create([PaymentJournal(payment_uuid=payment.uuid, state=PaymentJournal.SENT)
+                                 for payment in chunk if payment.uuid not in entries], ignore_conflicts=True)
+            credited = [payment.pk for payment in chunk
+                        if payment.uuid in entries and entries[payment.uuid].state == PaymentJournal.CREDITED]
+            clients = set()  # type: set
+            if credited:
+                clients.update(Client.objects.filter(payment__in=credited).values_list('payment_id', flat=True))
+
+            for payment in chunk:
+                entry = entries.get(payment.uuid)
+                if entry is None or entry.state == PaymentJournal.SENT:
+                    yield payment, None
+                else:
+                    LOGGER.info('Payment %s was already imported according to journal.', str(payment.uuid))
+                    yield payment, FredPaymentProcessor._get_journal_response(entry, payment.pk not in clients)
+
+    @staticmethod
+    def _get_journal_response(entry: PaymentJournal, restore: bool = True) -> BackendResponse:
+        """Return response recorded in the journal entry. Registrar and invoices are returned only if `restore`."""
+        if entry.state != PaymentJournal.CREDITED or not restore:
+            return BackendResponse(ProcessPaymentResult(result=True), None, ())
+        invoices = FredPaymentProcessor._load_invoices(json.loads(entry.invoices or '[]'))
+        return BackendResponse(ProcessPaymentResult(result=True),
+                               JournaledRegistrar(id=entry.registrar_id, handle=entry.registrar_handle), invoices)
+
+    @staticmethod
+    def _close_journal(payment: BankPayment, response: BackendResponse) -> BackendResponse:
+        """
+        Record response of FRED in the payment journal and return it.
+
+        Only entries in state sent are updated, so responses restored from the journal don't change it.
+        Entries of rejected payments are deleted, since they may be sent again.
+        """
+        database = SETTINGS.journal_database
+        if database:
+            entries = PaymentJournal.objects.using(database).filter(payment_uuid=payment.uuid,
+                                                                    state=PaymentJournal.SENT)
+            if not response.result.result:
+                entries.delete()
+            elif response.registrar is None:
+                entries.update(state=PaymentJournal.ALREADY_PROCESSED, update_time=timezone.now())
             else:
-                registrar, zone = ACCOUNTING.get_registrar_by_handle_and_payment(client_id, payment)
-                invoices, credit = ACCOUNTING.import_payment_by_registrar_handle(payment, registrar.handle, tax_date)
+                invoices = FredPaymentProcessor._dump_invoices(response.invoices)
+                entries.update(state=PaymentJournal.CREDITED, registrar_handle=response.registrar.handle,
+                               registrar_id=response.registrar.id, invoices=json.dumps(invoices),
+                               update_time=timezone.now())
+        return response
+
+    def _send_payment(self, payment: BankPayment, client_id: Optional[str] = None, tax_date: Optional[date] = None,
+                      deadline: Optional[float] = None, trace: Optional[PaymentTrace] = None) -> BackendResponse:
+        """
+        Send payment to FRED and return its response.
 
-        except (Accounting.INTERNAL_SERVER_ERROR, Accounting.REGISTRAR_NOT_FOUND, Accounting.INVALID_PAYMENT_DATA,
-                Accounting.INVALID_TAX_DATE_FORMAT):
+        This method doesn't access the database, so it may be called from worker threads.
+        Payments recently rejected because of unknown registrar or invalid data are not sent again.
+        Raise `DeadlineExceeded` if the deadline expires before the payment is imported. Import which has already
+        started is not interrupted by the deadline, so the payment is never credited without its response.
+        If `FRED_PAIN_OVERLAP_CALLS` is set, registrar lookup and payment import are called concurrently,
+        except for manually assigned payments, which are imported to the handle returned by the lookup.
+        CORBA calls are recorded to the trace, if provided.
+        CORBA calls of manually assigned payments are scheduled in the interactive lane, others in the batch lane.
+        """
+        if client_id is None and is_payment_rejected(payment):
+            LOGGER.debug('Payment %s rejected (cached).', str(payment.uuid))
+            return BackendResponse(ProcessPaymentResult(result=False), None, ())
+        try:
+            with call_deadline(deadline), tracing(trace), call_lane(BATCH if client_id is None else INTERACTIVE):
+                if client_id is None and SETTINGS.overlap_calls:
+                    registrar, invoices = self._call_overlapped(
+                        payment, partial(ACCOUNTING.get_registrar_by_payment, payment),
+                        partial(ACCOUNTING.import_payment, payment), deadline)
+                elif client_id is None:
+                    registrar, zone = ACCOUNTING.get_registrar_by_payment(payment)
+                    invoices, credit = ACCOUNTING.import_payment(payment)
+                else:
+                    registrar, zone = ACCOUNTING.get_registrar_by_handle_and_payment(client_id, payment)
+                    invoices, credit = ACCOUNTING.import_payment_by_registrar_handle(payment, registrar.handle,
+                                                                                     tax_date)
+        except (Accounting.REGISTRAR_NOT_FOUND, Accounting.INVALID_PAYMENT_DATA):
+            LOGGER.debug('Payment %s rejected.', str(payment.uuid))
+            if client_id is None:
+                set_payment_rejected(payment)
+            return BackendResponse(ProcessPaymentResult(result=False), None, ())
+        except (Accounting.INTERNAL_SERVER_ERROR, Accounting.INVALID_TAX_DATE_FORMAT):
             LOGGER.debug('Payment %s rejected.', str(payment.uuid))
-            return ProcessPaymentResult(result=False)
+            return BackendResponse(ProcessPaymentResult(result=False), None, ())
         except (Accounting.PAYMENT_TOO_OLD):
             LOGGER.debug('Payment %s rejected.', str(payment.uuid))
-            return ProcessPaymentResult(result=False, error=PaymentProcessingError.TOO_OLD)
+            return BackendResponse(ProcessPaymentResult(result=False, error=PaymentProcessingError.TOO_OLD), None, ())
         except (Accounting.INVALID_TAX_DATE_VALUE):
             # When munally assigned tax date is invalid, raise exception
             LOGGER.debug('Payment %s rejected (invalid tax date value).', str(payment.uuid))
@@ -81,38 +469,238 @@ class FredPaymentProcessor(AbstractPaymentProcessor):
             # When we try to send the payment again, in another processing, backend recognizes
             # payment uuid and throws this exception.
             LOGGER.debug('Payment %s was already processed.', str(payment.uuid))
-            return ProcessPaymentResult(result=True)
+            return BackendResponse(ProcessPaymentResult(result=True), None, ())
         else:
             LOGGER.debug('Payment %s accepted. %s invoices attached.', str(payment.uuid), len(invoices))
-            client = Client(handle=registrar.handle, remote_id=registrar.id, payment=payment)
+            return BackendResponse(ProcessPaymentResult(result=True), registrar, invoices)
+
+    @staticmethod
+    def _call_overlapped(payment: BankPayment, lookup: Callable, import_: Callable,
+                         deadline: Optional[float] = None) -> Tuple[Any, Sequence]:
+        """
+        Import payment by a helper thread while its registrar is looked up. Return registrar and invoices.
+
+        Exceptions are raised as if the calls were sequential, i.e. exception of the lookup takes precedence.
+        If the import succeeds despite the failed lookup, the payment is credited, so the registrar is looked up
+        again regardless of the deadline. Exception of the repeated lookup is raised as well.
+        """
+        future = _get_import_executor().submit(_call_with_deadline, deadline, import_, get_trace(), get_call_lane())
+        try:
+            registrar, zone = lookup()
+        except Exception:
+            if future.exception() is not None:
+                raise
+            LOGGER.warning('Payment %s was imported, but lookup of its registrar failed, repeating it.',
+                           str(payment.uuid))
+            try:
+                with call_deadline(None):
+                    registrar, zone = lookup()
+            except Exception:
+                LOGGER.exception('Payment %s was imported, but its registrar could not be looked up.',
+                                 str(payment.uuid))
+                raise
+        invoices, credit = future.result()
+        return registrar, invoices
+
+    def _save_payment(self, payment: BankPayment, response: BackendResponse,
+                      index: Optional['InvoiceIndex'] = None) -> ProcessPaymentResult:
+        """
+        Store registrar and invoices received from FRED.
+
+        If `index` is provided, invoices are resolved by it and their links to payment are stored at once.
+        """
+        if response.registrar is not None:
+            client = Client(handle=response.registrar.handle, remote_id=response.registrar.id, payment=payment)
             client.save()
 
-            for invoice in invoices:
+            for invoice in response.invoices:
+                if index is not None:
+                    index.add(payment, invoice)
+                    continue
                 inv, created = Invoice.objects.get_or_create(number=invoice.number, defaults={
                     'remote_id': invoice.id, 'invoice_type': INVOICE_TYPE_MAP[invoice.type]})
                 if not created:
-                    if inv.remote_id != invoice.id:
-                        LOGGER.error('Invoice number %s already exists with id=%s (received id=%s)',
-                                     invoice.number, inv.remote_id, invoice.id)
-                    if inv.invoice_type == InvoiceType.ADVANCE:
-                        LOGGER.error('Advance invoice number %s is already associated with different payment.',
-                                     invoice.number)
+                    self._check_invoice(inv, invoice)
                 inv.payments.add(payment)
+            if index is not None:
+                index.flush()
+
+        return response.result
+
+    def _save_payments(self, responses: Sequence[Tuple[BankPayment, BackendResponse]]) -> List[ProcessPaymentResult]:
+        """
+        Store registrars and invoices received from FRED for several payments at once.
+
+        All data are written in a single transaction. If that fails on integrity error,
+        e.g. when invoice is created concurrently, payments are stored one by one.
+        """
+        accepted = [(payment, response) for payment, response in responses if response.registrar is not None]
+        if accepted:
+            try:
+                with transaction.atomic():
+                    existing = self._bulk_save(accepted)
+            except IntegrityError:
+                LOGGER.info('Bulk save of %s payments failed, storing them one by one.', len(accepted))
+                for payment, response in accepted:
+                    self._save_payment(payment, response)
+            else:
+                for inv, invoice in existing:
+                    self._check_invoice(inv, invoice)
+        return [response.result for payment, response in responses]
+
+    def _bulk_save(self, accepted: Sequence[Tuple[BankPayment, BackendResponse]]) -> List[Tuple[Invoice, Any]]:
+        """Bulk create clients, invoices and their links to payments. Return invoices which already existed."""
+        Client.objects.bulk_create([
+            Client(handle=response.registrar.handle, remote_id=response.registrar.id, payment=payment)
+            for payment, response in accepted])
+
+        numbers = set(invoice.number for payment, response in accepted for invoice in response.invoices)
+        invoices = Invoice.objects.in_bulk(numbers, field_name='number')
+        created = {}  # type: dict
+        existing = []  # type: list
+        links = OrderedDict()  # type: OrderedDict
+        for payment, response in accepted:
+            for invoice in response.invoices:
+                if invoice.number in invoices:
+                    existing.append((invoices[invoice.number], invoice))
+                else:
+                    invoices[invoice.number] = created[invoice.number] = Invoice(
+                        number=invoice.number, remote_id=invoice.id, invoice_type=INVOICE_TYPE_MAP[invoice.type])
+                links[(invoice.number, payment.pk)] = None
 
-            return ProcessPaymentResult(result=True)
+        if created:
+            Invoice.objects.bulk_create(created.values())
+            if any(inv.pk is None for inv in created.values()):
+                # Database backend doesn't return primary keys from bulk insert.
+                for number, pk in Invoice.objects.filter(number__in=created).values_list('number', 'pk'):
+                    created[number].pk = pk
+
+        self._create_links((invoices[number].pk, payment_pk) for number, payment_pk in links)
+        return existing
+
+    @staticmethod
+    def _create_links(links: Iterable[Tuple[int, int]]) -> None:
+        """Bulk create links between invoices and payments given by pairs of their primary keys."""
+        field = Invoice._meta.get_field('payments')
+        through = field.remote_field.through
+        invoice_field = through._meta.get_field(field.m2m_field_name()).attname
+        payment_field = through._meta.get_field(field.m2m_reverse_field_name()).attname
+        objs = [through(**{invoice_field: invoice_pk, payment_field: payment_pk}) for invoice_pk, payment_pk in links]
+        if objs:
+            through.objects.bulk_create(objs, ignore_conflicts=True)
+
+    @staticmethod
+    def _check_invoice(inv: Invoice, invoice: Any) -> None:
+        """Log inconsistencies between existing invoice and invoice reference received from FRED."""
+        if inv.remote_id != invoice.id:
+            LOGGER.error('Invoice number %s already exists with id=%s (received id=%s)',
+                         invoice.number, inv.remote_id, invoice.id)
+        if inv.invoice_type == InvoiceType.ADVANCE:
+            LOGGER.error('Advance invoice number %s is already associated with different payment.',
+                         invoice.number)
 
     @staticmethod
     def get_client_choices() -> dict:
         """
-        Get registrar handles and names.
+        Get registrar handles and names from the registrar directory.
 
         Registrar handle is appended to registrar name.
+        Registrars are fetched from FRED until the directory is synchronized by `fred_pain_sync_registrars`.
         """
+        registrars = get_registrar_choices(Registrar.objects.order_by('handle'))
+        if registrars:
+            return registrars
+        LOGGER.warning('Registrar directory is empty, fetching registrars from FRED.')
         registrars = {}
-        for reg in ACCOUNTING.get_registrar_references():
+        with call_lane(INTERACTIVE):
+            references = get_registrar_references()
+        for reg in references:
             registrars[reg.handle] = '{} ({})'.format(reg.name, reg.handle)
         return registrars
 
+    @staticmethod
+    def search_clients(query: str, limit: int = 20) -> dict:
+        """
+        Get handles and names of registrars which match the query, e.g. to autocomplete manual assignment.
+
+        Registrars whose handle or name starts with the query are returned, see `search_registrars`.
+        """
+        return get_registrar_choices(search_registrars(query, limit))
+
+
+def _completed(result: Any) -> Future:
+    """Return future which is already done with the result."""
+    future = Future()  # type: Future
+    future.set_result(result)
+    return future
+
+
+@lru_cache(maxsize=None)
+def _get_import_executor() -> ThreadPoolExecutor:
+    """Return thread pool which imports payments concurrently with registrar lookups."""
+    return ThreadPoolExecutor(max_workers=max(SETTINGS.processing_threads, SETTINGS.async_concurrency, 1))
+
+
+def _call_with_deadline(deadline: Optional[float], func: Callable, trace: Optional[PaymentTrace] = None,
+                        lane: str = BATCH) -> Any:
+    """Call the function with the deadline of CORBA calls in the lane, record the calls to the trace."""
+    with call_deadline(deadline), tracing(trace), call_lane(lane):
+        return func()
+
+
+def _send_shard(processor: FredPaymentProcessor, payments: Sequence[BankPayment],
+                deadline: Optional[float]) -> Tuple[List[BackendResponse], List[Optional[dict]], dict]:
+    """
+    Send shard of payments to FRED in a worker process.
+
+    Return picklable responses of payments sent before the deadline, durations of phases of their traces
+    and metrics collected meanwhile.
+    """
+    METRICS.reset()
+    tracer = Tracer()
+    responses = []
+    traces = []
+    for payment in payments:
+        if is_expired(deadline):
+            break
+        trace = tracer.start(payment)
+        response = processor._send_before_deadline(payment, deadline, trace)
+        if response is None:
+            break
+        responses.append(processor._dump_response(response))
+        traces.append(None if trace is None else trace.durations)
+    return responses, traces, METRICS.dump()
+
+
+class InvoiceIndex(object):
+    """
+    Index of invoices resolved during a single processing of payments.
+
+    Each invoice number is fetched or created only once, later payments reuse the same `Invoice` instance.
+    Links of invoices to payments are collected and stored at once by `flush`.
+    """
+
+    def __init__(self):
+        self.invoices = {}  # type: dict
+        self.links = OrderedDict()  # type: OrderedDict
+
+    def add(self, payment: BankPayment, invoice: Any) -> None:
+        """Resolve invoice reference received from FRED and link it to the payment."""
+        inv = self.invoices.get(invoice.number)
+        created = False
+        if inv is None:
+            inv, created = Invoice.objects.get_or_create(number=invoice.number, defaults={
+                'remote_id': invoice.id, 'invoice_type': INVOICE_TYPE_MAP[invoice.type]})
+            self.invoices[invoice.number] = inv
+        if not created:
+            FredPaymentProcessor._check_invoice(inv, invoice)
+        self.links[(inv.pk, payment.pk)] = None
+
+    def flush(self) -> None:
+        """Store collected links of invoices to payments."""
+        FredPaymentProcessor._create_links(self.links)
+        self.links.clear()
+
 
 class FredDaphnePaymentProcessor(FredPaymentProcessor):
     """FRED payment processor with links to Daphne webadmin tool."""
@@ -133,3 +721,142 @@ class FredDaphnePaymentProcessor(FredPaymentProcessor):
     def get_client_url(client: Client) -> str:
         """Get registrar url in Daphne."""
         return '{}/registrar/detail/?id={}'.format(SETTINGS.daphne_url, client.remote_id)
+
+
+class FredAsyncPaymentProcessor(FredPaymentProcessor):
+    """
+    FRED payment processor with asynchronous interface.
+
+    Coroutines `aprocess_payments`, `aassign_payment`, `aget_client_choices` and `asearch_clients` are counterparts
+    of the synchronous methods. CORBA calls are made by a dedicated thread pool, at most `FRED_PAIN_ASYNC_CONCURRENCY`
+    at the same time.
+    Database is accessed by a single dedicated thread, so the event loop is never blocked. The thread has its own
+    database connection in autocommit mode, so its writes are not part of any transaction of the caller.
+    Callers must not hold a transaction with locks of the processed payments, e.g. by `select_for_update`,
+    since writes of the thread would wait for them forever.
+    """
+
+    async def aprocess_payments(self, payments: Iterable[BankPayment]) -> List[ProcessPaymentResult]:
+        """
+        Process payments through FRED and return results in order of payments.
+
+        Payments are loaded in chunks of `FRED_PAIN_QUERY_CHUNK_SIZE`.
+        Results are returned only up to the first payment not processed before `FRED_PAIN_PROCESSING_DEADLINE`,
+        remaining payments are left for the next processing.
+        """
+        deadline = get_deadline(SETTINGS.processing_deadline)
+        tracer = Tracer()
+        loop = asyncio.get_event_loop()
+        concurrency = max(SETTINGS.async_concurrency, 1)
+        chunk_size = max(SETTINGS.query_chunk_size, 1)
+        corba_executor = ThreadPoolExecutor(max_workers=concurrency)
+        db_executor = ThreadPoolExecutor(max_workers=1)
+        pending = deque()  # type: deque
+        results = []  # type: List[Optional[ProcessPaymentResult]]
+        try:
+            iterator = self._load_payments(payments)
+            expired = False
+            while not expired:
+                chunk = await loop.run_in_executor(db_executor, self._load_chunk, iterator, chunk_size)
+                if not chunk:
+                    break
+                for payment, response in chunk:
+                    if response is None and is_expired(deadline):
+                        results.append(None)
+                        expired = True
+                        break
+                    if response is None:
+                        future = loop.run_in_executor(corba_executor, self._send_before_deadline, payment, deadline,
+                                                      tracer.start(payment))
+                    else:
+                        future = loop.create_future()
+                        future.set_result(response)
+                    pending.append((payment, future))
+                    if len(pending) >= concurrency:
+                        payment, future = pending.popleft()
+                        results.append(await self._areceive(loop, db_executor, payment, future, tracer))
+            while pending:
+                payment, future = pending.popleft()
+                results.append(await self._areceive(loop, db_executor, payment, future, tracer))
+        finally:
+            # Do not send payments whose results wouldn't be stored.
+            for payment, future in pending:
+                future.cancel()
+            tracer.report()
+            await loop.run_in_executor(corba_executor, export_metrics)
+            await self._shutdown(loop, corba_executor, db_executor)
+        if None in results:
+            self._deadline_expired()
+            del results[results.index(None):]
+        return cast(List[ProcessPaymentResult], results)
+
+    async def aassign_payment(self, payment: BankPayment, client_id: str,
+                              tax_date: Optional[date] = None) -> ProcessPaymentResult:
+        """Force assign payment to FRED."""
+        LOGGER.debug('Manually assigning payment %s to registrar %s.', str(payment.uuid), client_id)
+        tracer = Tracer()
+        loop = asyncio.get_event_loop()
+        corba_executor = ThreadPoolExecutor(max_workers=1)
+        db_executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            (payment, response), = await loop.run_in_executor(db_executor, self._load_chunk,
+                                                              self._load_payments([payment]), 1)
+            if response is None:
+                response = await loop.run_in_executor(corba_executor, self._send_payment, payment, client_id,
+                                                      tax_date, None, tracer.start(payment))
+            return await loop.run_in_executor(db_executor, self._store_payment, payment, response, tracer)
+        finally:
+            await self._shutdown(loop, corba_executor, db_executor)
+
+    async def aget_client_choices(self) -> dict:
+        """Get registrar handles and names."""
+        loop = asyncio.get_event_loop()
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            return await loop.run_in_executor(executor, self.get_client_choices)
+        finally:
+            await self._shutdown(loop, executor)
+
+    async def asearch_clients(self, query: str, limit: int = 20) -> dict:
+        """Get handles and names of registrars which match the query."""
+        loop = asyncio.get_event_loop()
+        executor = ThreadPoolExecutor(max_workers=1)
+        try:
+            return await loop.run_in_executor(executor, self.search_clients, query, limit)
+        finally:
+            await self._shutdown(loop, executor)
+
+    def _load_payments(self,
+                       payments: Iterable[BankPayment]) -> Iterator[Tuple[BankPayment, Optional[BackendResponse]]]:
+        """
+        Return iterator of payments with bank accounts and responses restored from the payment journal.
+
+        Iterator accesses the database, so it has to be advanced only by `_load_chunk` in the database thread.
+        """
+        return self._journal_payments(self._iter_payments(payments))
+
+    @staticmethod
+    def _load_chunk(iterator: Iterator[Tuple[BankPayment, Optional[BackendResponse]]],
+                    size: int) -> List[Tuple[BankPayment, Optional[BackendResponse]]]:
+        """Return next chunk of loaded payments, so CORBA threads don't touch the database."""
+        return list(islice(iterator, size))
+
+    async def _areceive(self, loop: asyncio.AbstractEventLoop, db_executor: ThreadPoolExecutor, payment: BankPayment,
+                        future: asyncio.Future, tracer: Tracer) -> Optional[ProcessPaymentResult]:
+        """Wait for response of the payment and store it. Return its result, `None` if there is no response."""
+        response = await future
+        if response is None:
+            return None
+        return await loop.run_in_executor(db_executor, self._store_payment, payment, response, tracer)
+
+    def _store_payment(self, payment: BankPayment, response: BackendResponse, tracer: Tracer) -> ProcessPaymentResult:
+        """Record response in the payment journal and store registrar and invoices."""
+        with tracer.storing([payment]):
+            return self._save_payment(payment, self._close_journal(payment, response))
+
+    @staticmethod
+    async def _shutdown(loop: asyncio.AbstractEventLoop, *executors: ThreadPoolExecutor) -> None:
+        """Close database connections of executor threads and shut the executors down."""
+        for executor in executors:
+            await loop.run_in_executor(executor, connections.close_all)
+            executor.shutdown(wait=False)
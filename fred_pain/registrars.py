@@ -0,0 +1,88 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Directory of registrars synchronized from FRED."""
+import logging
+from typing import Dict, Iterable, List, NamedTuple, Optional
+
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from fred_pain.cache import RegistrarReference, fetch_registrar_references
+from fred_pain.models import Registrar
+from fred_pain.settings import SETTINGS
+
+LOGGER = logging.getLogger(__name__)
+
+SyncResult = NamedTuple('SyncResult', [('created', int), ('updated', int), ('deleted', int)])
+
+
+def sync_registrars(references: Optional[Iterable[RegistrarReference]] = None, dry_run: bool = False) -> SyncResult:
+    """
+    Synchronize the registrar directory with registrar references from FRED.
+
+    Only registrars which are new, renamed or missing in FRED are written. If `references` are not provided,
+    they are fetched from FRED. If `dry_run` is set, nothing is written and changes are only counted,
+    so registrars are not locked either.
+    """
+    if references is None:
+        references = fetch_registrar_references()
+    names = dict((reference.handle, reference.name) for reference in references)
+    batch_size = max(SETTINGS.query_chunk_size, 1)
+    with transaction.atomic():
+        queryset = Registrar.objects.all() if dry_run else Registrar.objects.select_for_update()
+        registrars = dict((registrar.handle, registrar) for registrar in queryset)
+        created = [Registrar(handle=handle, name=name, handle_search=handle.lower(), name_search=name.lower())
+                   for handle, name in names.items() if handle not in registrars]
+        updated = []
+        now = timezone.now()
+        for handle, registrar in registrars.items():
+            if handle in names and registrar.name != names[handle]:
+                registrar.name = names[handle]
+                registrar.name_search = registrar.name.lower()
+                # Field is not updated automatically by bulk update.
+                registrar.update_time = now
+                updated.append(registrar)
+        deleted = [registrar.pk for handle, registrar in registrars.items() if handle not in names]
+        if not dry_run:
+            Registrar.objects.bulk_create(created, batch_size=batch_size)
+            Registrar.objects.bulk_update(updated, ('name', 'name_search', 'update_time'), batch_size=batch_size)
+            for start in range(0, len(deleted), batch_size):
+                Registrar.objects.filter(pk__in=deleted[start:start + batch_size]).delete()
+            LOGGER.info('Registrars synchronized: %s created, %s updated, %s deleted.', len(created), len(updated),
+                        len(deleted))
+    return SyncResult(len(created), len(updated), len(deleted))
+
+
+def search_registrars(query: str, limit: int = 20) -> List[Registrar]:
+    """
+    Return registrars whose handle or name starts with the query, case-insensitively, ordered by handle.
+
+    Only prefixes are matched, so registrars are always found by the indexes.
+    """
+    query = query.strip().lower()
+    registrars = Registrar.objects.order_by('handle')
+    if not query:
+        return list(registrars[:limit])
+    return list(registrars.filter(Q(handle_search__startswith=query) | Q(name_search__startswith=query))[:limit])
+
+
+def get_registrar_choices(registrars: Iterable[Registrar]) -> Dict[str, str]:
+    """Return labels of registrars by their handles."""
+    return dict((registrar.handle, str(registrar)) for registrar in registrars)
@@ -0,0 +1,213 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""
+Recording and replay of CORBA calls.
+
+Calls are recorded as JSON lines with decoded arguments, result or CORBA exception and latency of the call.
+IDL structs and exceptions are stored by their name and fields, so the recordings are independent of the ORB.
+"""
+import json
+import logging
+from collections import deque
+from datetime import date, datetime
+from functools import lru_cache, partial
+from threading import Lock
+from time import monotonic, sleep
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Sequence
+
+import omniORB
+from django.utils.dateparse import parse_date, parse_datetime
+from fred_idl.Registry import Accounting, IsoDate, IsoDateTime
+from omniORB import CORBA
+
+from fred_pain.client import CorbaClientWrapper
+from fred_pain.settings import SETTINGS
+
+LOGGER = logging.getLogger(__name__)
+
+# Enum items which may occur in Accounting calls.
+_ENUM_ITEMS = dict((item._n, item) for item in (
+    Accounting.InvoiceType.advance, Accounting.InvoiceType.account,
+    CORBA.COMPLETED_YES, CORBA.COMPLETED_NO, CORBA.COMPLETED_MAYBE))
+
+
+@lru_cache(maxsize=None)
+def _get_types() -> Dict[str, type]:
+    """Return IDL structs and exceptions by their names."""
+    types = {'IsoDate': IsoDate, 'IsoDateTime': IsoDateTime}
+    for namespace in (CORBA, Accounting):
+        for name, value in vars(namespace).items():
+            if isinstance(value, type) and issubclass(value, (omniORB.StructBase, CORBA.Exception)):
+                types[name] = value
+    return types
+
+
+def encode_value(value: Any, default: Optional[Callable[[Any], Any]] = None) -> Any:
+    """
+    Encode value into JSON compatible data.
+
+    Values which can't be encoded otherwise are converted by `default` first.
+    """
+    if value is None or isinstance(value, (str, int, float)):
+        return value
+    if isinstance(value, list):
+        return [encode_value(item, default) for item in value]
+    if isinstance(value, tuple):
+        return {'t': [encode_value(item, default) for item in value]}
+    if isinstance(value, datetime):
+        return {'dt': value.isoformat()}
+    if isinstance(value, date):
+        return {'d': value.isoformat()}
+    if isinstance(value, omniORB.EnumItem):
+        return {'e': value._n}
+    if isinstance(value, (omniORB.StructBase, CORBA.Exception)):
+        return {'s': type(value).__name__,
+                'f': dict((name, encode_value(field, default)) for name, field in vars(value).items())}
+    if default is not None:
+        return encode_value(default(value))
+    raise TypeError('Value of type {} can not be encoded.'.format(type(value).__name__))
+
+
+def decode_value(data: Any) -> Any:
+    """Decode value from data created by `encode_value`."""
+    if isinstance(data, list):
+        return [decode_value(item) for item in data]
+    if not isinstance(data, dict):
+        return data
+    if 't' in data:
+        return tuple(decode_value(item) for item in data['t'])
+    if 'dt' in data:
+        return parse_datetime(data['dt'])
+    if 'd' in data:
+        return parse_date(data['d'])
+    if 'e' in data:
+        return _ENUM_ITEMS[data['e']]
+    return _get_types()[data['s']](**dict((name, decode_value(field)) for name, field in data['f'].items()))
+
+
+def load_records(path: str) -> Iterator[dict]:
+    """Read recorded calls from the file."""
+    with open(path, encoding='utf-8') as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def _get_key(args: Sequence) -> tuple:
+    """Return key of encoded arguments. Payments are identified by their UUID."""
+    return tuple(arg['f']['uuid'] if isinstance(arg, dict) and arg.get('s') == 'PaymentData'
+                 else json.dumps(arg, sort_keys=True) for arg in args)
+
+
+class RecordingClient(CorbaClientWrapper):
+    """
+    CORBA client wrapper which records calls, if `FRED_PAIN_CORBA_RECORD_FILE` is set.
+
+    Each call is appended to the file as a single JSON line with method name, arguments, result or CORBA exception
+    and latency in seconds. Arguments which can't be encoded otherwise, e.g. bank payments, are converted by `default`.
+    Failure to record the call is only logged.
+    """
+
+    def __init__(self, client: Any, default: Optional[Callable[[Any], Any]] = None):
+        super().__init__(client)
+        self.default = default
+        self._path = None  # type: Optional[str]
+        self._file = None  # type: Any
+        self._lock = Lock()
+
+    def call(self, name: str, method: Callable, *args: Any) -> Any:
+        """Call the method and record it."""
+        path = SETTINGS.corba_record_file
+        if not path:
+            return method(*args)
+        start = monotonic()
+        try:
+            result = method(*args)
+        except CORBA.Exception as error:
+            self._record(path, name, args, monotonic() - start, 'x', error)
+            raise
+        self._record(path, name, args, monotonic() - start, 'r', result)
+        return result
+
+    def _record(self, path: str, name: str, args: Sequence, latency: float, key: str, value: Any) -> None:
+        try:
+            record = {'m': name, 'a': encode_value(list(args), self.default), 'l': round(latency, 6),
+                      key: encode_value(value)}
+            line = json.dumps(record, separators=(',', ':'), sort_keys=True) + '\n'
+            with self._lock:
+                if path != self._path:
+                    if self._file is not None:
+                        self._file.close()
+                        self._file = None
+                    self._file = open(path, 'a', encoding='utf-8')
+                    self._path = path
+                self._file.write(line)
+                self._file.flush()
+        except Exception:
+            LOGGER.exception('Call of %s could not be recorded.', name)
+
+
+class ReplayClient(object):
+    """
+    Client which serves recorded calls instead of the backend.
+
+    Call is answered by a recording of the same method with the same arguments, payments are matched by their UUID.
+    Otherwise recordings of the method are served in the recorded order, starting over when exhausted.
+    Each call takes its recorded latency multiplied by `time_scale`. Recorded exceptions are raised.
+    Arguments are encoded by `encode_value` with `default`, the same way as by `RecordingClient`.
+    """
+
+    def __init__(self, records: Iterable[dict], time_scale: float = 1.0,
+                 default: Optional[Callable[[Any], Any]] = None):
+        self.time_scale = time_scale
+        self.default = default
+        self.calls = 0
+        self._records = {}  # type: dict
+        self._matches = {}  # type: dict
+        self._positions = {}  # type: dict
+        self._lock = Lock()
+        for record in records:
+            self._records.setdefault(record['m'], []).append(record)
+            self._matches.setdefault((record['m'], _get_key(record['a'])), deque()).append(record)
+
+    def __getattr__(self, name: str) -> Callable:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return partial(self._call, name)
+
+    def _call(self, name: str, *args: Any) -> Any:
+        key = _get_key(encode_value(list(args), self.default))
+        with self._lock:
+            self.calls += 1
+            matches = self._matches.get((name, key))
+            if matches:
+                # Last matching recording is kept for repeated calls.
+                record = matches.popleft() if len(matches) > 1 else matches[0]
+            else:
+                records = self._records.get(name)
+                if not records:
+                    raise LookupError('There are no recorded calls of {}.'.format(name))
+                position = self._positions.get(name, 0)
+                record = records[position % len(records)]
+                self._positions[name] = position + 1
+        if self.time_scale:
+            sleep(record['l'] * self.time_scale)
+        if 'x' in record:
+            raise decode_value(record['x'])
+        return decode_value(record['r'])
@@ -0,0 +1,79 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Retries of CORBA calls."""
+import logging
+import random
+from time import monotonic, sleep
+from typing import Any, Callable, Iterable, Tuple, Type
+
+from fred_pain.client import CorbaClientWrapper
+from fred_pain.metrics import METRICS, Counter
+from fred_pain.settings import SETTINGS
+from fred_pain.timeout import get_call_deadline
+
+LOGGER = logging.getLogger(__name__)
+
+RETRIES = METRICS.register(Counter(
+    'fred_pain_corba_retries_total', 'Number of retried CORBA calls.', ('method', )))
+RETRIES_EXHAUSTED = METRICS.register(Counter(
+    'fred_pain_corba_retries_exhausted_total', 'Number of CORBA calls which failed after all retries.', ('method', )))
+
+
+def get_backoff(attempt: int) -> float:
+    """Return randomized delay in seconds before the retry after the attempt, counted from zero."""
+    return random.uniform(0, SETTINGS.corba_retry_backoff * 2 ** attempt)
+
+
+class RetryClient(CorbaClientWrapper):
+    """
+    CORBA client wrapper which retries calls failed on one of the errors.
+
+    Only calls of `methods`, which are safe to repeat, are retried, at most `FRED_PAIN_CORBA_RETRIES` times.
+    Retries are delayed by exponential backoff with full jitter, based on `FRED_PAIN_CORBA_RETRY_BACKOFF` seconds.
+    Call is not retried if the delay would exceed the deadline of the current thread.
+    """
+
+    def __init__(self, client: Any, errors: Tuple[Type[BaseException], ...], methods: Iterable[str]):
+        super().__init__(client)
+        self.errors = errors
+        self.methods = frozenset(methods)
+
+    def call(self, name: str, method: Callable, *args: Any) -> Any:
+        """Call the method and retry it on failure."""
+        if name not in self.methods:
+            return method(*args)
+        attempt = 0
+        while True:
+            try:
+                return method(*args)
+            except self.errors as error:
+                retries = SETTINGS.corba_retries
+                if attempt >= retries:
+                    if retries:
+                        LOGGER.warning('Call of %s failed after %s retries.', name, retries)
+                        RETRIES_EXHAUSTED.inc(name)
+                    raise
+                delay = get_backoff(attempt)
+                deadline = get_call_deadline()
+                if deadline is not None and monotonic() + delay >= deadline:
+                    raise
+                LOGGER.info('Call of %s failed with %s, retrying in %.3f s.', name, type(error).__name__, delay)
+                RETRIES.inc(name)
+            sleep(delay)
+            attempt += 1
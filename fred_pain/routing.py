@@ -0,0 +1,147 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Routing of CORBA calls to replicas of the backend."""
+import logging
+from collections import OrderedDict
+from functools import partial
+from threading import Lock
+from typing import Any, Callable, Dict, Hashable, List, Optional, Sequence
+
+from fred_pain.breaker import CircuitBreaker, CircuitOpenError
+from fred_pain.pool import ObjectReferencePool
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Endpoint(object):
+    """
+    Replica of the backend.
+
+    Calls are made on object references from the pool and guarded by the circuit breaker,
+    which ejects the replica after consecutive failures.
+    """
+
+    def __init__(self, name: str, pool: ObjectReferencePool, breaker: CircuitBreaker):
+        self.name = name
+        self.pool = pool
+        self.breaker = breaker
+        self.outstanding = 0
+
+    def call(self, name: str, *args: Any) -> Any:
+        """Call the method on a reference from the pool."""
+        with self.pool.reference() as ref:
+            return getattr(ref, name)(*args)
+
+
+class Router(object):
+    """
+    CORBA object whose methods are called on replicas of the backend.
+
+    Each call is routed to the replica with the least outstanding calls among replicas which are not ejected
+    by their circuit breakers, ties are broken in turns. If the replica is ejected before the call starts,
+    e.g. by a call failed in another thread, the call is routed to another replica. Idle references of the replica
+    are discarded when a call fails on one of the breaker errors. If all replicas are ejected, the call fails
+    with `CircuitOpenError`.
+
+    Calls with the same key, e.g. registrar lookup and import of the same payment, are routed to the same replica
+    as long as it isn't ejected. Key of a call is returned by `key` from its arguments, `None` for calls
+    which may go anywhere. At most `sticky_size` recent keys are remembered.
+    Endpoints are created by the factory on first use.
+    """
+
+    def __init__(self, factory: Callable[[], Sequence[Endpoint]],
+                 key: Callable[[Sequence], Optional[Hashable]] = lambda args: None, sticky_size: int = 10000):
+        self.factory = factory
+        self.key = key
+        self.sticky_size = sticky_size
+        self._endpoints = None  # type: Optional[List[Endpoint]]
+        self._sticky = OrderedDict()  # type: OrderedDict
+        self._turn = 0
+        self._lock = Lock()
+
+    @property
+    def endpoints(self) -> List[Endpoint]:
+        """Return endpoints, create them if they don't exist yet."""
+        if self._endpoints is None:
+            with self._lock:
+                if self._endpoints is None:
+                    self._endpoints = list(self.factory())
+        return self._endpoints
+
+    def __getattr__(self, name: str) -> Callable:
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return partial(self.call, name)
+
+    def call(self, name: str, *args: Any) -> Any:
+        """Call the method on the chosen replica."""
+        key = self.key(args)
+        ejected = []  # type: List[Endpoint]
+        while True:
+            endpoint = self._choose(key, ejected)
+            try:
+                return endpoint.breaker.call(endpoint.call, name, *args)
+            except CircuitOpenError:
+                LOGGER.info('Replica %s was ejected before call of %s, choosing another one.', endpoint.name, name)
+                ejected.append(endpoint)
+            except endpoint.breaker.errors:
+                LOGGER.info('Call of %s failed on %s, discarding its references.', name, endpoint.name)
+                endpoint.pool.clear()
+                with self._lock:
+                    if key is not None and self._sticky.get(key) is endpoint:
+                        del self._sticky[key]
+                raise
+            finally:
+                with self._lock:
+                    endpoint.outstanding -= 1
+
+    def _choose(self, key: Optional[Hashable], ejected: Sequence[Endpoint] = ()) -> Endpoint:
+        """Return endpoint for the call with the key, except the ejected ones, and count the call as outstanding."""
+        endpoints = self.endpoints
+        with self._lock:
+            endpoint = None if key is None else self._sticky.get(key)
+            if endpoint is not None and endpoint not in ejected and endpoint.breaker.available():
+                self._sticky.move_to_end(key)
+            else:
+                self._turn = (self._turn + 1) % len(endpoints)
+                candidates = [endpoint for endpoint in endpoints[self._turn:] + endpoints[:self._turn]
+                              if endpoint not in ejected and endpoint.breaker.available()]
+                if not candidates:
+                    raise CircuitOpenError('All replicas are ejected.')
+                endpoint = min(candidates, key=lambda candidate: candidate.outstanding)
+                if key is not None:
+                    self._sticky[key] = endpoint
+                    while len(self._sticky) > self.sticky_size:
+                        self._sticky.popitem(last=False)
+            endpoint.outstanding += 1
+        return endpoint
+
+    def clear(self) -> None:
+        """Discard idle references of all replicas."""
+        for endpoint in self._endpoints or ():
+            endpoint.pool.clear()
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Return state of the replicas by their names. Replicas which weren't used yet are not included."""
+        with self._lock:
+            endpoints = list(self._endpoints or ())
+            outstanding = dict((endpoint.name, endpoint.outstanding) for endpoint in endpoints)
+        return dict((endpoint.name, {'outstanding': outstanding[endpoint.name], 'breaker': endpoint.breaker.stats(),
+                                     'references': endpoint.pool.stats()})
+                    for endpoint in endpoints)
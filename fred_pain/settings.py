@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2018-2019  CZ.NIC, z. s. p. o.
+# Copyright (C) 2018-2026  CZ.NIC, z. s. p. o.
 #
 # This file is part of FRED.
 #
@@ -18,14 +18,57 @@
 
 """Specific settings for fred-pain."""
 import appsettings
+from django.core.exceptions import ValidationError
+
+# Payment fields which may be used as shard keys.
+SHARD_KEYS = ('variable_symbol', 'uuid')
+
+
+def validate_shard_key(value: str) -> None:
+    """Validate shard key."""
+    if value not in SHARD_KEYS:
+        raise ValidationError('Shard key must be one of {}.'.format(', '.join(SHARD_KEYS)))
 
 
 class FredPainSettings(appsettings.AppSettings):
     """FredPain settings."""
 
+    async_concurrency = appsettings.PositiveIntegerSetting(default=10)
+    batch_size = appsettings.PositiveIntegerSetting(default=1)
+    circuit_breaker_cooldown = appsettings.PositiveFloatSetting(default=30)
+    circuit_breaker_threshold = appsettings.PositiveIntegerSetting(default=5)
+    corba_batch_concurrency = appsettings.PositiveIntegerSetting(default=0)
+    corba_concurrency = appsettings.PositiveIntegerSetting(default=0)
+    corba_endpoints = appsettings.ListSetting(item_type=str)
+    corba_method_timeouts = appsettings.DictSetting()
     corba_netloc = appsettings.StringSetting(default='localhost')
+    corba_pool_size = appsettings.PositiveIntegerSetting(default=0)
+    corba_pool_validate_after = appsettings.PositiveFloatSetting(default=60)
+    corba_prewarm = appsettings.BooleanSetting(default=False)
+    corba_record_file = appsettings.StringSetting()
+    corba_retries = appsettings.PositiveIntegerSetting(default=2)
+    corba_retry_backoff = appsettings.PositiveFloatSetting(default=0.1)
     corba_context = appsettings.StringSetting(default='fred')
+    corba_timeout = appsettings.PositiveFloatSetting(default=0)
     daphne_url = appsettings.StringSetting()
+    journal_database = appsettings.StringSetting()
+    metrics_sink = appsettings.CallablePathSetting()
+    metrics_textfile = appsettings.StringSetting()
+    overlap_calls = appsettings.BooleanSetting(default=False)
+    payment_encoding_cache_max_memory = appsettings.PositiveIntegerSetting(default=16777216)
+    payment_encoding_cache_size = appsettings.PositiveIntegerSetting(default=0)
+    processing_deadline = appsettings.PositiveFloatSetting(default=0)
+    processing_processes = appsettings.PositiveIntegerSetting(default=1)
+    processing_shard_key = appsettings.StringSetting(default='variable_symbol', validators=[validate_shard_key])
+    processing_threads = appsettings.PositiveIntegerSetting(default=1)
+    query_chunk_size = appsettings.PositiveIntegerSetting(default=2000)
+    registrar_cache = appsettings.StringSetting(default='default')
+    registrar_cache_timeout = appsettings.PositiveIntegerSetting(default=0)
+    rejected_payment_cache = appsettings.StringSetting(default='default')
+    rejected_payment_cache_max_timeout = appsettings.PositiveIntegerSetting(default=604800)
+    rejected_payment_cache_timeout = appsettings.PositiveIntegerSetting(default=0)
+    tracing = appsettings.BooleanSetting(default=False)
+    tracing_slow_threshold = appsettings.PositiveFloatSetting(default=0)
 
     class Meta:
         """Meta class."""
@@ -0,0 +1,111 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Sharding of payments among worker processes."""
+import logging
+import multiprocessing
+import zlib
+from typing import Any
+
+import django
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import connections
+from django_pain.models import BankPayment
+
+from fred_pain.settings import SETTINGS
+
+LOGGER = logging.getLogger(__name__)
+
+# Namespace of advisory locks of shard keys.
+LOCK_NAMESPACE = 0x46524544
+
+
+def _crc32(value: str) -> int:
+    return zlib.crc32(value.encode()) & 0xffffffff
+
+
+def get_shard_key(payment: BankPayment) -> str:
+    """Return shard key of the payment as set by `FRED_PAIN_PROCESSING_SHARD_KEY`."""
+    return str(getattr(payment, SETTINGS.processing_shard_key))
+
+
+def get_shard(key: str, shards: int) -> int:
+    """Return index of the shard of the key. It's stable across processes."""
+    return _crc32(key) % shards
+
+
+def _check_shared_caches() -> None:
+    """Warn about caches which are not shared by worker processes."""
+    for setting in ('FRED_PAIN_REGISTRAR_CACHE', 'FRED_PAIN_REJECTED_PAYMENT_CACHE'):
+        alias = getattr(SETTINGS, setting[len('FRED_PAIN_'):].lower())
+        if isinstance(caches[alias], LocMemCache):
+            LOGGER.warning('Cache %s set by %s is local to each worker process, use a shared cache backend.',
+                           alias, setting)
+
+
+def create_pool(processes: int) -> Any:
+    """
+    Create pool of worker processes.
+
+    Processes are spawned rather than forked, so they don't share the ORB or database connections with the parent.
+    Neither do they share local memory caches, so a warning is logged if fred-pain uses any.
+    """
+    _check_shared_caches()
+    return multiprocessing.get_context('spawn').Pool(processes, initializer=django.setup)
+
+
+class ShardLocks(object):
+    """
+    Advisory locks of shard keys held by the database session.
+
+    Locks are acquired only on PostgreSQL, other databases don't support them.
+    """
+
+    def __init__(self, using: str = 'default'):
+        self.using = using
+        self.keys = set()  # type: set
+
+    @staticmethod
+    def _lock_id(key: str) -> int:
+        # PostgreSQL takes a pair of signed 32-bit integers.
+        value = _crc32(key)
+        return value - 0x100000000 if value >= 0x80000000 else value
+
+    def acquire(self, key: str) -> bool:
+        """Acquire lock of the key unless it's held by another session. Return whether it's held now."""
+        if key in self.keys:
+            return True
+        connection = connections[self.using]
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute('SELECT pg_try_advisory_lock(%s, %s)', [LOCK_NAMESPACE, self._lock_id(key)])
+                if not cursor.fetchone()[0]:
+                    LOGGER.info('Shard key %s is locked by another process.', key)
+                    return False
+        self.keys.add(key)
+        return True
+
+    def release(self) -> None:
+        """Release all held locks."""
+        connection = connections[self.using]
+        if connection.vendor == 'postgresql' and self.keys:
+            with connection.cursor() as cursor:
+                for key in self.keys:
+                    cursor.execute('SELECT pg_advisory_unlock(%s, %s)', [LOCK_NAMESPACE, self._lock_id(key)])
+        self.keys.clear()
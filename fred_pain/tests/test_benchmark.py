@@ -0,0 +1,140 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain benchmarks."""
+import json
+import os
+import shutil
+import tempfile
+from io import StringIO
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, TestCase
+from django_pain.models import BankPayment, Client
+from fred_idl.Registry import Accounting
+
+from fred_pain.benchmark import benchmark_processing, benchmark_recoder
+from fred_pain.corba import ACCOUNTING
+from fred_pain.replay import encode_value
+
+from .test_corba import get_registrar
+
+
+def write_records(path):
+    """Write recorded calls of accepted and rejected payment."""
+    records = [
+        {'m': 'get_registrar_by_payment', 'a': [], 'l': 0.1, 'r': encode_value((get_registrar(), 'CZ'))},
+        {'m': 'get_registrar_by_payment', 'a': [], 'l': 0.1, 'x': encode_value(Accounting.REGISTRAR_NOT_FOUND())},
+        {'m': 'import_payment', 'a': [], 'l': 0.1, 'r': encode_value(([], Accounting.Credit(value='42')))},
+    ]
+    with open(path, 'w') as file:
+        for record in records:
+            file.write(json.dumps(record) + '\n')
+
+
+class TestBenchmarkRecoder(SimpleTestCase):
+    """Test benchmark_recoder function."""
+
+    def test_benchmark(self):
+        result = benchmark_recoder(number=1, repeat=1)
+        self.assertEqual(set(result), {'generic', 'fast', 'speedup'})
+        self.assertAlmostEqual(result['speedup'], result['fast'] / result['generic'])
+
+
+class TestBenchmarkProcessing(TestCase):
+    """Test benchmark_processing function."""
+
+    def test_benchmark(self):
+        client = ACCOUNTING.client
+        results = benchmark_processing(count=10, batch_sizes=(1, 5), invoices=2,
+                                       errors={'REGISTRAR_NOT_FOUND': 0.5}, seed=42)
+
+        self.assertIs(ACCOUNTING.client, client)
+        self.assertEqual([result['batch_size'] for result in results], [1, 5])
+        for result in results:
+            self.assertEqual(result['count'], 10)
+            self.assertLess(result['accepted'], 10)
+            self.assertGreater(result['accepted'], 0)
+            self.assertEqual(result['corba_calls'], 10 + result['accepted'])
+            self.assertGreater(result['payments_per_second'], 0)
+            self.assertGreater(result['queries'], 0)
+        # Benchmark data are rolled back.
+        self.assertFalse(BankPayment.objects.exists())
+        self.assertFalse(Client.objects.exists())
+
+    def test_benchmark_latency(self):
+        result = benchmark_processing(count=4, batch_sizes=(4, ), threads=2, latency=0.01)[0]
+        # Each payment waits for its own calls, not for results of other payments.
+        self.assertGreaterEqual(result['payment_latency_p50'], 0.02)
+        self.assertLessEqual(result['payment_latency_p50'], result['payment_latency_p95'])
+        self.assertLessEqual(result['payment_latency_p95'], result['payment_latency_max'])
+
+    def test_benchmark_replay(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'calls.jsonl')
+        write_records(path)
+
+        result = benchmark_processing(count=4, replay=path, time_scale=0)[0]
+
+        self.assertEqual(result['replay'], path)
+        self.assertEqual(result['time_scale'], 0)
+        self.assertEqual(result['accepted'], 2)
+        self.assertEqual(result['corba_calls'], 6)
+
+    def test_benchmark_empty(self):
+        result = benchmark_processing(count=0)[0]
+        self.assertEqual(result['payments_per_second'], 0)
+        self.assertEqual(result['queries_per_payment'], 0)
+        self.assertEqual(result['payment_latency_p95'], 0)
+        self.assertEqual(result['payment_latency_max'], 0)
+
+
+class TestBenchmarkCommand(TestCase):
+    """Test fred_pain_benchmark command."""
+
+    def test_recoder(self):
+        out = StringIO()
+        call_command('fred_pain_benchmark', 'recoder', '--number', '1', stdout=out)
+        output = json.loads(out.getvalue())
+        self.assertEqual(output['benchmark'], 'recoder')
+        self.assertEqual(set(output['result']), {'generic', 'fast', 'speedup'})
+
+    def test_processing(self):
+        out = StringIO()
+        call_command('fred_pain_benchmark', 'processing', '--count', '3', '--batch-size', '1', '--batch-size', '2',
+                     '--error', 'PAYMENT_TOO_OLD=0.1', '--overlap', stdout=out)
+        output = json.loads(out.getvalue())
+        self.assertEqual(output['benchmark'], 'processing')
+        self.assertEqual([(result['batch_size'], result['errors'], result['overlap']) for result in output['results']],
+                         [(1, {'PAYMENT_TOO_OLD': 0.1}, True), (2, {'PAYMENT_TOO_OLD': 0.1}, True)])
+
+    def test_processing_replay(self):
+        tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, tmp_dir)
+        path = os.path.join(tmp_dir, 'calls.jsonl')
+        write_records(path)
+        out = StringIO()
+        call_command('fred_pain_benchmark', 'processing', '--count', '2', '--replay', path, '--time-scale', '0',
+                     stdout=out)
+        result, = json.loads(out.getvalue())['results']
+        self.assertEqual((result['replay'], result['time_scale'], result['accepted']), (path, 0, 1))
+
+    def test_invalid_error(self):
+        with self.assertRaisesRegex(CommandError, 'Error rate must be in format NAME=RATE.'):
+            call_command('fred_pain_benchmark', 'processing', '--error', 'PAYMENT_TOO_OLD')
@@ -0,0 +1,151 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain circuit breaker."""
+from unittest.mock import Mock, patch, sentinel
+
+from django.test import SimpleTestCase, override_settings
+from omniORB import CORBA
+from testfixtures import LogCapture
+
+from fred_pain.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, CircuitOpenError
+
+
+def transient():
+    return CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)
+
+
+@override_settings(FRED_PAIN_CIRCUIT_BREAKER_THRESHOLD=2, FRED_PAIN_CIRCUIT_BREAKER_COOLDOWN=10)
+@patch('fred_pain.breaker.monotonic', return_value=100)
+class TestCircuitBreaker(SimpleTestCase):
+    """Test CircuitBreaker."""
+
+    def setUp(self):
+        self.breaker = CircuitBreaker('Test', (CORBA.TRANSIENT, ))
+        self.func = Mock(return_value=sentinel.result)
+        self.log_handler = LogCapture('fred_pain.breaker', propagate=False)
+
+    def tearDown(self):
+        self.log_handler.uninstall()
+
+    def _fail(self, count):
+        self.func.side_effect = transient()
+        for i in range(count):
+            with self.assertRaises(CORBA.TRANSIENT):
+                self.breaker.call(self.func)
+        self.func.side_effect = None
+
+    def test_success(self, monotonic_mock):
+        self.assertEqual(self.breaker.call(self.func, sentinel.arg), sentinel.result)
+        self.func.assert_called_once_with(sentinel.arg)
+        self.assertEqual(self.breaker.stats(), {'state': CLOSED, 'failures': 0, 'trips': 0, 'short_circuits': 0})
+
+    def test_failures_reset(self, monotonic_mock):
+        self._fail(1)
+        self.assertEqual(self.breaker.call(self.func), sentinel.result)
+        self._fail(1)
+        self.assertEqual(self.breaker.stats(), {'state': CLOSED, 'failures': 1, 'trips': 0, 'short_circuits': 0})
+
+    def test_other_error(self, monotonic_mock):
+        self._fail(1)
+        self.func.side_effect = ValueError
+        with self.assertRaises(ValueError):
+            self.breaker.call(self.func)
+        self.assertEqual(self.breaker.failures, 0)
+
+    def test_open(self, monotonic_mock):
+        self._fail(2)
+        self.func.reset_mock()
+        with self.assertRaisesRegex(CircuitOpenError, 'Circuit breaker Test is open.'):
+            self.breaker.call(self.func)
+        self.func.assert_not_called()
+        self.assertEqual(self.breaker.stats(), {'state': OPEN, 'failures': 2, 'trips': 1, 'short_circuits': 1})
+        self.log_handler.check(
+            ('fred_pain.breaker', 'WARNING', 'Circuit breaker Test is open after 2 consecutive failures.'),
+        )
+
+    def test_disabled(self, monotonic_mock):
+        with override_settings(FRED_PAIN_CIRCUIT_BREAKER_THRESHOLD=0):
+            self._fail(5)
+            self.assertEqual(self.breaker.call(self.func), sentinel.result)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_success(self, monotonic_mock):
+        self._fail(2)
+        monotonic_mock.return_value = 110
+        self.assertEqual(self.breaker.call(self.func), sentinel.result)
+        self.assertEqual(self.breaker.stats(), {'state': CLOSED, 'failures': 0, 'trips': 1, 'short_circuits': 0})
+        self.log_handler.check(
+            ('fred_pain.breaker', 'WARNING', 'Circuit breaker Test is open after 2 consecutive failures.'),
+            ('fred_pain.breaker', 'INFO', 'Circuit breaker Test is half-open.'),
+            ('fred_pain.breaker', 'INFO', 'Circuit breaker Test is closed.'),
+        )
+
+    def test_half_open_failure(self, monotonic_mock):
+        self._fail(2)
+        monotonic_mock.return_value = 110
+        self._fail(1)
+        with self.assertRaises(CircuitOpenError):
+            self.breaker.call(self.func)
+        self.assertEqual(self.breaker.stats(), {'state': OPEN, 'failures': 3, 'trips': 2, 'short_circuits': 1})
+
+    def test_half_open_probing(self, monotonic_mock):
+        self._fail(2)
+        monotonic_mock.return_value = 110
+
+        def probe():
+            # Other calls are short-circuited while the probe is running.
+            self.assertEqual(self.breaker.state, HALF_OPEN)
+            with self.assertRaises(CircuitOpenError):
+                self.breaker.call(self.func)
+            return sentinel.probe
+
+        self.assertEqual(self.breaker.call(probe), sentinel.probe)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_half_open_interrupted(self, monotonic_mock):
+        self._fail(2)
+        monotonic_mock.return_value = 110
+        self.func.side_effect = KeyboardInterrupt
+        with self.assertRaises(KeyboardInterrupt):
+            self.breaker.call(self.func)
+        # Next call probes the backend again.
+        self.func.side_effect = None
+        self.assertTrue(self.breaker.available())
+        self.assertEqual(self.breaker.call(self.func), sentinel.result)
+        self.assertEqual(self.breaker.state, CLOSED)
+
+    def test_available(self, monotonic_mock):
+        self.assertTrue(self.breaker.available())
+        self._fail(2)
+        self.assertFalse(self.breaker.available())
+        monotonic_mock.return_value = 110
+        self.assertTrue(self.breaker.available())
+
+        def probe():
+            self.assertFalse(self.breaker.available())
+            return sentinel.probe
+
+        self.assertEqual(self.breaker.call(probe), sentinel.probe)
+        self.assertTrue(self.breaker.available())
+        self.assertEqual(self.breaker.stats(), {'state': CLOSED, 'failures': 0, 'trips': 1, 'short_circuits': 0})
+
+    def test_reset(self, monotonic_mock):
+        self._fail(2)
+        self.breaker.reset()
+        self.assertEqual(self.breaker.stats(), {'state': CLOSED, 'failures': 0, 'trips': 0, 'short_circuits': 0})
@@ -0,0 +1,198 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain cache."""
+from datetime import date, datetime
+from unittest.mock import patch
+from uuid import UUID
+
+from django.core.cache import cache
+from django.test import SimpleTestCase, override_settings
+from django_pain.models import BankAccount, BankPayment
+from djmoney.money import Money
+from fred_idl.Registry import Accounting
+from omniORB import CORBA
+from pytz import utc
+from testfixtures import LogCapture
+
+from fred_pain.cache import (REGISTRAR_REFERENCES_REFRESH_KEY, REJECTED_PAYMENT_LOOKUPS, RegistrarReference,
+                             get_registrar_references, invalidate_registrar_references, invalidate_rejected_payment,
+                             is_payment_rejected, set_payment_rejected)
+from fred_pain.corba import ACCOUNTING
+
+STAR_WARS = Accounting.RegistrarReference(handle='SW', name='Star Wars')
+STAR_TREK = Accounting.RegistrarReference(handle='ST', name='Star Trek')
+
+
+class SyncThread(object):
+    """Thread replacement which runs target on start."""
+
+    def __init__(self, target, daemon):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+
+@override_settings(FRED_PAIN_REGISTRAR_CACHE_TIMEOUT=60)
+@patch('fred_pain.cache.Thread', SyncThread)
+@patch('fred_pain.cache.time.time', return_value=1000)
+@patch('fred_pain.corba.ACCOUNTING.client')
+class TestGetRegistrarReferences(SimpleTestCase):
+    """Test get_registrar_references function."""
+
+    def setUp(self):
+        cache.clear()
+        self.log_handler = LogCapture('fred_pain.cache', propagate=False)
+
+    def tearDown(self):
+        self.log_handler.uninstall()
+
+    def test_no_cache(self, corba_mock, time_mock):
+        ACCOUNTING.get_registrar_references.return_value = [STAR_WARS]
+        with override_settings(FRED_PAIN_REGISTRAR_CACHE_TIMEOUT=0):
+            self.assertEqual(get_registrar_references(), [RegistrarReference('SW', 'Star Wars')])
+            self.assertEqual(get_registrar_references(), [RegistrarReference('SW', 'Star Wars')])
+        self.assertEqual(ACCOUNTING.get_registrar_references.call_count, 2)
+
+    def test_cached(self, corba_mock, time_mock):
+        ACCOUNTING.get_registrar_references.return_value = [STAR_WARS]
+        self.assertEqual(get_registrar_references(), [RegistrarReference('SW', 'Star Wars')])
+        time_mock.return_value = 1059
+        self.assertEqual(get_registrar_references(), [RegistrarReference('SW', 'Star Wars')])
+        self.assertEqual(ACCOUNTING.get_registrar_references.call_count, 1)
+
+    def test_stale(self, corba_mock, time_mock):
+        ACCOUNTING.get_registrar_references.return_value = [STAR_WARS]
+        get_registrar_references()
+        ACCOUNTING.get_registrar_references.return_value = [STAR_TREK]
+        time_mock.return_value = 1060
+
+        # Stale references are returned, but refreshed.
+        self.assertEqual(get_registrar_references(), [RegistrarReference('SW', 'Star Wars')])
+        self.assertEqual(get_registrar_references(), [RegistrarReference('ST', 'Star Trek')])
+        self.assertEqual(ACCOUNTING.get_registrar_references.call_count, 2)
+        self.assertIsNone(cache.get(REGISTRAR_REFERENCES_REFRESH_KEY))
+        self.log_handler.check(
+            ('fred_pain.cache', 'DEBUG', 'Registrar references expired, refreshing them in the background.'),
+        )
+
+    def test_stale_refresh_running(self, corba_mock, time_mock):
+        ACCOUNTING.get_registrar_references.return_value = [STAR_WARS]
+        get_registrar_references()
+        cache.set(REGISTRAR_REFERENCES_REFRESH_KEY, True)
+        time_mock.return_value = 1060
+
+        self.assertEqual(get_registrar_references(), [RegistrarReference('SW', 'Star Wars')])
+        self.assertEqual(ACCOUNTING.get_registrar_references.call_count, 1)
+
+    def test_stale_refresh_error(self, corba_mock, time_mock):
+        ACCOUNTING.get_registrar_references.return_value = [STAR_WARS]
+        get_registrar_references()
+        ACCOUNTING.get_registrar_references.side_effect = CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)
+        time_mock.return_value = 1060
+
+        self.assertEqual(get_registrar_references(), [RegistrarReference('SW', 'Star Wars')])
+        self.assertIsNone(cache.get(REGISTRAR_REFERENCES_REFRESH_KEY))
+        self.log_handler.check(
+            ('fred_pain.cache', 'DEBUG', 'Registrar references expired, refreshing them in the background.'),
+            ('fred_pain.cache', 'ERROR', 'Refresh of registrar references failed.'),
+        )
+
+    def test_expired(self, corba_mock, time_mock):
+        ACCOUNTING.get_registrar_references.return_value = [STAR_WARS]
+        get_registrar_references()
+        ACCOUNTING.get_registrar_references.return_value = [STAR_TREK]
+        cache.clear()
+
+        self.assertEqual(get_registrar_references(), [RegistrarReference('ST', 'Star Trek')])
+
+    def test_invalidate(self, corba_mock, time_mock):
+        ACCOUNTING.get_registrar_references.return_value = [STAR_WARS]
+        get_registrar_references()
+        ACCOUNTING.get_registrar_references.return_value = [STAR_TREK]
+        invalidate_registrar_references()
+
+        self.assertEqual(get_registrar_references(), [RegistrarReference('ST', 'Star Trek')])
+
+
+@override_settings(FRED_PAIN_REJECTED_PAYMENT_CACHE_TIMEOUT=60, FRED_PAIN_REJECTED_PAYMENT_CACHE_MAX_TIMEOUT=200)
+@patch('fred_pain.cache.time.time', return_value=1000)
+class TestRejectedPaymentCache(SimpleTestCase):
+    """Test cache of rejected payments."""
+
+    def setUp(self):
+        cache.clear()
+        REJECTED_PAYMENT_LOOKUPS.reset()
+        self.payment = BankPayment(uuid=UUID(int=42), account=BankAccount(account_number='123', currency='USD'),
+                                   amount=Money('999.00', 'USD'), transaction_date=date(2018, 1, 1),
+                                   create_time=datetime(2018, 1, 1, tzinfo=utc))
+        self.log_handler = LogCapture('fred_pain.cache', propagate=False)
+
+    def tearDown(self):
+        self.log_handler.uninstall()
+
+    def test_no_cache(self, time_mock):
+        with override_settings(FRED_PAIN_REJECTED_PAYMENT_CACHE_TIMEOUT=0):
+            set_payment_rejected(self.payment)
+            self.assertFalse(is_payment_rejected(self.payment))
+        self.assertFalse(is_payment_rejected(self.payment))
+        self.assertEqual(REJECTED_PAYMENT_LOOKUPS.get('miss'), 1)
+
+    def test_rejected(self, time_mock):
+        self.assertFalse(is_payment_rejected(self.payment))
+        set_payment_rejected(self.payment)
+        time_mock.return_value = 1059
+        self.assertTrue(is_payment_rejected(self.payment))
+        time_mock.return_value = 1060
+        self.assertFalse(is_payment_rejected(self.payment))
+        self.assertEqual(REJECTED_PAYMENT_LOOKUPS.get('hit'), 1)
+        self.assertEqual(REJECTED_PAYMENT_LOOKUPS.get('miss'), 2)
+
+    def test_backoff(self, time_mock):
+        for expires in (1060, 1120, 1200, 1200):
+            set_payment_rejected(self.payment)
+            time_mock.return_value = expires - 1
+            self.assertTrue(is_payment_rejected(self.payment))
+            time_mock.return_value = 1000
+        self.log_handler.check(
+            ('fred_pain.cache', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-00000000002a rejected 1 times, backing off for 60 seconds.'),
+            ('fred_pain.cache', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-00000000002a rejected 2 times, backing off for 120 seconds.'),
+            ('fred_pain.cache', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-00000000002a rejected 3 times, backing off for 200 seconds.'),
+            ('fred_pain.cache', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-00000000002a rejected 4 times, backing off for 200 seconds.'),
+        )
+
+    def test_edited(self, time_mock):
+        set_payment_rejected(self.payment)
+        set_payment_rejected(self.payment)
+        self.payment.variable_symbol = '42'
+        self.assertFalse(is_payment_rejected(self.payment))
+
+        # Backoff starts over for edited payment.
+        set_payment_rejected(self.payment)
+        time_mock.return_value = 1060
+        self.assertFalse(is_payment_rejected(self.payment))
+
+    def test_invalidate(self, time_mock):
+        set_payment_rejected(self.payment)
+        invalidate_rejected_payment(self.payment)
+        self.assertFalse(is_payment_rejected(self.payment))
@@ -0,0 +1,64 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain wrappers of CORBA clients."""
+from threading import Barrier, Thread
+from unittest.mock import Mock, sentinel
+
+from django.test import SimpleTestCase
+
+from fred_pain.client import LazyClient
+
+
+class TestLazyClient(SimpleTestCase):
+    """Test LazyClient."""
+
+    def test_lazy(self):
+        factory = Mock()
+        factory.return_value.method.return_value = sentinel.result
+        client = LazyClient(factory)
+        factory.assert_not_called()
+
+        self.assertEqual(client.method(sentinel.arg), sentinel.result)
+        self.assertEqual(client.method(sentinel.arg), sentinel.result)
+        factory.assert_called_once_with()
+        factory.return_value.method.assert_called_with(sentinel.arg)
+
+    def test_setup(self):
+        factory = Mock(return_value=sentinel.client)
+        client = LazyClient(factory)
+        self.assertEqual(client.setup(), sentinel.client)
+        self.assertEqual(client.client, sentinel.client)
+        factory.assert_called_once_with()
+
+    def test_threads(self):
+        barrier = Barrier(4)
+        factory = Mock()
+        client = LazyClient(factory)
+
+        def use():
+            barrier.wait()
+            client.method()
+
+        threads = [Thread(target=use) for i in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        factory.assert_called_once_with()
+        self.assertEqual(factory.return_value.method.call_count, 4)
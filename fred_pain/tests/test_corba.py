@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2018-2019  CZ.NIC, z. s. p. o.
+# Copyright (C) 2018-2026  CZ.NIC, z. s. p. o.
 #
 # This file is part of FRED.
 #
@@ -19,15 +19,39 @@
 """Test fred_pain corba interface."""
 import uuid
 from datetime import date, datetime
-from unittest.mock import sentinel
+from typing import Any, Callable, cast
+from unittest.mock import Mock, patch, sentinel
 
-from django.test import SimpleTestCase
+from django.apps import apps
+from django.test import SimpleTestCase, override_settings
 from django_pain.models import BankAccount, BankPayment
 from djmoney.money import Money
 from fred_idl.Registry import Accounting, IsoDate, IsoDateTime
+from omniORB import CORBA
 from pytz import utc
+from testfixtures import LogCapture
 
-from fred_pain.corba import AccountingCorbaRecoder
+from fred_pain.breaker import CircuitBreaker
+from fred_pain.corba import (PAYMENT_ENCODINGS, TRANSPORT_ERRORS, AccountingCorbaRecoder, _get_payment_uuid,
+                             compile_struct_codec, encode_payment, get_payment_fingerprint, prewarm)
+from fred_pain.pool import ObjectReferencePool
+from fred_pain.routing import Endpoint, Router
+
+
+def struct_values(value):
+    """Return comparable representation of CORBA structs."""
+    if isinstance(value, (list, tuple)):
+        return type(value)(struct_values(item) for item in value)
+    if hasattr(value, '_NP_RepositoryId'):
+        return (type(value), dict((key, struct_values(item)) for key, item in vars(value).items()))
+    return value
+
+
+def get_registrar():
+    address = Accounting.PlaceAddress(street1='2311 North Los Robles Avenue', street2='', street3='', city='Pasadena',
+                                      stateorprovince='California', postalcode='91001', country_code='US')
+    return Accounting.Registrar(id=1, handle='REG-BBT', name='Sheldon Cooper', organization='Caltech', cin='',
+                                tin='', url='http://sheldon.example.com', phone=None, fax=None, address=address)
 
 
 class TestFredPainCorbaRecoder(SimpleTestCase):
@@ -64,3 +88,161 @@ class TestFredPainCorbaRecoder(SimpleTestCase):
         self.assertEqual(struct.uuid, '6dfcab4cfe4d4b85a6596000d38d0672')
         for _, key, val in values:
             self.assertEqual(getattr(struct, key), val)
+
+    def test_fast_decode(self):
+        """Test compiled decoding is identical to generic decoding."""
+        values = [
+            (get_registrar(), 'CZ'),
+            ([Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.advance)],
+             Accounting.Credit(value='42')),
+            [Accounting.RegistrarReference(handle='SW', name='Star Wars')],
+        ]
+        fast = AccountingCorbaRecoder('utf-8')
+        generic = AccountingCorbaRecoder('utf-8', fast=False)
+        for value in values:
+            with self.subTest(value=value):
+                self.assertEqual(struct_values(fast.decode(value)), struct_values(generic.decode(value)))
+
+    def test_fast_decode_fallback(self):
+        """Test compiled decoding falls back to generic decoding for unexpected values."""
+        reference = Accounting.RegistrarReference(handle='SW', name=IsoDate('2018-02-01'))
+        self.assertEqual(AccountingCorbaRecoder('utf-8').decode(reference).name, date(2018, 2, 1))
+
+    def test_fast_encode(self):
+        """Test compiled encoding is identical to generic encoding."""
+        registrar = get_registrar()
+        registrar.url = date(2018, 2, 1)
+        fast = AccountingCorbaRecoder('utf-8')
+        generic = AccountingCorbaRecoder('utf-8', fast=False)
+        self.assertEqual(struct_values(fast.encode(registrar)), struct_values(generic.encode(registrar)))
+        self.assertEqual(fast.encode(registrar).url.value, '2018-02-01')
+
+
+@override_settings(FRED_PAIN_PAYMENT_ENCODING_CACHE_SIZE=10)
+class TestEncodePayment(SimpleTestCase):
+    """Test encode_payment function."""
+
+    def test_encode(self):
+        account = BankAccount(account_number='123', currency='USD')
+        payment = BankPayment(identifier='PAYMENT', account=account, amount=Money('999.00', 'USD'),
+                              transaction_date=date(2018, 2, 1), create_time=datetime(2018, 2, 1, tzinfo=utc),
+                              uuid=uuid.UUID(int=42))
+        PAYMENT_ENCODINGS.clear()
+        struct = encode_payment(payment)
+        self.assertEqual(struct_values(struct),
+                         struct_values(AccountingCorbaRecoder._encode_bankpayment(payment)))
+        self.assertIs(encode_payment(payment), struct)
+
+        payment.amount = Money('42.00', 'USD')
+        changed = encode_payment(payment)
+        self.assertEqual(changed.price.value, '42.00')
+        self.assertIs(encode_payment(payment), changed)
+
+    def test_recoder(self):
+        account = BankAccount(account_number='123', currency='USD')
+        payment = BankPayment(identifier='PAYMENT', account=account, amount=Money('999.00', 'USD'),
+                              transaction_date=date(2018, 2, 1), create_time=datetime(2018, 2, 1, tzinfo=utc),
+                              uuid=uuid.UUID(int=42))
+        self.assertIs(AccountingCorbaRecoder().encode(payment), encode_payment(payment))
+
+
+class TestGetPaymentFingerprint(SimpleTestCase):
+    """Test get_payment_fingerprint function."""
+
+    def get_payment(self, **kwargs):
+        account = BankAccount(account_number='123', currency='USD')
+        return BankPayment(account=account, amount=Money('999.00', 'USD'), transaction_date=date(2018, 2, 1),
+                           create_time=datetime(2018, 2, 1, 15, 0, 0, tzinfo=utc),
+                           uuid=uuid.UUID('6dfcab4c-fe4d-4b85-a659-6000d38d0672'), **kwargs)
+
+    def test_fingerprint(self):
+        fingerprint = get_payment_fingerprint(self.get_payment(variable_symbol='42'))
+        self.assertEqual(get_payment_fingerprint(self.get_payment(variable_symbol='42')), fingerprint)
+        self.assertNotEqual(get_payment_fingerprint(self.get_payment(variable_symbol='43')), fingerprint)
+
+    def test_fingerprint_nested(self):
+        payment = self.get_payment()
+        fingerprint = get_payment_fingerprint(payment)
+        payment.amount = Money('999.01', 'USD')
+        self.assertNotEqual(get_payment_fingerprint(payment), fingerprint)
+
+
+class TestCompileStructCodec(SimpleTestCase):
+    """Test compile_struct_codec function."""
+
+    def test_compile(self):
+        codec = cast(Callable[[Any], Any], compile_struct_codec(Accounting.RegistrarReference, bytes.upper))
+        reference = codec(Accounting.RegistrarReference(handle='SW', name=b'Star Wars'))
+        self.assertIsInstance(reference, Accounting.RegistrarReference)
+        self.assertEqual(reference.handle, 'SW')
+        self.assertEqual(reference.name, b'STAR WARS')
+
+    def test_no_fields(self):
+        class Struct(object):
+            def __init__(self, *args):
+                pass
+
+        self.assertIsNone(compile_struct_codec(Struct, str.upper))
+
+    def test_builtin(self):
+        self.assertIsNone(compile_struct_codec(dict, str.upper))
+
+
+class TestGetPaymentUuid(SimpleTestCase):
+    """Test _get_payment_uuid function."""
+
+    def test_payment(self):
+        payment = Accounting.PaymentData(*([None] * 12))
+        payment.uuid = 'abc'
+        self.assertEqual(_get_payment_uuid(('REG-1', payment)), 'abc')
+
+    def test_no_payment(self):
+        self.assertIsNone(_get_payment_uuid(('REG-1', )))
+
+
+class TestPrewarm(SimpleTestCase):
+    """Test prewarm function."""
+
+    def setUp(self):
+        self.factory = Mock(return_value=sentinel.reference)
+        self.pool = ObjectReferencePool(self.factory, TRANSPORT_ERRORS)
+        self.other_pool = ObjectReferencePool(Mock(return_value=sentinel.other), TRANSPORT_ERRORS)
+        router = Router(lambda: [Endpoint('first', self.pool, CircuitBreaker('first', TRANSPORT_ERRORS)),
+                                 Endpoint('second', self.other_pool, CircuitBreaker('second', TRANSPORT_ERRORS))])
+        patcher = patch('fred_pain.corba.ACCOUNTING_ROUTER', router)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        client_patcher = patch('fred_pain.corba._ACCOUNTING_CLIENT')
+        self.client_mock = client_patcher.start()
+        self.addCleanup(client_patcher.stop)
+        self.log_handler = LogCapture('fred_pain.corba', propagate=False)
+        self.addCleanup(self.log_handler.uninstall)
+
+    def test_prewarm(self):
+        prewarm()
+        self.client_mock.setup.assert_called_once_with()
+        self.factory.assert_called_once_with()
+        self.assertEqual(self.pool.stats(), {'idle': 1, 'in_use': 0, 'created': 1, 'discarded': 0})
+        self.assertEqual(self.other_pool.stats(), {'idle': 1, 'in_use': 0, 'created': 1, 'discarded': 0})
+        self.log_handler.check()
+
+    def test_prewarm_transport_error(self):
+        self.factory.side_effect = CORBA.TRANSIENT()
+        prewarm()
+        self.client_mock.setup.assert_called_once_with()
+        self.assertEqual(self.pool.stats(), {'idle': 0, 'in_use': 0, 'created': 0, 'discarded': 0})
+        self.assertEqual(self.other_pool.stats(), {'idle': 1, 'in_use': 0, 'created': 1, 'discarded': 0})
+        self.log_handler.check(
+            ('fred_pain.corba', 'WARNING', 'Accounting object reference at first could not be resolved in advance.'),
+        )
+
+    @patch('fred_pain.corba.prewarm')
+    def test_ready(self, prewarm_mock):
+        apps.get_app_config('fred_pain').ready()
+        prewarm_mock.assert_not_called()
+
+    @override_settings(FRED_PAIN_CORBA_PREWARM=True)
+    @patch('fred_pain.corba.prewarm')
+    def test_ready_prewarm(self, prewarm_mock):
+        apps.get_app_config('fred_pain').ready()
+        prewarm_mock.assert_called_once_with()
@@ -0,0 +1,97 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain fake Accounting servant."""
+from unittest.mock import patch
+
+from django.test import SimpleTestCase
+from fred_idl.Registry import Accounting, IsoDate
+
+from fred_pain.fake import FakeAccounting
+
+
+def get_payment_data(**kwargs):
+    defaults = {
+        'account_payment_ident': 'PAYMENT', 'uuid': '6dfcab4cfe4d4b85a6596000d38d0672', 'account_number': '123',
+        'counter_account_number': '', 'counter_account_name': '', 'constant_symbol': '', 'variable_symbol': '42',
+        'specific_symbol': '', 'price': Accounting.Money(value='999.00'), 'date': IsoDate('2018-02-01'), 'memo': '',
+        'creation_time': None,
+    }
+    defaults.update(kwargs)
+    return Accounting.PaymentData(**defaults)
+
+
+class TestFakeAccounting(SimpleTestCase):
+    """Test FakeAccounting."""
+
+    def test_get_registrar_by_payment(self):
+        registrar, zone = FakeAccounting(registrars=10).get_registrar_by_payment(get_payment_data())
+        self.assertEqual(registrar.handle, 'REG-2')
+        self.assertEqual(registrar.id, 2)
+        self.assertEqual(zone, 'cz')
+
+    def test_get_registrar_by_payment_no_symbol(self):
+        with self.assertRaises(Accounting.REGISTRAR_NOT_FOUND):
+            FakeAccounting().get_registrar_by_payment(get_payment_data(variable_symbol=''))
+
+    def test_get_registrar_by_handle_and_payment(self):
+        registrar, zone = FakeAccounting().get_registrar_by_handle_and_payment('REG-7', get_payment_data())
+        self.assertEqual(registrar.handle, 'REG-7')
+
+    def test_errors(self):
+        servant = FakeAccounting(errors={'PAYMENT_TOO_OLD': 0.5, 'REGISTRAR_NOT_FOUND': 0.25}, seed=0)
+        with patch.object(servant._random, 'random', side_effect=[0.1, 0.5, 0.7, 0.8]):
+            with self.assertRaises(Accounting.PAYMENT_TOO_OLD):
+                servant.get_registrar_by_payment(get_payment_data())
+            with self.assertRaises(Accounting.REGISTRAR_NOT_FOUND):
+                servant.get_registrar_by_payment(get_payment_data())
+            with self.assertRaises(Accounting.REGISTRAR_NOT_FOUND):
+                servant.get_registrar_by_handle_and_payment('REG-1', get_payment_data())
+            servant.get_registrar_by_payment(get_payment_data())
+
+    def test_import_payment(self):
+        servant = FakeAccounting(invoices=3, account_invoices=1)
+        invoices, credit = servant.import_payment(get_payment_data())
+        self.assertEqual([(i.id, i.number, i.type) for i in invoices], [
+            (-1, 'ADV1', Accounting.InvoiceType.advance),
+            (0, 'ACC0', Accounting.InvoiceType.account),
+            (0, 'ACC0', Accounting.InvoiceType.account),
+        ])
+        self.assertEqual(credit.value, '999.00')
+
+    def test_import_payment_no_invoices(self):
+        invoices, credit = FakeAccounting(invoices=0).import_payment(get_payment_data())
+        self.assertEqual(invoices, [])
+
+    def test_import_payment_already_processed(self):
+        servant = FakeAccounting()
+        servant.import_payment(get_payment_data())
+        with self.assertRaises(Accounting.CREDIT_ALREADY_PROCESSED):
+            servant.import_payment_by_registrar_handle(get_payment_data(), 'REG-1', IsoDate('2018-02-01'))
+
+    def test_get_registrar_references(self):
+        references = FakeAccounting(registrars=2).get_registrar_references()
+        self.assertEqual([(r.handle, r.name) for r in references],
+                         [('REG-0', 'Registrar REG-0'), ('REG-1', 'Registrar REG-1')])
+
+    @patch('fred_pain.fake.time.sleep')
+    def test_latency(self, sleep_mock):
+        servant = FakeAccounting(latency=0.01)
+        servant.get_registrar_references()
+        sleep_mock.assert_called_once_with(0.01)
+        self.assertEqual(servant.calls, 1)
@@ -0,0 +1,126 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain priority lanes."""
+from threading import Thread
+from time import sleep
+from unittest.mock import Mock, patch, sentinel
+
+from django.test import SimpleTestCase, override_settings
+
+from fred_pain.lanes import BATCH, INTERACTIVE, LANE_WAIT, LaneClient, LaneScheduler, call_lane, get_call_lane
+from fred_pain.timeout import DeadlineExceeded, call_deadline
+
+
+class TestCallLane(SimpleTestCase):
+    """Test call_lane context manager."""
+
+    def test_default(self):
+        self.assertEqual(get_call_lane(), BATCH)
+
+    def test_lane(self):
+        with call_lane(INTERACTIVE):
+            self.assertEqual(get_call_lane(), INTERACTIVE)
+            with call_lane(BATCH):
+                self.assertEqual(get_call_lane(), BATCH)
+            self.assertEqual(get_call_lane(), INTERACTIVE)
+        self.assertEqual(get_call_lane(), BATCH)
+
+
+class TestLaneScheduler(SimpleTestCase):
+    """Test LaneScheduler."""
+
+    def setUp(self):
+        self.scheduler = LaneScheduler(lambda: 1)
+        self.order = []
+
+    def _wait_for(self, lane, count=1):
+        while self.scheduler.waiting[lane] < count:
+            sleep(0.001)
+
+    def _start(self, lane):
+        def run():
+            with self.scheduler.slot(lane):
+                self.order.append(lane)
+
+        thread = Thread(target=run)
+        thread.start()
+        self._wait_for(lane)
+        return thread
+
+    def test_slot(self):
+        with self.scheduler.slot(INTERACTIVE):
+            self.assertEqual(self.scheduler.stats(), {'running': {INTERACTIVE: 1, BATCH: 0},
+                                                      'waiting': {INTERACTIVE: 0, BATCH: 0}})
+        self.assertEqual(self.scheduler.stats(), {'running': {INTERACTIVE: 0, BATCH: 0},
+                                                  'waiting': {INTERACTIVE: 0, BATCH: 0}})
+
+    def test_wait(self):
+        count = LANE_WAIT.get_count(BATCH)
+        with self.scheduler.slot(BATCH):
+            thread = self._start(BATCH)
+            self.assertEqual(self.order, [])
+        thread.join()
+        self.assertEqual(self.order, [BATCH])
+        self.assertEqual(LANE_WAIT.get_count(BATCH), count + 2)
+
+    def test_interactive_first(self):
+        with self.scheduler.slot(BATCH):
+            threads = [self._start(BATCH), self._start(INTERACTIVE)]
+        for thread in threads:
+            thread.join()
+        self.assertEqual(self.order, [INTERACTIVE, BATCH])
+
+    @override_settings(FRED_PAIN_CORBA_BATCH_CONCURRENCY=1)
+    def test_batch_concurrency(self):
+        self.scheduler.concurrency = lambda: 2
+        with self.scheduler.slot(BATCH):
+            thread = self._start(BATCH)
+            with self.scheduler.slot(INTERACTIVE):
+                self.assertEqual(self.order, [])
+        thread.join()
+        self.assertEqual(self.order, [BATCH])
+
+    def test_no_concurrency(self):
+        self.scheduler.concurrency = lambda: 0
+        with self.scheduler.slot(BATCH):
+            self.assertEqual(self.scheduler.running[BATCH], 1)
+
+    @patch('fred_pain.lanes.monotonic', side_effect=[0, 0, 0, 1, 5])
+    def test_deadline(self, monotonic_mock):
+        with self.scheduler.slot(BATCH):
+            with patch.object(self.scheduler._condition, 'wait') as wait_mock:
+                with self.assertRaisesRegex(DeadlineExceeded, 'Deadline expired while waiting in interactive lane.'):
+                    with self.scheduler.slot(INTERACTIVE, 4):
+                        pass  # pragma: no cover
+        wait_mock.assert_called_once_with(3)
+        self.assertEqual(self.scheduler.waiting, {INTERACTIVE: 0, BATCH: 0})
+
+
+class TestLaneClient(SimpleTestCase):
+    """Test LaneClient."""
+
+    def test_call(self):
+        scheduler = LaneScheduler(lambda: 1)
+        client = Mock()
+        client.get_name.side_effect = lambda *args: scheduler.stats()['running']
+        wrapper = LaneClient(client, scheduler)
+        with call_lane(INTERACTIVE), call_deadline(None):
+            self.assertEqual(wrapper.get_name(sentinel.arg), {INTERACTIVE: 1, BATCH: 0})
+        client.get_name.assert_called_once_with(sentinel.arg)
+        self.assertEqual(wrapper.get_name(), {INTERACTIVE: 0, BATCH: 1})
@@ -0,0 +1,115 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain memoization of encoded structs."""
+import sys
+from unittest.mock import Mock
+
+from django.test import SimpleTestCase, override_settings
+
+from fred_pain.memo import PAYMENT_ENCODING_LOOKUPS, EncodingCache, get_size
+
+
+class Struct(object):
+    def __init__(self, **fields):
+        self.__dict__.update(fields)
+
+
+class TestGetSize(SimpleTestCase):
+    """Test get_size function."""
+
+    def test_plain(self):
+        self.assertEqual(get_size('abc'), sys.getsizeof('abc'))
+
+    def test_tuple(self):
+        self.assertEqual(get_size(('abc', 1)), sys.getsizeof(('abc', 1)) + sys.getsizeof('abc') + sys.getsizeof(1))
+
+    def test_struct(self):
+        struct = Struct(name='abc')
+        self.assertEqual(get_size(Struct(inner=struct)),
+                         2 * sys.getsizeof(struct) + 2 * sys.getsizeof(vars(struct)) + sys.getsizeof('abc'))
+
+
+@override_settings(FRED_PAIN_PAYMENT_ENCODING_CACHE_SIZE=2, FRED_PAIN_PAYMENT_ENCODING_CACHE_MAX_MEMORY=0)
+class TestEncodingCache(SimpleTestCase):
+    """Test EncodingCache."""
+
+    def setUp(self):
+        self.func = Mock(side_effect=lambda value: Struct(value=value))
+        self.cache = EncodingCache(self.func, lambda value: value[0], lambda value: value[1])
+        self.hits = PAYMENT_ENCODING_LOOKUPS.get('hit')
+        self.misses = PAYMENT_ENCODING_LOOKUPS.get('miss')
+
+    def _assert_lookups(self, hits, misses):
+        self.assertEqual(PAYMENT_ENCODING_LOOKUPS.get('hit') - self.hits, hits)
+        self.assertEqual(PAYMENT_ENCODING_LOOKUPS.get('miss') - self.misses, misses)
+
+    def test_hit(self):
+        encoded = self.cache.encode(('key', 'data'))
+        self.assertEqual(encoded.value, ('key', 'data'))
+        self.assertIs(self.cache.encode(('key', 'data')), encoded)
+        self.assertEqual(self.func.call_count, 1)
+        self._assert_lookups(1, 1)
+
+    def test_changed(self):
+        encoded = self.cache.encode(('key', 'data'))
+        changed = self.cache.encode(('key', 'changed'))
+        self.assertEqual(changed.value, ('key', 'changed'))
+        self.assertIsNot(self.cache.encode(('key', 'data')), encoded)
+        self.assertEqual(self.cache.stats()['entries'], 1)
+        self._assert_lookups(0, 3)
+
+    def test_size(self):
+        encoded = self.cache.encode(('first', 'data'))
+        self.cache.encode(('second', 'data'))
+        self.assertIs(self.cache.encode(('first', 'data')), encoded)
+        # The least recently used struct is evicted.
+        self.cache.encode(('third', 'data'))
+        self.assertIs(self.cache.encode(('first', 'data')), encoded)
+        self.cache.encode(('second', 'data'))
+        self.assertEqual(self.func.call_count, 4)
+        self.assertEqual(self.cache.stats()['entries'], 2)
+
+    def test_max_memory(self):
+        self.cache.encode(('a', 'data'))
+        size = self.cache.stats()['memory']
+        with override_settings(FRED_PAIN_PAYMENT_ENCODING_CACHE_MAX_MEMORY=size * 2 - 1):
+            self.cache.encode(('b', 'data'))
+        self.assertEqual(self.cache.stats(), {'entries': 1, 'memory': size})
+        self.cache.encode(('b', 'data'))
+        self._assert_lookups(1, 2)
+
+    def test_too_large(self):
+        with override_settings(FRED_PAIN_PAYMENT_ENCODING_CACHE_MAX_MEMORY=1):
+            self.assertEqual(self.cache.encode(('key', 'data')).value, ('key', 'data'))
+        self.assertEqual(self.cache.stats(), {'entries': 0, 'memory': 0})
+
+    @override_settings(FRED_PAIN_PAYMENT_ENCODING_CACHE_SIZE=0)
+    def test_disabled(self):
+        self.cache.encode(('key', 'data'))
+        self.cache.encode(('key', 'data'))
+        self.assertEqual(self.func.call_count, 2)
+        self.assertEqual(self.cache.stats(), {'entries': 0, 'memory': 0})
+        self._assert_lookups(0, 0)
+
+    def test_clear(self):
+        self.cache.encode(('key', 'data'))
+        self.cache.clear()
+        self.assertEqual(self.cache.stats(), {'entries': 0, 'memory': 0})
+        self.cache.encode(('key', 'data'))
+        self.assertEqual(self.func.call_count, 2)
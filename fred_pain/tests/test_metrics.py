@@ -0,0 +1,231 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain metrics."""
+import os
+from tempfile import TemporaryDirectory
+from unittest.mock import Mock, patch, sentinel
+
+from django.test import SimpleTestCase, override_settings
+from testfixtures import LogCapture
+
+from fred_pain.metrics import (CORBA_CALL_DURATION, CORBA_CALLS, METRICS, Counter, Gauge, Histogram, MetricsClient,
+                               MetricsRegistry, export_metrics, textfile_sink)
+
+EXPORTED = []  # type: list
+
+
+def collect_sink(text):
+    EXPORTED.append(text)
+
+
+def failing_sink(text):
+    raise OSError('Disk full')
+
+
+class TestCounter(SimpleTestCase):
+    """Test Counter."""
+
+    def test_render(self):
+        counter = Counter('calls_total', 'Number of calls.', ('method', 'outcome'))
+        counter.inc('import_payment', 'ok')
+        counter.inc('import_payment', 'ok', amount=2)
+        counter.inc('get_registrar_by_payment', 'REGISTRAR_NOT_FOUND')
+        self.assertEqual(counter.get('import_payment', 'ok'), 3)
+        self.assertEqual(counter.get('import_payment', 'PAYMENT_TOO_OLD'), 0)
+        self.assertEqual(counter.render(), [
+            '# HELP calls_total Number of calls.',
+            '# TYPE calls_total counter',
+            'calls_total{method="get_registrar_by_payment",outcome="REGISTRAR_NOT_FOUND"} 1',
+            'calls_total{method="import_payment",outcome="ok"} 3',
+        ])
+
+    def test_no_labels(self):
+        counter = Counter('calls_total', 'Number of calls.')
+        counter.inc(amount=0.5)
+        self.assertEqual(counter.render()[2:], ['calls_total 0.5'])
+
+    def test_escape(self):
+        counter = Counter('calls_total', 'Number of calls.', ('method', ))
+        counter.inc('a"b\\c\nd')
+        self.assertEqual(counter.render()[2:], ['calls_total{method="a\\"b\\\\c\\nd"} 1'])
+
+    def test_reset(self):
+        counter = Counter('calls_total', 'Number of calls.')
+        counter.inc()
+        counter.reset()
+        self.assertEqual(counter.render()[2:], [])
+
+    def test_merge(self):
+        counter = Counter('calls_total', 'Number of calls.', ('method', ))
+        counter.inc('import_payment')
+        other = Counter('calls_total', 'Number of calls.', ('method', ))
+        other.inc('import_payment', amount=2)
+        other.inc('get_registrar_by_payment')
+        counter.merge(other.dump())
+        self.assertEqual(counter.get('import_payment'), 3)
+        self.assertEqual(counter.get('get_registrar_by_payment'), 1)
+
+
+class TestHistogram(SimpleTestCase):
+    """Test Histogram."""
+
+    def test_render(self):
+        histogram = Histogram('duration_seconds', 'Duration.', ('method', ), buckets=(0.1, 1))
+        histogram.observe(0.05, 'import_payment')
+        histogram.observe(0.1, 'import_payment')
+        histogram.observe(0.5, 'import_payment')
+        histogram.observe(5, 'import_payment')
+        self.assertEqual(histogram.get_count('import_payment'), 4)
+        self.assertEqual(histogram.get_count('get_registrar_by_payment'), 0)
+        self.assertEqual(histogram.render(), [
+            '# HELP duration_seconds Duration.',
+            '# TYPE duration_seconds histogram',
+            'duration_seconds_bucket{method="import_payment",le="0.1"} 2',
+            'duration_seconds_bucket{method="import_payment",le="1"} 3',
+            'duration_seconds_bucket{method="import_payment",le="+Inf"} 4',
+            'duration_seconds_sum{method="import_payment"} 5.65',
+            'duration_seconds_count{method="import_payment"} 4',
+        ])
+
+    def test_reset(self):
+        histogram = Histogram('duration_seconds', 'Duration.')
+        histogram.observe(1)
+        histogram.reset()
+        self.assertEqual(histogram.render()[2:], [])
+
+    def test_merge(self):
+        histogram = Histogram('duration_seconds', 'Duration.', buckets=(0.1, 1))
+        histogram.observe(0.05)
+        other = Histogram('duration_seconds', 'Duration.', buckets=(0.1, 1))
+        other.observe(0.5)
+        other.observe(5)
+        histogram.merge(other.dump())
+        self.assertEqual(histogram.render()[2:], [
+            'duration_seconds_bucket{le="0.1"} 1',
+            'duration_seconds_bucket{le="1"} 2',
+            'duration_seconds_bucket{le="+Inf"} 3',
+            'duration_seconds_sum 5.55',
+            'duration_seconds_count 3',
+        ])
+
+
+class TestGauge(SimpleTestCase):
+    """Test Gauge."""
+
+    def test_render(self):
+        gauge = Gauge('references', 'References.', lambda: {('idle', ): 2, ('in_use', ): 1}, ('state', ))
+        self.assertEqual(gauge.render(), [
+            '# HELP references References.',
+            '# TYPE references gauge',
+            'references{state="idle"} 2',
+            'references{state="in_use"} 1',
+        ])
+
+
+class TestMetricsRegistry(SimpleTestCase):
+    """Test MetricsRegistry."""
+
+    def test_render(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter('b_total', 'B.'))
+        registry.register(Gauge('a', 'A.', lambda: {(): 1}))
+        counter.inc()
+        self.assertEqual(registry.render(),
+                         '# HELP a A.\n# TYPE a gauge\na 1\n# HELP b_total B.\n# TYPE b_total counter\nb_total 1\n')
+
+    def test_register_duplicate(self):
+        registry = MetricsRegistry()
+        registry.register(Counter('a_total', 'A.'))
+        with self.assertRaisesRegex(ValueError, 'Metric a_total is already registered.'):
+            registry.register(Counter('a_total', 'A.'))
+
+    def test_reset(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter('a_total', 'A.'))
+        counter.inc()
+        registry.reset()
+        self.assertEqual(counter.get(), 0)
+
+    def test_merge(self):
+        registry = MetricsRegistry()
+        counter = registry.register(Counter('a_total', 'A.'))
+        registry.register(Gauge('b', 'B.', lambda: {(): 1}))
+        counter.inc()
+        values = registry.dump()
+        self.assertEqual(values, {'a_total': {(): 1}})
+        registry.merge(values)
+        registry.merge({'unknown_total': {(): 1}})
+        self.assertEqual(counter.get(), 2)
+
+
+class TestExportMetrics(SimpleTestCase):
+    """Test metrics export."""
+
+    def setUp(self):
+        EXPORTED.clear()
+
+    def test_no_sink(self):
+        export_metrics()
+        self.assertEqual(EXPORTED, [])
+
+    @override_settings(FRED_PAIN_METRICS_SINK='fred_pain.tests.test_metrics.collect_sink')
+    def test_sink(self):
+        export_metrics()
+        self.assertEqual(EXPORTED, [METRICS.render()])
+
+    @override_settings(FRED_PAIN_METRICS_SINK='fred_pain.tests.test_metrics.failing_sink')
+    def test_sink_error(self):
+        with LogCapture('fred_pain.metrics', propagate=False) as log_handler:
+            export_metrics()
+        log_handler.check(('fred_pain.metrics', 'ERROR', 'Export of metrics failed.'))
+
+    def test_textfile_sink(self):
+        with TemporaryDirectory() as tmp_dir:
+            path = os.path.join(tmp_dir, 'fred_pain.prom')
+            with override_settings(FRED_PAIN_METRICS_TEXTFILE=path):
+                textfile_sink('a 1\n')
+            self.assertEqual(os.listdir(tmp_dir), ['fred_pain.prom'])
+            with open(path) as metrics_file:
+                self.assertEqual(metrics_file.read(), 'a 1\n')
+
+
+class TestMetricsClient(SimpleTestCase):
+    """Test MetricsClient."""
+
+    def setUp(self):
+        METRICS.reset()
+
+    @patch('fred_pain.metrics.perf_counter', side_effect=[10, 10.2])
+    def test_call(self, perf_counter_mock):
+        client = Mock()
+        client.import_payment.return_value = sentinel.result
+        self.assertEqual(MetricsClient(client).import_payment(sentinel.payment), sentinel.result)
+        client.import_payment.assert_called_once_with(sentinel.payment)
+        self.assertEqual(CORBA_CALLS.get('import_payment', 'ok'), 1)
+        self.assertEqual(CORBA_CALL_DURATION.get_count('import_payment'), 1)
+        self.assertIn('fred_pain_corba_call_duration_seconds_bucket{method="import_payment",le="0.25"} 1\n',
+                      METRICS.render())
+
+    def test_call_error(self):
+        client = Mock()
+        client.import_payment.side_effect = ValueError
+        with self.assertRaises(ValueError):
+            MetricsClient(client).import_payment(sentinel.payment)
+        self.assertEqual(CORBA_CALLS.get('import_payment', 'ValueError'), 1)
+        self.assertEqual(CORBA_CALL_DURATION.get_count('import_payment'), 1)
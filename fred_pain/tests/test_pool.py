@@ -0,0 +1,151 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain pool of object references."""
+from threading import Event, Thread
+from unittest.mock import Mock, patch
+
+from django.test import SimpleTestCase, override_settings
+from omniORB import CORBA
+from testfixtures import LogCapture
+
+from fred_pain.pool import ObjectReferencePool, get_pool_size
+
+
+class TestGetPoolSize(SimpleTestCase):
+    """Test get_pool_size."""
+
+    @override_settings(FRED_PAIN_CORBA_POOL_SIZE=3)
+    def test_explicit(self):
+        self.assertEqual(get_pool_size(), 3)
+
+    @override_settings(FRED_PAIN_PROCESSING_THREADS=20, FRED_PAIN_ASYNC_CONCURRENCY=5)
+    def test_threads(self):
+        self.assertEqual(get_pool_size(), 20)
+
+    @override_settings(FRED_PAIN_PROCESSING_THREADS=1, FRED_PAIN_ASYNC_CONCURRENCY=5)
+    def test_async_concurrency(self):
+        self.assertEqual(get_pool_size(), 5)
+
+    @override_settings(FRED_PAIN_PROCESSING_THREADS=4, FRED_PAIN_ASYNC_CONCURRENCY=1, FRED_PAIN_OVERLAP_CALLS=True)
+    def test_overlap(self):
+        self.assertEqual(get_pool_size(), 8)
+
+
+@override_settings(FRED_PAIN_CORBA_POOL_SIZE=2, FRED_PAIN_CORBA_POOL_VALIDATE_AFTER=10)
+@patch('fred_pain.pool.monotonic', return_value=100)
+class TestObjectReferencePool(SimpleTestCase):
+    """Test ObjectReferencePool."""
+
+    def setUp(self):
+        self.factory = Mock(side_effect=lambda: Mock(**{'_non_existent.return_value': False}))
+        self.pool = ObjectReferencePool(self.factory, (CORBA.TRANSIENT, ))
+        self.log_handler = LogCapture('fred_pain.pool', propagate=False)
+
+    def tearDown(self):
+        self.log_handler.uninstall()
+
+    def test_reuse(self, monotonic_mock):
+        with self.pool.reference() as ref:
+            pass
+        with self.pool.reference() as other:
+            self.assertIs(other, ref)
+        self.assertEqual(self.factory.call_count, 1)
+        ref._non_existent.assert_not_called()
+        self.assertEqual(self.pool.stats(), {'idle': 1, 'in_use': 0, 'created': 1, 'discarded': 0})
+
+    def test_concurrent(self, monotonic_mock):
+        with self.pool.reference() as ref:
+            with self.pool.reference() as other:
+                self.assertIsNot(other, ref)
+                self.assertEqual(self.pool.stats(), {'idle': 0, 'in_use': 2, 'created': 2, 'discarded': 0})
+        self.assertEqual(self.pool.stats(), {'idle': 2, 'in_use': 0, 'created': 2, 'discarded': 0})
+
+    def test_wait(self, monotonic_mock):
+        checked_out = Event()
+        release = Event()
+
+        def hold():
+            with self.pool.reference():
+                checked_out.set()
+                release.wait()
+
+        threads = [Thread(target=hold) for i in range(2)]
+        for thread in threads:
+            thread.start()
+            checked_out.wait()
+            checked_out.clear()
+
+        waiting = Thread(target=hold)
+        waiting.start()
+        self.assertFalse(checked_out.wait(0.1))
+        release.set()
+        self.assertTrue(checked_out.wait(1))
+        for thread in threads + [waiting]:
+            thread.join()
+        self.assertEqual(self.factory.call_count, 2)
+
+    def test_size(self, monotonic_mock):
+        pool = ObjectReferencePool(self.factory, (CORBA.TRANSIENT, ), size=3)
+        with pool.reference(), pool.reference(), pool.reference():
+            self.assertEqual(pool.stats(), {'idle': 0, 'in_use': 3, 'created': 3, 'discarded': 0})
+
+    def test_error(self, monotonic_mock):
+        with self.assertRaises(CORBA.TRANSIENT):
+            with self.pool.reference():
+                raise CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)
+        with self.pool.reference():
+            pass
+        self.assertEqual(self.pool.stats(), {'idle': 1, 'in_use': 0, 'created': 2, 'discarded': 1})
+        self.log_handler.check(('fred_pain.pool', 'INFO', 'Object reference failed, discarding it.'))
+
+    def test_other_error(self, monotonic_mock):
+        with self.assertRaises(ValueError):
+            with self.pool.reference():
+                raise ValueError
+        self.assertEqual(self.pool.stats(), {'idle': 1, 'in_use': 0, 'created': 1, 'discarded': 0})
+
+    def test_validate(self, monotonic_mock):
+        with self.pool.reference() as ref:
+            pass
+        monotonic_mock.return_value = 111
+        with self.pool.reference() as other:
+            self.assertIs(other, ref)
+        ref._non_existent.assert_called_once_with()
+
+    def test_validate_non_existent(self, monotonic_mock):
+        with self.pool.reference() as ref:
+            ref._non_existent.return_value = True
+        monotonic_mock.return_value = 111
+        with self.pool.reference() as other:
+            self.assertIsNot(other, ref)
+        self.assertEqual(self.pool.stats(), {'idle': 1, 'in_use': 0, 'created': 2, 'discarded': 1})
+        self.log_handler.check(('fred_pain.pool', 'INFO', 'Object reference is not valid, discarding it.'))
+
+    def test_validate_error(self, monotonic_mock):
+        with self.pool.reference() as ref:
+            ref._non_existent.side_effect = CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)
+        monotonic_mock.return_value = 111
+        with self.pool.reference() as other:
+            self.assertIsNot(other, ref)
+
+    def test_clear(self, monotonic_mock):
+        with self.pool.reference():
+            pass
+        self.pool.clear()
+        self.assertEqual(self.pool.stats(), {'idle': 0, 'in_use': 0, 'created': 1, 'discarded': 1})
@@ -0,0 +1,126 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain probe."""
+import json
+from io import StringIO
+from threading import Barrier
+from unittest.mock import Mock, patch
+
+from django.core.management import CommandError, call_command
+from django.test import SimpleTestCase, override_settings
+from omniORB import CORBA
+
+from fred_pain.probe import percentile, probe_accounting
+
+
+@override_settings(FRED_PAIN_CORBA_ENDPOINTS=['first', 'second'])
+class TestProbeAccounting(SimpleTestCase):
+    """Test probe_accounting function."""
+
+    def setUp(self):
+        self.reference = Mock(**{'get_registrar_references.return_value': []})
+        patcher = patch('fred_pain.corba._resolve_accounting', return_value=self.reference)
+        self.resolve_mock = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_probe(self):
+        result = probe_accounting(calls=5, concurrency=2)
+        self.assertEqual(self.reference.get_registrar_references.call_count, 5)
+        self.assertEqual(set(result['endpoints']), {'first', 'second'})
+        self.assertEqual((result['calls'], result['concurrency'], result['errors'], result['first_error']),
+                         (5, 2, 0, None))
+        self.assertLessEqual(result['latency_p50'], result['latency_p95'])
+        self.assertLessEqual(result['latency_p95'], result['latency_p99'])
+        self.assertGreater(result['throughput'], 0)
+
+    @override_settings(FRED_PAIN_CORBA_ENDPOINTS=['first'], FRED_PAIN_CORBA_POOL_SIZE=1)
+    def test_probe_pool_size(self):
+        barrier = Barrier(4, timeout=1)
+
+        def wait():
+            # All calls must be running at the same time.
+            barrier.wait()
+            return []
+
+        self.reference.get_registrar_references.side_effect = wait
+        result = probe_accounting(calls=4, concurrency=4)
+        self.assertEqual((result['errors'], result['first_error']), (0, None))
+        self.assertEqual(self.resolve_mock.call_count, 4)
+
+    def test_probe_errors(self):
+        error = CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)
+
+        def resolve(netloc):
+            if netloc == 'second':
+                raise error
+            return self.reference
+
+        self.resolve_mock.side_effect = resolve
+        result = probe_accounting(calls=2)
+        self.assertIn('resolve', result['endpoints']['first'])
+        self.assertEqual(result['endpoints']['second'], {'error': repr(error)})
+        self.assertEqual(result['errors'], 1)
+        self.assertIn('TRANSIENT', result['first_error'])
+
+    def test_probe_empty(self):
+        result = probe_accounting(calls=0)
+        self.assertEqual((result['errors'], result['latency_p99']), (0, 0))
+
+
+class TestPercentile(SimpleTestCase):
+    """Test percentile function."""
+
+    def test_percentile(self):
+        values = [0.1, 0.2, 0.3, 0.4]
+        self.assertEqual([percentile(values, percent) for percent in (25, 50, 95, 100)], [0.1, 0.2, 0.4, 0.4])
+
+    def test_empty(self):
+        self.assertEqual(percentile([], 50), 0)
+
+
+@patch('fred_pain.management.commands.fred_pain_probe.probe_accounting')
+class TestProbeCommand(SimpleTestCase):
+    """Test fred_pain_probe command."""
+
+    def setUp(self):
+        self.result = {'endpoints': {'localhost': {'resolve': 0.01}}, 'calls': 10, 'concurrency': 2, 'errors': 0,
+                       'first_error': None, 'latency_p50': 0.1, 'latency_p95': 0.2, 'latency_p99': 0.3,
+                       'throughput': 20.0}  # type: dict
+
+    def test_probe(self, probe_mock):
+        probe_mock.return_value = self.result
+        out = StringIO()
+        call_command('fred_pain_probe', '--calls', '10', '--concurrency', '2', '--max-p50', '0.1', '--max-p95', '0.2',
+                     '--max-p99', '0.3', '--min-throughput', '20', stdout=out)
+        probe_mock.assert_called_once_with(calls=10, concurrency=2)
+        self.assertEqual(json.loads(out.getvalue()), self.result)
+
+    def test_thresholds(self, probe_mock):
+        probe_mock.return_value = self.result
+        with self.assertRaisesRegex(CommandError, r'^Latency p95 0\.200 s exceeds 0\.150 s\. '
+                                                  r'Throughput 20\.0 calls/s is below 50\.0 calls/s\.$'):
+            call_command('fred_pain_probe', '--max-p95', '0.15', '--min-throughput', '50', stdout=StringIO())
+
+    def test_errors(self, probe_mock):
+        self.result['endpoints']['fred-2'] = {'error': 'TRANSIENT(0, COMPLETED_NO)'}
+        self.result['errors'] = 3
+        probe_mock.return_value = self.result
+        with self.assertRaisesRegex(CommandError, r'^Accounting at fred-2 could not be resolved\. '
+                                                  r'3 of 10 calls failed\.$'):
+            call_command('fred_pain_probe', stdout=StringIO())
@@ -1,5 +1,5 @@
 #
-# Copyright (C) 2018-2020  CZ.NIC, z. s. p. o.
+# Copyright (C) 2018-2026  CZ.NIC, z. s. p. o.
 #
 # This file is part of FRED.
 #
@@ -17,12 +17,17 @@
 # along with FRED.  If not, see <https://www.gnu.org/licenses/>.
 
 """Test fred_pain paypemnt processor."""
+import asyncio
 from datetime import date
-from unittest.mock import call, patch
+from threading import Event
+from typing import cast
+from unittest.mock import DEFAULT, Mock, call, patch
 from uuid import UUID
 
+from django.core.cache import cache
 from django.core.exceptions import ImproperlyConfigured
-from django.test import TestCase, override_settings
+from django.db import IntegrityError, connection
+from django.test import TestCase, TransactionTestCase, override_settings
 from django_pain.constants import InvoiceType, PaymentProcessingError
 from django_pain.models import BankAccount, BankPayment, Client, Invoice
 from django_pain.processors import InvalidTaxDateError, ProcessPaymentResult
@@ -31,8 +36,13 @@ from fred_idl.Registry import Accounting
 from pyfco.utils import CorbaAssertMixin
 from testfixtures import LogCapture
 
-from fred_pain.corba import ACCOUNTING
-from fred_pain.processors import FredDaphnePaymentProcessor, FredPaymentProcessor
+from fred_pain.corba import ACCOUNTING, INTERRUPTIBLE_METHODS, TRANSPORT_ERRORS
+from fred_pain.lanes import BATCH, INTERACTIVE, get_call_lane
+from fred_pain.models import PaymentJournal, Registrar
+from fred_pain.processors import (DEADLINE_EXPIRATIONS, FredAsyncPaymentProcessor, FredDaphnePaymentProcessor,
+                                  FredPaymentProcessor)
+from fred_pain.timeout import TimeoutClient
+from fred_pain.tracing import PaymentTrace, get_trace
 
 
 def get_address(**kwargs):
@@ -50,6 +60,15 @@ def get_address(**kwargs):
     return Accounting.PlaceAddress(**defaults)
 
 
+def run(coroutine):
+    """Run coroutine in a new event loop."""
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
 def get_registrar(**kwargs):
     """Return sample Registrar."""
     defaults = {
@@ -68,6 +87,22 @@ def get_registrar(**kwargs):
     return Accounting.Registrar(**defaults)
 
 
+class SyncPool(object):
+    """Pool replacement which runs tasks in the current process."""
+
+    def __init__(self, processes):
+        self.processes = processes
+
+    def apply_async(self, func, args):
+        return Mock(get=Mock(return_value=func(*args)))
+
+    def terminate(self):
+        pass
+
+    def join(self):
+        pass
+
+
 @patch('fred_pain.corba.ACCOUNTING.client')
 class TestFredPaymentProcessor(CorbaAssertMixin, TestCase):
     """Test FredPaymentProcessor."""
@@ -87,6 +122,15 @@ class TestFredPaymentProcessor(CorbaAssertMixin, TestCase):
     def tearDown(self):
         self.log_handler.uninstall()
 
+    def _create_payments(self, count):
+        payments = [self.payment]
+        for i in range(1, count):
+            payment = BankPayment(identifier='PAYMENT{}'.format(i), uuid=UUID(int=i), account=self.account,
+                                  amount=Money('999.00', 'USD'), transaction_date=date(2018, 1, 1))
+            payment.save()
+            payments.append(payment)
+        return payments
+
     def test_process_payments_success(self, corba_mock):
         """Test process_payments with successful credit increase."""
         ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
@@ -108,6 +152,13 @@ class TestFredPaymentProcessor(CorbaAssertMixin, TestCase):
              'Payment 00000000-0000-0000-0000-000000000000 accepted. 0 invoices attached.'),
         )
 
+    @patch('fred_pain.processors.export_metrics')
+    def test_process_payments_export_metrics(self, export_mock, corba_mock):
+        """Test process_payments exports metrics."""
+        ACCOUNTING.get_registrar_by_payment.side_effect = Accounting.REGISTRAR_NOT_FOUND
+        list(self.processor.process_payments([self.payment]))
+        export_mock.assert_called_once_with()
+
     def test_process_payments_credit_already_processed(self, corba_mock):
         """Test process_payments with CREDIT_ALREADY_PROCESSED exception."""
         ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT'), 'CZ')
@@ -140,6 +191,30 @@ class TestFredPaymentProcessor(CorbaAssertMixin, TestCase):
             ('fred_pain.processors', 'DEBUG', 'Payment 00000000-0000-0000-0000-000000000000 rejected.'),
         )
 
+    @override_settings(FRED_PAIN_REJECTED_PAYMENT_CACHE_TIMEOUT=60)
+    def test_process_payments_rejected_cache(self, corba_mock):
+        """Test process_payments doesn't send recently rejected payment again."""
+        cache.clear()
+        ACCOUNTING.get_registrar_by_payment.side_effect = Accounting.REGISTRAR_NOT_FOUND
+
+        self.assertEqual(list(self.processor.process_payments([self.payment])), [ProcessPaymentResult(False)])
+        self.assertEqual(list(self.processor.process_payments([self.payment])), [ProcessPaymentResult(False)])
+        self.assertCorbaCallsEqual(corba_mock.mock_calls, [call.get_registrar_by_payment(self.payment)])
+        self.log_handler.check(
+            ('fred_pain.processors', 'DEBUG', 'Payment 00000000-0000-0000-0000-000000000000 rejected.'),
+            ('fred_pain.processors', 'DEBUG', 'Payment 00000000-0000-0000-0000-000000000000 rejected (cached).'),
+        )
+
+    @override_settings(FRED_PAIN_REJECTED_PAYMENT_CACHE_TIMEOUT=60)
+    def test_process_payments_rejected_cache_internal_error(self, corba_mock):
+        """Test process_payments doesn't cache payments rejected on internal server error."""
+        cache.clear()
+        ACCOUNTING.get_registrar_by_payment.side_effect = Accounting.INTERNAL_SERVER_ERROR
+
+        list(self.processor.process_payments([self.payment]))
+        list(self.processor.process_payments([self.payment]))
+        self.assertEqual(ACCOUNTING.get_registrar_by_payment.call_count, 2)
+
     def test_process_payments_too_old(self, corba_mock):
         """Test process_payments with PAYMENT_TOO_OLD exception."""
         ACCOUNTING.get_registrar_by_payment.side_effect = Accounting.PAYMENT_TOO_OLD
@@ -155,6 +230,598 @@ class TestFredPaymentProcessor(CorbaAssertMixin, TestCase):
             ('fred_pain.processors', 'DEBUG', 'Payment 00000000-0000-0000-0000-000000000000 rejected.'),
         )
 
+    @override_settings(FRED_PAIN_PROCESSING_THREADS=3)
+    def test_process_payments_threads(self, corba_mock):
+        """Test process_payments with several processing threads."""
+        payments = self._create_payments(5)
+
+        def get_registrar_by_payment(payment):
+            if payment.identifier == 'PAYMENT2':
+                raise Accounting.REGISTRAR_NOT_FOUND
+            return (get_registrar(handle='REG-{}'.format(payment.identifier), id=1), 'CZ')
+
+        ACCOUNTING.get_registrar_by_payment.side_effect = get_registrar_by_payment
+        ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+
+        self.assertEqual(
+            list(self.processor.process_payments(payments)),
+            [ProcessPaymentResult(True), ProcessPaymentResult(True), ProcessPaymentResult(False),
+             ProcessPaymentResult(True), ProcessPaymentResult(True)]
+        )
+        self.assertQuerysetEqual(Client.objects.order_by('payment').values_list('handle', 'payment'), [
+            ('REG-PAYMENT', payments[0].pk),
+            ('REG-PAYMENT1', payments[1].pk),
+            ('REG-PAYMENT3', payments[3].pk),
+            ('REG-PAYMENT4', payments[4].pk),
+        ], transform=tuple)
+        self.assertEqual(ACCOUNTING.import_payment.call_count, 4)
+
+    @override_settings(FRED_PAIN_PROCESSING_THREADS=2)
+    def test_process_payments_threads_exception(self, corba_mock):
+        """Test process_payments with several processing threads raises exceptions in order."""
+        ACCOUNTING.get_registrar_by_payment.side_effect = ValueError('Gazorpazorp')
+
+        with self.assertRaisesRegex(ValueError, 'Gazorpazorp'):
+            list(self.processor.process_payments([self.payment]))
+
+    @override_settings(FRED_PAIN_BATCH_SIZE=2)
+    def test_process_payments_batch(self, corba_mock):
+        """Test process_payments with bulk storing of results."""
+        payments = self._create_payments(3)
+        Invoice.objects.create(remote_id=40, number='INV40', invoice_type=InvoiceType.ADVANCE)
+        Invoice.objects.create(remote_id=99, number='INV41', invoice_type=InvoiceType.ACCOUNT)
+        ACCOUNTING.get_registrar_by_payment.side_effect = [
+            (get_registrar(handle='REG-BBT', id=1), 'CZ'),
+            Accounting.REGISTRAR_NOT_FOUND,
+            (get_registrar(handle='REG-GRP', id=2), 'CZ'),
+        ]
+        ACCOUNTING.import_payment.side_effect = [
+            ([Accounting.InvoiceReference(id=40, number='INV40', type=Accounting.InvoiceType.advance),
+              Accounting.InvoiceReference(id=41, number='INV41', type=Accounting.InvoiceType.account),
+              Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.account)],
+             Accounting.Credit(value='42')),
+            ([Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.account)],
+             Accounting.Credit(value='42')),
+        ]
+
+        self.assertEqual(
+            list(self.processor.process_payments(payments)),
+            [ProcessPaymentResult(True), ProcessPaymentResult(False), ProcessPaymentResult(True)]
+        )
+        self.assertQuerysetEqual(Client.objects.order_by('payment').values_list('handle', 'remote_id', 'payment'), [
+            ('REG-BBT', 1, payments[0].pk),
+            ('REG-GRP', 2, payments[2].pk),
+        ], transform=tuple)
+        self.assertQuerysetEqual(
+            Invoice.objects.order_by('number', 'payments').values_list('number', 'remote_id', 'payments'), [
+                ('INV40', 40, payments[0].pk),
+                ('INV41', 99, payments[0].pk),
+                ('INV42', 42, payments[0].pk),
+                ('INV42', 42, payments[2].pk),
+            ], transform=tuple)
+        self.log_handler.check(
+            ('fred_pain.processors', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-000000000000 accepted. 3 invoices attached.'),
+            ('fred_pain.processors', 'DEBUG', 'Payment 00000000-0000-0000-0000-000000000001 rejected.'),
+            ('fred_pain.processors', 'ERROR',
+             'Advance invoice number INV40 is already associated with different payment.'),
+            ('fred_pain.processors', 'ERROR', 'Invoice number INV41 already exists with id=99 (received id=41)'),
+            ('fred_pain.processors', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-000000000002 accepted. 1 invoices attached.'),
+        )
+
+    def test_process_payments_invoice_index(self, corba_mock):
+        """Test process_payments resolves invoices shared by payments only once."""
+        payments = self._create_payments(3)
+        Invoice.objects.create(remote_id=99, number='INV41', invoice_type=InvoiceType.ACCOUNT)
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+        ACCOUNTING.import_payment.return_value = (
+            [Accounting.InvoiceReference(id=41, number='INV41', type=Accounting.InvoiceType.account),
+             Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.advance)],
+            Accounting.Credit(value='42'))
+
+        with patch.object(Invoice.objects, 'get_or_create', wraps=Invoice.objects.get_or_create) as get_mock:
+            self.assertEqual(list(self.processor.process_payments(payments)), [ProcessPaymentResult(True)] * 3)
+
+        self.assertEqual(get_mock.call_count, 2)
+        self.assertQuerysetEqual(
+            Invoice.objects.order_by('number', 'payments').values_list('number', 'remote_id', 'payments'), [
+                ('INV41', 99, payments[0].pk),
+                ('INV41', 99, payments[1].pk),
+                ('INV41', 99, payments[2].pk),
+                ('INV42', 42, payments[0].pk),
+                ('INV42', 42, payments[1].pk),
+                ('INV42', 42, payments[2].pk),
+            ], transform=tuple)
+        self.log_handler.check(
+            ('fred_pain.processors', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-000000000000 accepted. 2 invoices attached.'),
+            ('fred_pain.processors', 'ERROR', 'Invoice number INV41 already exists with id=99 (received id=41)'),
+            ('fred_pain.processors', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-000000000001 accepted. 2 invoices attached.'),
+            ('fred_pain.processors', 'ERROR', 'Invoice number INV41 already exists with id=99 (received id=41)'),
+            ('fred_pain.processors', 'ERROR',
+             'Advance invoice number INV42 is already associated with different payment.'),
+            ('fred_pain.processors', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-000000000002 accepted. 2 invoices attached.'),
+            ('fred_pain.processors', 'ERROR', 'Invoice number INV41 already exists with id=99 (received id=41)'),
+            ('fred_pain.processors', 'ERROR',
+             'Advance invoice number INV42 is already associated with different payment.'),
+        )
+
+    def test_process_payments_invoice_index_flush(self, corba_mock):
+        """Test process_payments stores links of invoices before the result is yielded."""
+        payments = self._create_payments(2)
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+        ACCOUNTING.import_payment.return_value = (
+            [Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.account),
+             Accounting.InvoiceReference(id=43, number='INV43', type=Accounting.InvoiceType.account)],
+            Accounting.Credit(value='42'))
+
+        results = iter(self.processor.process_payments(payments))
+        self.assertEqual(next(results), ProcessPaymentResult(True))
+        self.assertEqual(Invoice.payments.through.objects.count(), 2)
+        self.assertEqual(Client.objects.count(), 1)
+
+    @override_settings(FRED_PAIN_BATCH_SIZE=10)
+    def test_process_payments_batch_queries(self, corba_mock):
+        """Test process_payments stores a batch in constant number of queries."""
+        payments = self._create_payments(5)
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+        ACCOUNTING.import_payment.side_effect = [
+            ([Accounting.InvoiceReference(id=i, number='INV{}'.format(i), type=Accounting.InvoiceType.advance)],
+             Accounting.Credit(value='42')) for i in range(5)]
+
+        # Savepoint, clients, invoice lookup, invoices, links and savepoint release.
+        queries = 6
+        # Django < 3.0 uses different name of the feature.
+        if not getattr(connection.features, 'can_return_rows_from_bulk_insert',
+                       getattr(connection.features, 'can_return_ids_from_bulk_insert', False)):
+            # Primary keys of created invoices
+            queries += 1
+        with self.assertNumQueries(queries):
+            self.assertEqual(list(self.processor.process_payments(payments)), [ProcessPaymentResult(True)] * 5)
+        self.assertEqual(Invoice.payments.through.objects.count(), 5)
+
+    @override_settings(FRED_PAIN_BATCH_SIZE=2)
+    def test_process_payments_batch_integrity_error(self, corba_mock):
+        """Test process_payments stores payments one by one if bulk save fails."""
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+        ACCOUNTING.import_payment.return_value = (
+            [Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.account)],
+            Accounting.Credit(value='42'))
+
+        with patch.object(FredPaymentProcessor, '_bulk_save', side_effect=IntegrityError):
+            self.assertEqual(list(self.processor.process_payments([self.payment])), [ProcessPaymentResult(True)])
+
+        self.assertQuerysetEqual(Invoice.objects.values_list('number', 'payments'), [('INV42', self.payment.pk)],
+                                 transform=tuple)
+        self.log_handler.check(
+            ('fred_pain.processors', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-000000000000 accepted. 1 invoices attached.'),
+            ('fred_pain.processors', 'INFO', 'Bulk save of 1 payments failed, storing them one by one.'),
+        )
+
+    def _reject_payment(self, payment):
+        """Reject payment after encoding its bank account like the recoder does."""
+        payment.account.account_number
+        raise Accounting.REGISTRAR_NOT_FOUND
+
+    @override_settings(FRED_PAIN_QUERY_CHUNK_SIZE=2)
+    def test_process_payments_queryset(self, corba_mock):
+        """Test process_payments evaluates queryset as the caller does."""
+        self._create_payments(5)
+        ACCOUNTING.get_registrar_by_payment.side_effect = self._reject_payment
+        payments = BankPayment.objects.order_by('pk')
+
+        # Payments and bank accounts for each chunk of payments
+        with self.assertNumQueries(4):
+            results = list(self.processor.process_payments(payments))
+        self.assertEqual(results, [ProcessPaymentResult(False)] * 5)
+        # Caller gets the same instances the results belong to.
+        with self.assertNumQueries(0):
+            self.assertEqual(len(list(payments)), 5)
+
+    @override_settings(FRED_PAIN_QUERY_CHUNK_SIZE=2)
+    def test_process_payments_tied_ordering(self, corba_mock):
+        """Test process_payments sends payments of queryset with tied ordering in the caller's order."""
+        self._create_payments(5)
+        sent = []
+
+        def reject(payment):
+            sent.append(payment.uuid)
+            self._reject_payment(payment)
+
+        ACCOUNTING.get_registrar_by_payment.side_effect = reject
+        payments = BankPayment.objects.order_by('transaction_date')
+
+        results = list(self.processor.process_payments(payments))
+
+        self.assertEqual(results, [ProcessPaymentResult(False)] * 5)
+        with self.assertNumQueries(0):
+            self.assertEqual(sent, [payment.uuid for payment in payments])
+
+    @override_settings(FRED_PAIN_QUERY_CHUNK_SIZE=2)
+    def test_process_payments_evaluated_queryset(self, corba_mock):
+        """Test process_payments fetches bank accounts of evaluated queryset in chunks."""
+        self._create_payments(5)
+        ACCOUNTING.get_registrar_by_payment.side_effect = self._reject_payment
+        payments = BankPayment.objects.all()
+        list(payments)
+
+        # Bank accounts for each chunk of payments
+        with self.assertNumQueries(3):
+            results = list(self.processor.process_payments(payments))
+        self.assertEqual(results, [ProcessPaymentResult(False)] * 5)
+
+    @override_settings(FRED_PAIN_QUERY_CHUNK_SIZE=2, FRED_PAIN_PROCESSING_THREADS=2)
+    def test_process_payments_list(self, corba_mock):
+        """Test process_payments fetches bank accounts of payments in chunks."""
+        self._create_payments(5)
+        ACCOUNTING.get_registrar_by_payment.side_effect = self._reject_payment
+        payments = list(BankPayment.objects.all())
+
+        # Bank accounts for each chunk of payments
+        with self.assertNumQueries(3):
+            results = list(self.processor.process_payments(payments))
+        self.assertEqual(results, [ProcessPaymentResult(False)] * 5)
+
+    def _run_with_deadline(self, corba_mock, payments):
+        """Process payments with registrar lookups taking 6 seconds each through the timeout client."""
+        clock = Mock(return_value=0)
+
+        def get_registrar_by_payment(payment):
+            clock.return_value += 6
+            return (get_registrar(handle='REG-BBT', id=1), 'CZ')
+
+        corba_mock.get_registrar_by_payment.side_effect = get_registrar_by_payment
+        corba_mock.import_payment.return_value = ([], Accounting.Credit(value='42'))
+        with patch('fred_pain.timeout.monotonic', clock):
+            with patch.object(ACCOUNTING, 'client', TimeoutClient(corba_mock, TRANSPORT_ERRORS, INTERRUPTIBLE_METHODS)):
+                return list(self.processor.process_payments(payments))
+
+    @override_settings(FRED_PAIN_PROCESSING_DEADLINE=10)
+    def test_process_payments_deadline(self, corba_mock):
+        """Test process_payments stops sending payments when the deadline expires."""
+        payments = self._create_payments(3)
+        DEADLINE_EXPIRATIONS.reset()
+
+        # Second payment isn't imported, since the deadline expires during its registrar lookup.
+        self.assertEqual(self._run_with_deadline(corba_mock, payments), [ProcessPaymentResult(True)])
+        self.assertEqual(corba_mock.get_registrar_by_payment.call_count, 2)
+        self.assertEqual(corba_mock.import_payment.call_count, 1)
+        self.assertEqual(list(Client.objects.values_list('payment', flat=True)), [payments[0].pk])
+        self.assertEqual(DEADLINE_EXPIRATIONS.get(), 1)
+        self.assertIn(('fred_pain.processors', 'WARNING',
+                       'Payment 00000000-0000-0000-0000-000000000001 is left for the next processing '
+                       '(deadline expired).'),
+                      self.log_handler.actual())
+        self.assertIn(('fred_pain.processors', 'WARNING',
+                       'Processing deadline expired, remaining payments are left for the next processing.'),
+                      self.log_handler.actual())
+
+    @override_settings(FRED_PAIN_PROCESSING_DEADLINE=10, FRED_PAIN_PROCESSING_THREADS=2, FRED_PAIN_BATCH_SIZE=5)
+    def test_process_payments_deadline_threads(self, corba_mock):
+        """Test process_payments with several threads stores results of payments sent before the deadline."""
+        payments = self._create_payments(5)
+
+        results = self._run_with_deadline(corba_mock, payments)
+        self.assertLess(len(results), 5)
+        self.assertEqual(results, [ProcessPaymentResult(True)] * len(results))
+        self.assertEqual(Client.objects.filter(payment__in=payments[:len(results)]).count(), len(results))
+        self.assertEqual(Client.objects.count(), corba_mock.import_payment.call_count)
+
+    @override_settings(FRED_PAIN_PROCESSING_PROCESSES=2, FRED_PAIN_QUERY_CHUNK_SIZE=3)
+    @patch('fred_pain.processors.create_pool', SyncPool)
+    def test_process_payments_processes(self, corba_mock):
+        """Test process_payments with several processes."""
+        payments = self._create_payments(5)
+        for payment, variable_symbol in zip(payments, ('1', '2', '1', '3', '2')):
+            payment.variable_symbol = variable_symbol
+
+        def get_registrar_by_payment(payment):
+            if payment.identifier == 'PAYMENT3':
+                raise Accounting.REGISTRAR_NOT_FOUND
+            return (get_registrar(handle='REG-{}'.format(payment.variable_symbol), id=1), 'CZ')
+
+        ACCOUNTING.get_registrar_by_payment.side_effect = get_registrar_by_payment
+        ACCOUNTING.import_payment.return_value = (
+            [Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.account)],
+            Accounting.Credit(value='42'))
+
+        self.assertEqual(
+            list(self.processor.process_payments(payments)),
+            [ProcessPaymentResult(True), ProcessPaymentResult(True), ProcessPaymentResult(True),
+             ProcessPaymentResult(False), ProcessPaymentResult(True)]
+        )
+        self.assertQuerysetEqual(Client.objects.order_by('payment').values_list('handle', 'payment'), [
+            ('REG-1', payments[0].pk),
+            ('REG-2', payments[1].pk),
+            ('REG-1', payments[2].pk),
+            ('REG-2', payments[4].pk),
+        ], transform=tuple)
+        self.assertQuerysetEqual(Invoice.objects.get().payments.order_by('pk'), [
+            payments[0].pk, payments[1].pk, payments[2].pk, payments[4].pk], transform=lambda payment: payment.pk)
+
+    @override_settings(FRED_PAIN_PROCESSING_PROCESSES=2)
+    @patch('fred_pain.processors.create_pool', SyncPool)
+    @patch('fred_pain.processors.ShardLocks.acquire', side_effect=[True, False])
+    def test_process_payments_processes_locked(self, acquire_mock, corba_mock):
+        """Test process_payments with several processes leaves payments with locked shard keys."""
+        payments = self._create_payments(3)
+        ACCOUNTING.get_registrar_by_payment.side_effect = self._reject_payment
+
+        self.assertEqual(list(self.processor.process_payments(payments)), [ProcessPaymentResult(False)])
+        self.assertEqual(ACCOUNTING.get_registrar_by_payment.call_count, 1)
+        self.assertIn(('fred_pain.processors', 'WARNING', 'Payment 00000000-0000-0000-0000-000000000001 is locked, '
+                       'remaining payments are left for the next processing.'), self.log_handler.actual())
+
+    @override_settings(FRED_PAIN_PROCESSING_PROCESSES=2)
+    @patch('fred_pain.processors.create_pool', SyncPool)
+    @patch('fred_pain.processors.is_expired', side_effect=[False, True, True])
+    def test_process_payments_processes_deadline(self, expired_mock, corba_mock):
+        """Test process_payments with several processes stops sending payments when the deadline expires."""
+        payments = self._create_payments(3)
+        ACCOUNTING.get_registrar_by_payment.side_effect = self._reject_payment
+
+        self.assertEqual(list(self.processor.process_payments(payments)), [ProcessPaymentResult(False)])
+        self.assertIn(('fred_pain.processors', 'WARNING',
+                       'Processing deadline expired, remaining payments are left for the next processing.'),
+                      self.log_handler.actual())
+
+    @override_settings(FRED_PAIN_PROCESSING_PROCESSES=2)
+    @patch('fred_pain.processors.create_pool', SyncPool)
+    @patch('fred_pain.processors.get_shard', side_effect=lambda key, shards: int(key) % shards)
+    @patch('fred_pain.processors.is_expired', side_effect=[False, False, True])
+    def test_process_payments_processes_deadline_shards(self, expired_mock, shard_mock, corba_mock):
+        """Test process_payments with several processes stores responses of shards which sent later payments."""
+        payments = self._create_payments(4)
+        for payment, variable_symbol in zip(payments, ('0', '1', '0', '1')):
+            payment.variable_symbol = variable_symbol
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+        ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+
+        # Second shard stops at the deadline before its first payment.
+        self.assertEqual(list(self.processor.process_payments(payments)), [ProcessPaymentResult(True)])
+        self.assertQuerysetEqual(Client.objects.order_by('payment').values_list('payment', flat=True),
+                                 [payments[0].pk, payments[2].pk], transform=lambda pk: pk)
+        self.assertIn(('fred_pain.processors', 'WARNING',
+                       'Processing deadline expired, remaining payments are left for the next processing.'),
+                      self.log_handler.actual())
+
+    @override_settings(FRED_PAIN_OVERLAP_CALLS=True)
+    def test_process_payments_overlap(self, corba_mock):
+        """Test process_payments calls registrar lookup and import concurrently."""
+        imported = Event()
+
+        def get_registrar_by_payment(payment):
+            # Wait for the import, which would never end if the calls were sequential.
+            self.assertTrue(imported.wait(5))
+            return (get_registrar(handle='REG-BBT', id=1), 'CZ')
+
+        def import_payment(payment):
+            imported.set()
+            return ([Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.advance)],
+                    Accounting.Credit(value='42'))
+
+        ACCOUNTING.get_registrar_by_payment.side_effect = get_registrar_by_payment
+        ACCOUNTING.import_payment.side_effect = import_payment
+
+        self.assertEqual(list(self.processor.process_payments([self.payment])), [ProcessPaymentResult(True)])
+        self.assertQuerysetEqual(Client.objects.values_list('handle', 'payment'), [('REG-BBT', self.payment.pk)],
+                                 transform=tuple)
+        self.assertQuerysetEqual(Invoice.objects.values_list('number', 'payments'), [('INV42', self.payment.pk)],
+                                 transform=tuple)
+
+    @override_settings(FRED_PAIN_OVERLAP_CALLS=True)
+    def test_process_payments_overlap_errors(self, corba_mock):
+        """Test process_payments with concurrent calls maps exception of registrar lookup first."""
+        ACCOUNTING.get_registrar_by_payment.side_effect = Accounting.REGISTRAR_NOT_FOUND
+        ACCOUNTING.import_payment.side_effect = Accounting.PAYMENT_TOO_OLD
+        self.assertEqual(list(self.processor.process_payments([self.payment])), [ProcessPaymentResult(False)])
+
+        ACCOUNTING.get_registrar_by_payment.side_effect = None
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+        ACCOUNTING.import_payment.side_effect = Accounting.CREDIT_ALREADY_PROCESSED
+        self.assertEqual(list(self.processor.process_payments([self.payment])), [ProcessPaymentResult(True)])
+        self.assertFalse(Client.objects.exists())
+
+    @override_settings(FRED_PAIN_OVERLAP_CALLS=True)
+    def test_process_payments_overlap_lookup_failed(self, corba_mock):
+        """Test process_payments with concurrent calls looks up registrar of imported payment again."""
+        ACCOUNTING.get_registrar_by_payment.side_effect = [Accounting.INTERNAL_SERVER_ERROR,
+                                                           (get_registrar(handle='REG-BBT', id=1), 'CZ')]
+        ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+
+        self.assertEqual(list(self.processor.process_payments([self.payment])), [ProcessPaymentResult(True)])
+        self.assertEqual(ACCOUNTING.get_registrar_by_payment.call_count, 2)
+        self.assertQuerysetEqual(Client.objects.values_list('handle', 'payment'), [('REG-BBT', self.payment.pk)],
+                                 transform=tuple)
+        self.assertIn(('fred_pain.processors', 'WARNING', 'Payment 00000000-0000-0000-0000-000000000000 was imported, '
+                       'but lookup of its registrar failed, repeating it.'), self.log_handler.actual())
+
+    @override_settings(FRED_PAIN_OVERLAP_CALLS=True)
+    def test_process_payments_overlap_lookup_failed_again(self, corba_mock):
+        """Test process_payments with concurrent calls maps exception of the repeated lookup."""
+        ACCOUNTING.get_registrar_by_payment.side_effect = Accounting.INTERNAL_SERVER_ERROR
+        ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+
+        self.assertEqual(list(self.processor.process_payments([self.payment])), [ProcessPaymentResult(False)])
+        self.assertEqual(ACCOUNTING.get_registrar_by_payment.call_count, 2)
+        self.assertFalse(Client.objects.exists())
+        self.assertIn(('fred_pain.processors', 'ERROR', 'Payment 00000000-0000-0000-0000-000000000000 was imported, '
+                       'but its registrar could not be looked up.'), self.log_handler.actual())
+
+    @override_settings(FRED_PAIN_OVERLAP_CALLS=True)
+    def test_assign_payment_overlap(self, corba_mock):
+        """Test assign_payment imports payment to the handle returned by the lookup despite overlapping."""
+        ACCOUNTING.get_registrar_by_handle_and_payment.return_value = (get_registrar(handle='REG-BBT'), 'CZ')
+        ACCOUNTING.import_payment_by_registrar_handle.return_value = ([], Accounting.Credit(value='42'))
+
+        self.assertEqual(self.processor.assign_payment(self.payment, 'reg-bbt', date(2018, 1, 2)),
+                         ProcessPaymentResult(True))
+        ACCOUNTING.get_registrar_by_handle_and_payment.assert_called_once_with('reg-bbt', self.payment)
+        ACCOUNTING.import_payment_by_registrar_handle.assert_called_once_with(self.payment, 'REG-BBT',
+                                                                              date(2018, 1, 2))
+
+    @override_settings(FRED_PAIN_OVERLAP_CALLS=True)
+    def test_assign_payment_overlap_invalid_tax_date(self, corba_mock):
+        """Test assign_payment with overlapping raises exception of the import."""
+        ACCOUNTING.get_registrar_by_handle_and_payment.return_value = (get_registrar(handle='REG-BBT'), 'CZ')
+        ACCOUNTING.import_payment_by_registrar_handle.side_effect = Accounting.INVALID_TAX_DATE_VALUE
+
+        with self.assertRaises(InvalidTaxDateError):
+            self.processor.assign_payment(self.payment, 'REG-BBT', date(2018, 1, 2))
+
+    def test_lanes(self, corba_mock):
+        """Test only manually assigned payments are sent in the interactive lane."""
+        for options in ({}, {'FRED_PAIN_OVERLAP_CALLS': True}):
+            lanes = []
+
+            def record_lane(*args):
+                lanes.append(get_call_lane())
+                return DEFAULT
+
+            ACCOUNTING.get_registrar_by_payment.side_effect = record_lane
+            ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+            ACCOUNTING.import_payment.side_effect = record_lane
+            ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+            ACCOUNTING.get_registrar_by_handle_and_payment.side_effect = record_lane
+            ACCOUNTING.get_registrar_by_handle_and_payment.return_value = (get_registrar(handle='REG-BBT'), 'CZ')
+            ACCOUNTING.import_payment_by_registrar_handle.side_effect = record_lane
+            ACCOUNTING.import_payment_by_registrar_handle.return_value = ([], Accounting.Credit(value='42'))
+            with self.subTest(**options), override_settings(**options):
+                list(self.processor.process_payments([self.payment]))
+                Client.objects.all().delete()
+                self.processor.assign_payment(self.payment, 'REG-BBT')
+                Client.objects.all().delete()
+                self.assertEqual(lanes, [BATCH, BATCH, INTERACTIVE, INTERACTIVE])
+
+    def _run_traced(self, payments):
+        traced = []
+
+        def call(payment):
+            trace = cast(PaymentTrace, get_trace())
+            traced.append(trace.uuid)
+            trace.add('corba', 1)
+            return DEFAULT
+
+        ACCOUNTING.get_registrar_by_payment.side_effect = call
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(), 'CZ')
+        ACCOUNTING.import_payment.side_effect = call
+        ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+        with LogCapture('fred_pain.tracing', propagate=False) as log_handler:
+            self.assertEqual(list(self.processor.process_payments(payments)), [ProcessPaymentResult(True)] * 2)
+        self.assertEqual(sorted(traced), [str(payment.uuid) for payment in payments for i in range(2)])
+        record, = log_handler.records
+        self.assertRegex(record.getMessage(), r'^Traced 2 payments in [0-9.]+ s \(corba 4\.000 s, recoding 0\.000 s, ')
+
+    @override_settings(FRED_PAIN_TRACING=True)
+    def test_process_payments_tracing(self, corba_mock):
+        """Test process_payments records traces of payments."""
+        for options in ({}, {'FRED_PAIN_PROCESSING_THREADS': 2}, {'FRED_PAIN_OVERLAP_CALLS': True},
+                        {'FRED_PAIN_BATCH_SIZE': 2}):
+            with self.subTest(options=options):
+                payments = self._create_payments(2)
+                with override_settings(**options):
+                    self._run_traced(payments)
+                Client.objects.all().delete()
+                BankPayment.objects.exclude(pk=self.payment.pk).delete()
+
+    @override_settings(FRED_PAIN_TRACING=True, FRED_PAIN_PROCESSING_PROCESSES=2)
+    @patch('fred_pain.processors.create_pool', SyncPool)
+    def test_process_payments_tracing_processes(self, corba_mock):
+        """Test process_payments merges traces of payments from worker processes."""
+        self._run_traced(self._create_payments(2))
+
+    @override_settings(FRED_PAIN_JOURNAL_DATABASE='default')
+    def test_process_payments_journal(self, corba_mock):
+        """Test process_payments records responses in the payment journal."""
+        payments = self._create_payments(3)
+
+        def get_registrar_by_payment(payment):
+            if payment.identifier == 'PAYMENT1':
+                raise Accounting.REGISTRAR_NOT_FOUND
+            return (get_registrar(handle='REG-BBT', id=1), 'CZ')
+
+        def import_payment(payment):
+            if payment.identifier == 'PAYMENT2':
+                raise Accounting.CREDIT_ALREADY_PROCESSED
+            return ([Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.advance)],
+                    Accounting.Credit(value='42'))
+
+        ACCOUNTING.get_registrar_by_payment.side_effect = get_registrar_by_payment
+        ACCOUNTING.import_payment.side_effect = import_payment
+
+        self.assertEqual(list(self.processor.process_payments(payments)),
+                         [ProcessPaymentResult(True), ProcessPaymentResult(False), ProcessPaymentResult(True)])
+        self.assertQuerysetEqual(
+            PaymentJournal.objects.order_by('payment_uuid').values_list(
+                'payment_uuid', 'state', 'registrar_handle', 'registrar_id', 'invoices'), [
+                (UUID(int=0), PaymentJournal.CREDITED, 'REG-BBT', 1, '[[42, "INV42", "advance"]]'),
+                (UUID(int=2), PaymentJournal.ALREADY_PROCESSED, '', None, ''),
+            ], transform=tuple)
+
+    @override_settings(FRED_PAIN_JOURNAL_DATABASE='default')
+    def test_process_payments_journal_restore(self, corba_mock):
+        """Test process_payments doesn't send payments credited according to the payment journal."""
+        payments = self._create_payments(3)
+        PaymentJournal.objects.create(payment_uuid=UUID(int=0), state=PaymentJournal.CREDITED,
+                                      registrar_handle='REG-JOURNAL', registrar_id=7,
+                                      invoices='[[42, "INV42", "account"]]')
+        PaymentJournal.objects.create(payment_uuid=UUID(int=1), state=PaymentJournal.SENT)
+        PaymentJournal.objects.create(payment_uuid=UUID(int=2), state=PaymentJournal.CREDITED,
+                                      registrar_handle='REG-JOURNAL', registrar_id=7)
+        Client.objects.create(handle='REG-JOURNAL', remote_id=7, payment=payments[2])
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+        ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+
+        self.assertEqual(list(self.processor.process_payments(payments)), [ProcessPaymentResult(True)] * 3)
+        self.assertCorbaCallsEqual(corba_mock.mock_calls, [
+            call.get_registrar_by_payment(payments[1]),
+            call.import_payment(payments[1]),
+        ])
+        self.assertQuerysetEqual(Client.objects.order_by('payment').values_list('handle', 'remote_id', 'payment'), [
+            ('REG-JOURNAL', 7, payments[0].pk),
+            ('REG-BBT', 1, payments[1].pk),
+            ('REG-JOURNAL', 7, payments[2].pk),
+        ], transform=tuple)
+        self.assertQuerysetEqual(Invoice.objects.values_list('number', 'remote_id', 'invoice_type', 'payments'),
+                                 [('INV42', 42, InvoiceType.ACCOUNT, payments[0].pk)], transform=tuple)
+        self.assertEqual(PaymentJournal.objects.get(payment_uuid=UUID(int=1)).state, PaymentJournal.CREDITED)
+        self.assertIn(('fred_pain.processors', 'INFO',
+                       'Payment 00000000-0000-0000-0000-000000000000 was already imported according to journal.'),
+                      self.log_handler.actual())
+
+    @override_settings(FRED_PAIN_JOURNAL_DATABASE='default', FRED_PAIN_PROCESSING_THREADS=2)
+    def test_process_payments_journal_threads(self, corba_mock):
+        """Test process_payments with several processing threads and the payment journal."""
+        payments = self._create_payments(3)
+        PaymentJournal.objects.create(payment_uuid=UUID(int=1), state=PaymentJournal.ALREADY_PROCESSED)
+
+        def get_registrar_by_payment(payment):
+            if payment.identifier == 'PAYMENT2':
+                raise Accounting.REGISTRAR_NOT_FOUND
+            return (get_registrar(handle='REG-BBT', id=1), 'CZ')
+
+        ACCOUNTING.get_registrar_by_payment.side_effect = get_registrar_by_payment
+        ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+
+        self.assertEqual(list(self.processor.process_payments(payments)),
+                         [ProcessPaymentResult(True), ProcessPaymentResult(True), ProcessPaymentResult(False)])
+        self.assertEqual(ACCOUNTING.get_registrar_by_payment.call_count, 2)
+        self.assertQuerysetEqual(
+            PaymentJournal.objects.order_by('payment_uuid').values_list('payment_uuid', 'state'),
+            [(UUID(int=0), PaymentJournal.CREDITED), (UUID(int=1), PaymentJournal.ALREADY_PROCESSED)], transform=tuple)
+
+    @override_settings(FRED_PAIN_JOURNAL_DATABASE='default')
+    def test_assign_payment_journal(self, corba_mock):
+        """Test assign_payment doesn't send payment credited according to the payment journal."""
+        PaymentJournal.objects.create(payment_uuid=self.payment.uuid, state=PaymentJournal.ALREADY_PROCESSED)
+
+        self.assertEqual(self.processor.assign_payment(self.payment, 'REG-BBT'), ProcessPaymentResult(True))
+        self.assertCorbaCallsEqual(corba_mock.mock_calls, [])
+
     def test_assign_payment(self, corba_mock):
         """Test assign_payment method."""
         ACCOUNTING.get_registrar_by_handle_and_payment.return_value = (get_registrar(handle='REG-BBT'), 'CZ')
@@ -258,6 +925,133 @@ class TestFredPaymentProcessor(CorbaAssertMixin, TestCase):
             'SW': 'Star Wars (SW)',
             'ST': 'Star Trek (ST)',
         })
+        self.log_handler.check(
+            ('fred_pain.processors', 'WARNING', 'Registrar directory is empty, fetching registrars from FRED.'),
+        )
+
+    def test_get_client_choices_directory(self, corba_mock):
+        Registrar.objects.create(handle='SW', name='Star Wars', handle_search='sw', name_search='star wars')
+        Registrar.objects.create(handle='ST', name='Star Trek', handle_search='st', name_search='star trek')
+        self.assertEqual(self.processor.get_client_choices(), {
+            'ST': 'Star Trek (ST)',
+            'SW': 'Star Wars (SW)',
+        })
+        ACCOUNTING.get_registrar_references.assert_not_called()
+
+    def test_search_clients(self, corba_mock):
+        Registrar.objects.create(handle='SW', name='Star Wars', handle_search='sw', name_search='star wars')
+        Registrar.objects.create(handle='ST', name='Star Trek', handle_search='st', name_search='star trek')
+        self.assertEqual(self.processor.search_clients('Star W'), {'SW': 'Star Wars (SW)'})
+        ACCOUNTING.get_registrar_references.assert_not_called()
+
+
+@patch('fred_pain.corba.ACCOUNTING.client')
+class TestFredAsyncPaymentProcessor(TransactionTestCase):
+    """Test FredAsyncPaymentProcessor."""
+
+    def setUp(self):
+        """Set up common variables."""
+        self.processor = FredAsyncPaymentProcessor()
+        self.account = BankAccount(account_number='123', currency='USD')
+        self.account.save()
+        for i in range(3):
+            BankPayment(identifier='PAYMENT{}'.format(i), uuid=UUID(int=i), account=self.account,
+                        amount=Money('999.00', 'USD'), transaction_date=date(2018, 1, 1)).save()
+        self.log_handler = LogCapture('fred_pain.processors', propagate=False)
+
+    def tearDown(self):
+        self.log_handler.uninstall()
+
+    @override_settings(FRED_PAIN_ASYNC_CONCURRENCY=2)
+    def test_aprocess_payments(self, corba_mock):
+        def get_registrar_by_payment(payment):
+            if payment.identifier == 'PAYMENT1':
+                raise Accounting.PAYMENT_TOO_OLD
+            return (get_registrar(handle='REG-{}'.format(payment.identifier), id=1), 'CZ')
+
+        ACCOUNTING.get_registrar_by_payment.side_effect = get_registrar_by_payment
+        ACCOUNTING.import_payment.return_value = (
+            [Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.account)],
+            Accounting.Credit(value='42'))
+
+        self.assertEqual(
+            run(self.processor.aprocess_payments(BankPayment.objects.order_by('identifier'))),
+            [ProcessPaymentResult(True), ProcessPaymentResult(False, PaymentProcessingError.TOO_OLD),
+             ProcessPaymentResult(True)]
+        )
+        self.assertQuerysetEqual(Client.objects.order_by('handle').values_list('handle', 'payment__identifier'), [
+            ('REG-PAYMENT0', 'PAYMENT0'),
+            ('REG-PAYMENT2', 'PAYMENT2'),
+        ], transform=tuple)
+        self.assertQuerysetEqual(
+            Invoice.objects.order_by('payments__identifier').values_list('number', 'payments__identifier'),
+            [('INV42', 'PAYMENT0'), ('INV42', 'PAYMENT2')], transform=tuple)
+
+    @override_settings(FRED_PAIN_ASYNC_CONCURRENCY=1, FRED_PAIN_QUERY_CHUNK_SIZE=2)
+    def test_aprocess_payments_chunks(self, corba_mock):
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+        ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+
+        with patch.object(FredAsyncPaymentProcessor, '_load_chunk',
+                          side_effect=FredAsyncPaymentProcessor._load_chunk) as load_mock:
+            self.assertEqual(run(self.processor.aprocess_payments(BankPayment.objects.order_by('identifier'))),
+                             [ProcessPaymentResult(True)] * 3)
+        # Two chunks of payments and the empty one which ends them.
+        self.assertEqual(load_mock.call_count, 3)
+
+    @override_settings(FRED_PAIN_JOURNAL_DATABASE='default')
+    def test_aprocess_payments_journal(self, corba_mock):
+        PaymentJournal.objects.create(payment_uuid=UUID(int=1), state=PaymentJournal.CREDITED,
+                                      registrar_handle='REG-JOURNAL', registrar_id=7, invoices='[]')
+        ACCOUNTING.get_registrar_by_payment.return_value = (get_registrar(handle='REG-BBT', id=1), 'CZ')
+        ACCOUNTING.import_payment.return_value = ([], Accounting.Credit(value='42'))
+
+        self.assertEqual(run(self.processor.aprocess_payments(BankPayment.objects.order_by('identifier'))),
+                         [ProcessPaymentResult(True)] * 3)
+        self.assertEqual(ACCOUNTING.import_payment.call_count, 2)
+        self.assertQuerysetEqual(Client.objects.order_by('payment__identifier').values_list('handle', flat=True),
+                                 ['REG-BBT', 'REG-JOURNAL', 'REG-BBT'], transform=str)
+        self.assertEqual(PaymentJournal.objects.filter(state=PaymentJournal.CREDITED).count(), 3)
+
+    def test_aprocess_payments_error(self, corba_mock):
+        ACCOUNTING.get_registrar_by_payment.side_effect = ValueError('Gazorpazorp')
+
+        with self.assertRaisesRegex(ValueError, 'Gazorpazorp'):
+            run(self.processor.aprocess_payments(BankPayment.objects.all()))
+        self.assertFalse(Client.objects.exists())
+
+    def test_aassign_payment(self, corba_mock):
+        ACCOUNTING.get_registrar_by_handle_and_payment.return_value = (get_registrar(handle='REG-BBT'), 'CZ')
+        ACCOUNTING.import_payment_by_registrar_handle.return_value = ([], Accounting.Credit(value='42'))
+        payment = BankPayment.objects.get(identifier='PAYMENT0')
+
+        self.assertEqual(run(self.processor.aassign_payment(payment, 'REG-BBT', date(2019, 1, 1))),
+                         ProcessPaymentResult(True))
+        self.assertQuerysetEqual(Client.objects.values_list('handle', 'payment'), [('REG-BBT', payment.pk)],
+                                 transform=tuple)
+        self.log_handler.check(
+            ('fred_pain.processors', 'DEBUG',
+             'Manually assigning payment 00000000-0000-0000-0000-000000000000 to registrar REG-BBT.'),
+            ('fred_pain.processors', 'DEBUG',
+             'Payment 00000000-0000-0000-0000-000000000000 accepted. 0 invoices attached.'),
+        )
+
+    def test_aassign_payment_invalid_tax_date(self, corba_mock):
+        ACCOUNTING.get_registrar_by_handle_and_payment.return_value = (get_registrar(handle='REG-BBT'), 'CZ')
+        ACCOUNTING.import_payment_by_registrar_handle.side_effect = Accounting.INVALID_TAX_DATE_VALUE
+
+        with self.assertRaises(InvalidTaxDateError):
+            run(self.processor.aassign_payment(BankPayment.objects.get(identifier='PAYMENT0'), 'REG-BBT'))
+
+    def test_aget_client_choices(self, corba_mock):
+        ACCOUNTING.get_registrar_references.return_value = (
+            Accounting.RegistrarReference(handle='SW', name='Star Wars'),
+        )
+        self.assertEqual(run(self.processor.aget_client_choices()), {'SW': 'Star Wars (SW)'})
+
+    def test_asearch_clients(self, corba_mock):
+        Registrar.objects.create(handle='SW', name='Star Wars', handle_search='sw', name_search='star wars')
+        self.assertEqual(run(self.processor.asearch_clients('S', 1)), {'SW': 'Star Wars (SW)'})
 
 
 @override_settings(FRED_PAIN_DAPHNE_URL='http://example.com')
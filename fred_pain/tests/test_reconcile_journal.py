@@ -0,0 +1,74 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain_reconcile_journal command."""
+from datetime import date
+from io import StringIO
+from uuid import UUID
+
+from django.core.management import CommandError, call_command
+from django.test import TestCase, override_settings
+from django_pain.constants import InvoiceType
+from django_pain.models import BankAccount, BankPayment, Client, Invoice
+from djmoney.money import Money
+
+from fred_pain.models import PaymentJournal
+
+
+@override_settings(FRED_PAIN_JOURNAL_DATABASE='default', FRED_PAIN_QUERY_CHUNK_SIZE=2)
+class TestReconcileJournalCommand(TestCase):
+    """Test fred_pain_reconcile_journal command."""
+
+    def setUp(self):
+        account = BankAccount.objects.create(account_number='123', currency='USD')
+        self.payments = [
+            BankPayment.objects.create(identifier='PAYMENT{}'.format(i), uuid=UUID(int=i), account=account,
+                                       amount=Money('999.00', 'USD'), transaction_date=date(2018, 1, 1))
+            for i in range(3)]
+        for i in range(4):
+            PaymentJournal.objects.create(payment_uuid=UUID(int=i), state=PaymentJournal.CREDITED,
+                                          registrar_handle='REG-{}'.format(i), registrar_id=i,
+                                          invoices='[[42, "INV42", "account"]]')
+        PaymentJournal.objects.create(payment_uuid=UUID(int=4), state=PaymentJournal.SENT)
+        Client.objects.create(handle='REG-1', remote_id=1, payment=self.payments[1])
+
+    def test_reconcile(self):
+        out = StringIO()
+        call_command('fred_pain_reconcile_journal', stdout=out)
+        self.assertEqual(out.getvalue(), '2 payments backfilled.\n')
+        self.assertQuerysetEqual(Client.objects.order_by('payment').values_list('handle', 'remote_id', 'payment'), [
+            ('REG-0', 0, self.payments[0].pk),
+            ('REG-1', 1, self.payments[1].pk),
+            ('REG-2', 2, self.payments[2].pk),
+        ], transform=tuple)
+        self.assertQuerysetEqual(
+            Invoice.objects.order_by('payments').values_list('number', 'invoice_type', 'payments'),
+            [('INV42', InvoiceType.ACCOUNT, self.payments[0].pk), ('INV42', InvoiceType.ACCOUNT, self.payments[2].pk)],
+            transform=tuple)
+
+    def test_reconcile_dry_run(self):
+        out = StringIO()
+        call_command('fred_pain_reconcile_journal', '--dry-run', stdout=out)
+        self.assertEqual(out.getvalue(), '2 payments would be backfilled.\n')
+        self.assertEqual(Client.objects.count(), 1)
+        self.assertFalse(Invoice.objects.exists())
+
+    @override_settings(FRED_PAIN_JOURNAL_DATABASE=None)
+    def test_not_configured(self):
+        with self.assertRaisesRegex(CommandError, 'FRED_PAIN_JOURNAL_DATABASE is not set'):
+            call_command('fred_pain_reconcile_journal')
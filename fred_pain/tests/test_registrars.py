@@ -0,0 +1,133 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain registrar directory."""
+from unittest.mock import patch
+
+from django.test import TestCase, override_settings
+from fred_idl.Registry import Accounting
+from testfixtures import LogCapture
+
+from fred_pain.cache import RegistrarReference
+from fred_pain.corba import ACCOUNTING
+from fred_pain.models import Registrar
+from fred_pain.registrars import SyncResult, get_registrar_choices, search_registrars, sync_registrars
+
+
+def create_registrar(handle, name):
+    return Registrar.objects.create(handle=handle, name=name, handle_search=handle.lower(), name_search=name.lower())
+
+
+@override_settings(FRED_PAIN_QUERY_CHUNK_SIZE=1)
+class TestSyncRegistrars(TestCase):
+    """Test sync_registrars function."""
+
+    def setUp(self):
+        create_registrar('SW', 'Star Wars')
+        create_registrar('ST', 'Star Trek')
+        create_registrar('BG', 'Battlestar Galactica')
+        self.references = [RegistrarReference('SW', 'Star Wars'), RegistrarReference('ST', 'Star Trek: Voyager'),
+                           RegistrarReference('B5', 'Babylon 5'), RegistrarReference('FF', 'Firefly')]
+        self.log_handler = LogCapture('fred_pain.registrars', propagate=False)
+
+    def tearDown(self):
+        self.log_handler.uninstall()
+
+    def test_sync(self):
+        update_time = Registrar.objects.get(handle='SW').update_time
+        self.assertEqual(sync_registrars(self.references), SyncResult(created=2, updated=1, deleted=1))
+        self.assertQuerysetEqual(
+            Registrar.objects.order_by('handle').values_list('handle', 'name', 'handle_search', 'name_search'), [
+                ('B5', 'Babylon 5', 'b5', 'babylon 5'),
+                ('FF', 'Firefly', 'ff', 'firefly'),
+                ('ST', 'Star Trek: Voyager', 'st', 'star trek: voyager'),
+                ('SW', 'Star Wars', 'sw', 'star wars'),
+            ], transform=tuple)
+        self.assertEqual(Registrar.objects.get(handle='SW').update_time, update_time)
+        self.assertGreater(Registrar.objects.get(handle='ST').update_time, update_time)
+        self.log_handler.check(
+            ('fred_pain.registrars', 'INFO', 'Registrars synchronized: 2 created, 1 updated, 1 deleted.'),
+        )
+
+    def test_sync_unchanged(self):
+        sync_registrars(self.references)
+        # Only the registrars are selected within the transaction.
+        with self.assertNumQueries(3):
+            self.assertEqual(sync_registrars(self.references), SyncResult(created=0, updated=0, deleted=0))
+
+    def test_sync_dry_run(self):
+        self.assertEqual(sync_registrars(self.references, dry_run=True), SyncResult(created=2, updated=1, deleted=1))
+        self.assertQuerysetEqual(Registrar.objects.order_by('handle').values_list('handle', 'name'), [
+            ('BG', 'Battlestar Galactica'),
+            ('ST', 'Star Trek'),
+            ('SW', 'Star Wars'),
+        ], transform=tuple)
+        self.log_handler.check()
+
+    def test_sync_dry_run_no_lock(self):
+        with patch.object(Registrar.objects, 'select_for_update') as select_mock:
+            sync_registrars(self.references, dry_run=True)
+        select_mock.assert_not_called()
+
+    @patch('fred_pain.corba.ACCOUNTING.client')
+    def test_sync_fetch(self, corba_mock):
+        ACCOUNTING.get_registrar_references.return_value = (
+            Accounting.RegistrarReference(handle='SW', name='Star Wars'),
+        )
+        self.assertEqual(sync_registrars(), SyncResult(created=0, updated=0, deleted=2))
+        self.assertQuerysetEqual(Registrar.objects.values_list('handle', flat=True), ['SW'], transform=str)
+
+
+class TestSearchRegistrars(TestCase):
+    """Test search_registrars function."""
+
+    def setUp(self):
+        create_registrar('REG-SW', 'Star Wars')
+        create_registrar('REG-ST', 'Star Trek')
+        create_registrar('REG-BG', 'Battlestar Galactica')
+        create_registrar('STARGATE', 'Stargate')
+
+    def _search(self, query, limit=20):
+        return [registrar.handle for registrar in search_registrars(query, limit)]
+
+    def test_prefix(self):
+        self.assertEqual(self._search('reg-s'), ['REG-ST', 'REG-SW'])
+
+    def test_name_prefix(self):
+        self.assertEqual(self._search(' Star'), ['REG-ST', 'REG-SW', 'STARGATE'])
+
+    def test_substring(self):
+        # Substrings are not matched, they can't be found by the indexes.
+        self.assertEqual(self._search('TAR'), [])
+
+    def test_limit(self):
+        self.assertEqual(self._search('star', 2), ['REG-ST', 'REG-SW'])
+
+    def test_empty(self):
+        self.assertEqual(self._search('', 3), ['REG-BG', 'REG-ST', 'REG-SW'])
+
+    def test_no_match(self):
+        self.assertEqual(self._search('firefly'), [])
+
+
+class TestGetRegistrarChoices(TestCase):
+    """Test get_registrar_choices function."""
+
+    def test_choices(self):
+        registrars = [create_registrar('SW', 'Star Wars'), create_registrar('ST', 'Star Trek')]
+        self.assertEqual(get_registrar_choices(registrars), {'SW': 'Star Wars (SW)', 'ST': 'Star Trek (ST)'})
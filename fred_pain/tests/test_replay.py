@@ -0,0 +1,188 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain recording and replay of CORBA calls."""
+import json
+import os
+import shutil
+import tempfile
+from datetime import date, datetime
+from unittest.mock import Mock, call, patch, sentinel
+from uuid import UUID
+
+from django.test import SimpleTestCase, override_settings
+from django_pain.models import BankAccount, BankPayment
+from djmoney.money import Money
+from fred_idl.Registry import Accounting
+from omniORB import CORBA
+from pytz import utc
+from testfixtures import LogCapture
+
+from fred_pain.corba import AccountingCorbaRecoder
+from fred_pain.replay import RecordingClient, ReplayClient, decode_value, encode_value, load_records
+
+from .test_corba import get_registrar, struct_values
+
+
+def get_payment(uuid=0, variable_symbol='42'):
+    account = BankAccount(account_number='123456/7890', currency='CZK')
+    return BankPayment(identifier='PAYMENT', uuid=UUID(int=uuid), account=account, amount=Money('999.00', 'CZK'),
+                       variable_symbol=variable_symbol, transaction_date=date(2018, 1, 1),
+                       create_time=datetime(2018, 1, 2, tzinfo=utc))
+
+
+class TestEncodeValue(SimpleTestCase):
+    """Test encode_value and decode_value functions."""
+
+    def assertRoundTrip(self, value):
+        data = encode_value(value)
+        # Data survive JSON serialization.
+        data = json.loads(json.dumps(data))
+        self.assertEqual(struct_values(decode_value(data)), struct_values(value))
+
+    def test_plain(self):
+        for value in (None, True, 42, 4.2, 'string', [1, 'two'], date(2018, 1, 1),
+                      datetime(2018, 1, 1, 12, 30, tzinfo=utc)):
+            with self.subTest(value=value):
+                self.assertRoundTrip(value)
+
+    def test_tuple(self):
+        self.assertEqual(encode_value((1, 'two')), {'t': [1, 'two']})
+        self.assertRoundTrip((1, 'two'))
+
+    def test_struct(self):
+        self.assertRoundTrip((get_registrar(), 'CZ'))
+        self.assertRoundTrip(([Accounting.InvoiceReference(id=42, number='INV42', type=Accounting.InvoiceType.advance)],
+                              Accounting.Credit(value='42')))
+
+    def test_exception(self):
+        self.assertIsInstance(decode_value(encode_value(Accounting.REGISTRAR_NOT_FOUND())),
+                              Accounting.REGISTRAR_NOT_FOUND)
+        error = decode_value(json.loads(json.dumps(encode_value(CORBA.TRANSIENT(3, CORBA.COMPLETED_MAYBE)))))
+        self.assertIsInstance(error, CORBA.TRANSIENT)
+        self.assertEqual(error.minor, 3)
+        self.assertEqual(error.completed, CORBA.COMPLETED_MAYBE)
+
+    def test_default(self):
+        self.assertEqual(encode_value([sentinel.value], lambda value: 'default'), ['default'])
+
+    def test_unknown(self):
+        with self.assertRaisesMessage(TypeError, 'Value of type object can not be encoded.'):
+            encode_value(object())
+
+
+class TestRecordingClient(SimpleTestCase):
+    """Test RecordingClient."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.tmp_dir)
+        self.path = os.path.join(self.tmp_dir, 'calls.jsonl')
+        self.client_mock = Mock()
+        self.client = RecordingClient(self.client_mock, AccountingCorbaRecoder._encode_bankpayment)
+        self.log_handler = LogCapture('fred_pain.replay', propagate=False)
+        self.addCleanup(self.log_handler.uninstall)
+
+    def test_disabled(self):
+        self.client_mock.get_registrar_references.return_value = sentinel.result
+        self.assertEqual(self.client.get_registrar_references(), sentinel.result)
+        self.assertFalse(os.path.exists(self.path))
+
+    @patch('fred_pain.replay.monotonic', side_effect=[10, 10.5, 20, 20.25])
+    def test_record(self, monotonic_mock):
+        self.client_mock.get_registrar_by_payment.side_effect = [(get_registrar(), 'CZ'),
+                                                                 Accounting.REGISTRAR_NOT_FOUND()]
+        payment = get_payment()
+        with override_settings(FRED_PAIN_CORBA_RECORD_FILE=self.path):
+            self.assertEqual(struct_values(self.client.get_registrar_by_payment(payment)),
+                             struct_values((get_registrar(), 'CZ')))
+            with self.assertRaises(Accounting.REGISTRAR_NOT_FOUND):
+                self.client.get_registrar_by_payment(payment)
+
+        first, second = load_records(self.path)
+        self.assertEqual(first['m'], 'get_registrar_by_payment')
+        self.assertEqual(first['a'][0]['s'], 'PaymentData')
+        self.assertEqual(first['a'][0]['f']['uuid'], payment.uuid.hex)
+        self.assertEqual(first['l'], 0.5)
+        self.assertEqual(struct_values(decode_value(first['r'])), struct_values((get_registrar(), 'CZ')))
+        self.assertNotIn('x', first)
+        self.assertEqual(second['l'], 0.25)
+        self.assertIsInstance(decode_value(second['x']), Accounting.REGISTRAR_NOT_FOUND)
+        self.assertNotIn('r', second)
+        self.log_handler.check()
+
+    def test_record_failed(self):
+        # Result can't be encoded.
+        self.client_mock.get_registrar_references.return_value = sentinel.result
+        with override_settings(FRED_PAIN_CORBA_RECORD_FILE=self.path):
+            self.assertEqual(self.client.get_registrar_references(), sentinel.result)
+        self.assertFalse(os.path.exists(self.path))
+        self.log_handler.check(
+            ('fred_pain.replay', 'ERROR', 'Call of get_registrar_references could not be recorded.'),
+        )
+
+
+@patch('fred_pain.replay.sleep')
+class TestReplayClient(SimpleTestCase):
+    """Test ReplayClient."""
+
+    def setUp(self):
+        self.records = [
+            {'m': 'get_registrar_by_payment', 'a': [encode_value(get_payment(1), self.encode)], 'l': 0.5,
+             'r': encode_value((get_registrar(), 'CZ'))},
+            {'m': 'get_registrar_by_payment', 'a': [encode_value(get_payment(2), self.encode)], 'l': 0.25,
+             'x': encode_value(Accounting.REGISTRAR_NOT_FOUND())},
+            {'m': 'get_registrar_references', 'a': [], 'l': 1, 'r': []},
+        ]
+
+    @staticmethod
+    def encode(payment):
+        return AccountingCorbaRecoder._encode_bankpayment(payment)
+
+    def test_match(self, sleep_mock):
+        client = ReplayClient(self.records, default=self.encode)
+        with self.assertRaises(Accounting.REGISTRAR_NOT_FOUND):
+            client.get_registrar_by_payment(get_payment(2))
+        self.assertEqual(struct_values(client.get_registrar_by_payment(get_payment(1))),
+                         struct_values((get_registrar(), 'CZ')))
+        with self.assertRaises(Accounting.REGISTRAR_NOT_FOUND):
+            client.get_registrar_by_payment(get_payment(2))
+        self.assertEqual(client.calls, 3)
+        self.assertEqual(sleep_mock.mock_calls, [call(0.25), call(0.5), call(0.25)])
+
+    def test_order(self, sleep_mock):
+        client = ReplayClient(self.records, default=self.encode)
+        self.assertEqual(struct_values(client.get_registrar_by_payment(get_payment(3))),
+                         struct_values((get_registrar(), 'CZ')))
+        with self.assertRaises(Accounting.REGISTRAR_NOT_FOUND):
+            client.get_registrar_by_payment(get_payment(4))
+        self.assertEqual(struct_values(client.get_registrar_by_payment(get_payment(5))),
+                         struct_values((get_registrar(), 'CZ')))
+        self.assertEqual(client.get_registrar_references(), [])
+
+    def test_time_scale(self, sleep_mock):
+        client = ReplayClient(self.records, time_scale=0.1)
+        client.get_registrar_references()
+        client = ReplayClient(self.records, time_scale=0)
+        client.get_registrar_references()
+        self.assertEqual(sleep_mock.mock_calls, [call(0.1)])
+
+    def test_unknown_method(self, sleep_mock):
+        client = ReplayClient(self.records, default=self.encode)
+        with self.assertRaisesMessage(LookupError, 'There are no recorded calls of import_payment.'):
+            client.import_payment(get_payment(1))
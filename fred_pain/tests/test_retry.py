@@ -0,0 +1,125 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain retries of CORBA calls."""
+from unittest.mock import Mock, call, patch, sentinel
+
+from django.test import SimpleTestCase, override_settings
+from omniORB import CORBA
+from testfixtures import LogCapture
+
+from fred_pain.retry import RETRIES, RETRIES_EXHAUSTED, RetryClient, get_backoff
+from fred_pain.timeout import call_deadline
+
+
+def transient():
+    return CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)
+
+
+class TestGetBackoff(SimpleTestCase):
+    """Test get_backoff function."""
+
+    @override_settings(FRED_PAIN_CORBA_RETRY_BACKOFF=0.5)
+    @patch('fred_pain.retry.random.uniform', return_value=sentinel.delay)
+    def test_backoff(self, uniform_mock):
+        self.assertEqual(get_backoff(0), sentinel.delay)
+        self.assertEqual(get_backoff(3), sentinel.delay)
+        self.assertEqual(uniform_mock.mock_calls, [call(0, 0.5), call(0, 4)])
+
+    def test_random(self):
+        for attempt in range(5):
+            self.assertLessEqual(0, get_backoff(attempt))
+            self.assertLessEqual(get_backoff(attempt), 0.1 * 2 ** attempt)
+
+
+@override_settings(FRED_PAIN_CORBA_RETRIES=2)
+@patch('fred_pain.retry.sleep')
+@patch('fred_pain.retry.get_backoff', side_effect=lambda attempt: 0.25 * (attempt + 1))
+@patch('fred_pain.retry.monotonic', return_value=100)
+class TestRetryClient(SimpleTestCase):
+    """Test RetryClient."""
+
+    def setUp(self):
+        RETRIES.reset()
+        RETRIES_EXHAUSTED.reset()
+        self.client = Mock()
+        self.wrapper = RetryClient(self.client, (CORBA.TRANSIENT, CORBA.COMM_FAILURE), ('method', ))
+        self.log_handler = LogCapture('fred_pain.retry', propagate=False)
+        self.addCleanup(self.log_handler.uninstall)
+
+    def test_success(self, monotonic_mock, backoff_mock, sleep_mock):
+        self.client.method.return_value = sentinel.result
+        self.assertEqual(self.wrapper.method(sentinel.arg), sentinel.result)
+        self.client.method.assert_called_once_with(sentinel.arg)
+        sleep_mock.assert_not_called()
+        self.log_handler.check()
+
+    def test_retry(self, monotonic_mock, backoff_mock, sleep_mock):
+        self.client.method.side_effect = [transient(), CORBA.COMM_FAILURE(), sentinel.result]
+        self.assertEqual(self.wrapper.method(sentinel.arg), sentinel.result)
+        self.assertEqual(self.client.method.mock_calls, [call(sentinel.arg)] * 3)
+        self.assertEqual(sleep_mock.mock_calls, [call(0.25), call(0.5)])
+        self.assertEqual(RETRIES.get('method'), 2)
+        self.assertEqual(RETRIES_EXHAUSTED.get('method'), 0)
+        self.log_handler.check(
+            ('fred_pain.retry', 'INFO', 'Call of method failed with TRANSIENT, retrying in 0.250 s.'),
+            ('fred_pain.retry', 'INFO', 'Call of method failed with COMM_FAILURE, retrying in 0.500 s.'),
+        )
+
+    def test_exhausted(self, monotonic_mock, backoff_mock, sleep_mock):
+        self.client.method.side_effect = transient()
+        with self.assertRaises(CORBA.TRANSIENT):
+            self.wrapper.method()
+        self.assertEqual(self.client.method.call_count, 3)
+        self.assertEqual(RETRIES.get('method'), 2)
+        self.assertEqual(RETRIES_EXHAUSTED.get('method'), 1)
+        self.log_handler.check(
+            ('fred_pain.retry', 'INFO', 'Call of method failed with TRANSIENT, retrying in 0.250 s.'),
+            ('fred_pain.retry', 'INFO', 'Call of method failed with TRANSIENT, retrying in 0.500 s.'),
+            ('fred_pain.retry', 'WARNING', 'Call of method failed after 2 retries.'),
+        )
+
+    @override_settings(FRED_PAIN_CORBA_RETRIES=0)
+    def test_no_retries(self, monotonic_mock, backoff_mock, sleep_mock):
+        self.client.method.side_effect = transient()
+        with self.assertRaises(CORBA.TRANSIENT):
+            self.wrapper.method()
+        self.client.method.assert_called_once_with()
+        self.assertEqual(RETRIES_EXHAUSTED.get('method'), 0)
+        self.log_handler.check()
+
+    def test_not_idempotent(self, monotonic_mock, backoff_mock, sleep_mock):
+        self.client.other_method.side_effect = transient()
+        with self.assertRaises(CORBA.TRANSIENT):
+            self.wrapper.other_method()
+        self.client.other_method.assert_called_once_with()
+        sleep_mock.assert_not_called()
+
+    def test_other_error(self, monotonic_mock, backoff_mock, sleep_mock):
+        self.client.method.side_effect = CORBA.BAD_PARAM()
+        with self.assertRaises(CORBA.BAD_PARAM):
+            self.wrapper.method()
+        self.client.method.assert_called_once_with()
+
+    def test_deadline(self, monotonic_mock, backoff_mock, sleep_mock):
+        self.client.method.side_effect = [transient(), transient(), sentinel.result]
+        with call_deadline(100.5):
+            with self.assertRaises(CORBA.TRANSIENT):
+                self.wrapper.method()
+        self.assertEqual(self.client.method.call_count, 2)
+        self.assertEqual(sleep_mock.mock_calls, [call(0.25)])
@@ -0,0 +1,172 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain routing of calls to replicas."""
+from unittest.mock import Mock, patch, sentinel
+
+from django.test import SimpleTestCase, override_settings
+from omniORB import CORBA
+from testfixtures import LogCapture
+
+from fred_pain.breaker import CircuitBreaker, CircuitOpenError
+from fred_pain.pool import ObjectReferencePool
+from fred_pain.routing import Endpoint, Router
+
+
+def create_endpoint(name):
+    """Return endpoint whose references return their endpoint name."""
+    ref = Mock(**{'_non_existent.return_value': False, 'get_name.return_value': name})
+    pool = ObjectReferencePool(Mock(return_value=ref), (CORBA.TRANSIENT, ))
+    return Endpoint(name, pool, CircuitBreaker(name, (CORBA.TRANSIENT, )))
+
+
+@override_settings(FRED_PAIN_CIRCUIT_BREAKER_THRESHOLD=2, FRED_PAIN_CIRCUIT_BREAKER_COOLDOWN=10)
+class TestRouter(SimpleTestCase):
+    """Test Router."""
+
+    def setUp(self):
+        self.endpoints = [create_endpoint('first'), create_endpoint('second')]
+        self.factory = Mock(return_value=self.endpoints)
+        self.router = Router(self.factory, lambda args: args[0] if args else None, sticky_size=2)
+        self.log_handler = LogCapture('fred_pain.routing', propagate=False)
+        self.breaker_log_handler = LogCapture('fred_pain.breaker', propagate=False)
+
+    def tearDown(self):
+        self.log_handler.uninstall()
+        self.breaker_log_handler.uninstall()
+
+    def _get_ref(self, index):
+        return self.endpoints[index].pool.factory.return_value
+
+    def _fail(self, index):
+        self._get_ref(index).get_name.side_effect = CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)
+
+    def test_lazy(self):
+        self.factory.assert_not_called()
+        self.assertEqual(self.router.stats(), {})
+        self.router.get_name()
+        self.router.get_name()
+        self.factory.assert_called_once_with()
+
+    def test_call(self):
+        self.assertIn(self.router.get_name(), ('first', 'second'))
+        self.assertEqual([endpoint.outstanding for endpoint in self.endpoints], [0, 0])
+        self.log_handler.check()
+
+    def test_arguments(self):
+        self.router.get_name(sentinel.key, sentinel.arg)
+        self._get_ref(1).get_name.assert_called_once_with(sentinel.key, sentinel.arg)
+
+    def test_turns(self):
+        self.assertEqual([self.router.get_name() for i in range(4)], ['second', 'first', 'second', 'first'])
+
+    def test_least_outstanding(self):
+        names = []  # type: list
+
+        def nested(*args):
+            names.extend(self.router.get_name() for i in range(2))
+            return 'second'
+
+        self._get_ref(1).get_name.side_effect = nested
+        self.assertEqual(self.router.get_name(), 'second')
+        self.assertEqual(names, ['first', 'first'])
+
+    def test_sticky(self):
+        self.assertEqual([self.router.get_name('key') for i in range(3)], ['second', 'second', 'second'])
+
+    def test_sticky_size(self):
+        self.assertEqual(self.router.get_name('key'), 'second')
+        self.assertEqual(self.router.get_name('other'), 'first')
+        self.assertEqual(self.router.get_name('key'), 'second')
+        self.router.get_name('third')
+        # The least recently used key was forgotten.
+        self.assertEqual(list(self.router._sticky), ['key', 'third'])
+
+    def test_failure(self):
+        self._fail(1)
+        with self.assertRaises(CORBA.TRANSIENT):
+            self.router.get_name('key')
+        self.assertEqual(self.endpoints[1].pool.stats(), {'idle': 0, 'in_use': 0, 'created': 1, 'discarded': 1})
+        self.assertEqual([endpoint.outstanding for endpoint in self.endpoints], [0, 0])
+        # The key is routed again.
+        self.assertEqual(self.router.get_name('key'), 'first')
+        self.log_handler.check(
+            ('fred_pain.routing', 'INFO', 'Call of get_name failed on second, discarding its references.'),
+        )
+
+    def test_other_error(self):
+        self._get_ref(1).get_name.side_effect = ValueError
+        with self.assertRaises(ValueError):
+            self.router.get_name('key')
+        self.assertEqual(self.endpoints[1].pool.stats(), {'idle': 1, 'in_use': 0, 'created': 1, 'discarded': 0})
+        self._get_ref(1).get_name.side_effect = None
+        self.assertEqual(self.router.get_name('key'), 'second')
+        self.log_handler.check()
+
+    def test_ejected(self):
+        self._fail(1)
+        for i in range(2):
+            with self.assertRaises(CORBA.TRANSIENT):
+                self.router.get_name()
+            self.assertEqual(self.router.get_name(), 'first')
+        self.assertEqual(self.router.stats()['second']['breaker']['state'], 'open')
+        self.assertEqual([self.router.get_name() for i in range(3)], ['first', 'first', 'first'])
+
+    def test_ejected_before_call(self):
+        breaker = self.endpoints[1].breaker
+        for i in range(2):
+            with self.assertRaises(CORBA.TRANSIENT):
+                breaker.call(Mock(side_effect=CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)))
+        # Breaker opens between the choice of the replica and the call.
+        with patch.object(breaker, 'available', return_value=True):
+            self.assertEqual(self.router.get_name(sentinel.key), 'first')
+            self.assertEqual(self.router.get_name(sentinel.key), 'first')
+        self.assertEqual([endpoint.outstanding for endpoint in self.endpoints], [0, 0])
+        self.log_handler.check(
+            ('fred_pain.routing', 'INFO', 'Replica second was ejected before call of get_name, choosing another one.'),
+        )
+
+    def test_all_ejected(self):
+        for endpoint in self.endpoints:
+            for i in range(2):
+                with self.assertRaises(CORBA.TRANSIENT):
+                    endpoint.breaker.call(Mock(side_effect=CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)))
+        with self.assertRaisesRegex(CircuitOpenError, 'All replicas are ejected.'):
+            self.router.get_name()
+        self.assertEqual([endpoint.outstanding for endpoint in self.endpoints], [0, 0])
+
+    def test_clear(self):
+        self.router.clear()
+        self.router.get_name()
+        self.router.get_name()
+        self.router.clear()
+        for endpoint in self.endpoints:
+            self.assertEqual(endpoint.pool.stats(), {'idle': 0, 'in_use': 0, 'created': 1, 'discarded': 1})
+
+    def test_stats(self):
+        self.router.get_name()
+        references = {'idle': 0, 'in_use': 0, 'created': 0, 'discarded': 0}
+        breaker = {'state': 'closed', 'failures': 0, 'trips': 0, 'short_circuits': 0}
+        self.assertEqual(self.router.stats(), {
+            'first': {'outstanding': 0, 'breaker': breaker, 'references': references},
+            'second': {'outstanding': 0, 'breaker': breaker, 'references': dict(references, idle=1, created=1)},
+        })
+
+    def test_private_attribute(self):
+        with self.assertRaises(AttributeError):
+            self.router._private
@@ -0,0 +1,113 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain sharding."""
+from unittest.mock import ANY, MagicMock, call, patch
+from uuid import UUID
+
+from django.core.exceptions import ValidationError
+from django.test import SimpleTestCase, override_settings
+from django_pain.models import BankPayment
+from testfixtures import LogCapture
+
+from fred_pain.settings import validate_shard_key
+from fred_pain.sharding import LOCK_NAMESPACE, ShardLocks, create_pool, get_shard, get_shard_key
+
+
+class TestShards(SimpleTestCase):
+    """Test shard functions."""
+
+    def test_get_shard_key(self):
+        payment = BankPayment(uuid=UUID(int=42), variable_symbol='1234')
+        self.assertEqual(get_shard_key(payment), '1234')
+        with override_settings(FRED_PAIN_PROCESSING_SHARD_KEY='uuid'):
+            self.assertEqual(get_shard_key(payment), '00000000-0000-0000-0000-00000000002a')
+
+    def test_get_shard(self):
+        # CRC32 of '1234' is 0x9be3e0a3.
+        self.assertEqual(get_shard('1234', 4), 3)
+        self.assertEqual(get_shard('1234', 5), 0x9be3e0a3 % 5)
+
+    def test_validate_shard_key(self):
+        validate_shard_key('uuid')
+        with self.assertRaisesRegex(ValidationError, 'Shard key must be one of variable_symbol, uuid.'):
+            validate_shard_key('identifier')
+
+
+@patch('fred_pain.sharding.multiprocessing.get_context')
+class TestCreatePool(SimpleTestCase):
+    """Test create_pool function."""
+
+    def setUp(self):
+        self.log_handler = LogCapture('fred_pain.sharding', propagate=False)
+        self.addCleanup(self.log_handler.uninstall)
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'},
+                               'shared': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+                       FRED_PAIN_REJECTED_PAYMENT_CACHE='shared')
+    def test_local_cache(self, get_context_mock):
+        create_pool(2)
+        get_context_mock.return_value.Pool.assert_called_once_with(2, initializer=ANY)
+        self.log_handler.check(
+            ('fred_pain.sharding', 'WARNING', 'Cache default set by FRED_PAIN_REGISTRAR_CACHE is local to each worker '
+                                              'process, use a shared cache backend.'))
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_shared_cache(self, get_context_mock):
+        create_pool(2)
+        self.log_handler.check()
+
+
+class TestShardLocks(SimpleTestCase):
+    """Test ShardLocks."""
+
+    def setUp(self):
+        self.connection = MagicMock(vendor='postgresql')
+        self.cursor = self.connection.cursor.return_value.__enter__.return_value
+        patcher = patch('fred_pain.sharding.connections', {'default': self.connection})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.log_handler = LogCapture('fred_pain.sharding', propagate=False)
+        self.addCleanup(self.log_handler.uninstall)
+
+    def test_acquire(self):
+        self.cursor.fetchone.return_value = (True, )
+        locks = ShardLocks()
+        self.assertTrue(locks.acquire('1234'))
+        self.assertTrue(locks.acquire('1234'))
+        locks.release()
+        self.assertEqual(self.cursor.execute.mock_calls, [
+            call('SELECT pg_try_advisory_lock(%s, %s)', [LOCK_NAMESPACE, 0x9be3e0a3 - 0x100000000]),
+            call('SELECT pg_advisory_unlock(%s, %s)', [LOCK_NAMESPACE, 0x9be3e0a3 - 0x100000000]),
+        ])
+        self.assertEqual(locks.keys, set())
+
+    def test_acquire_locked(self):
+        self.cursor.fetchone.return_value = (False, )
+        locks = ShardLocks()
+        self.assertFalse(locks.acquire('1234'))
+        locks.release()
+        self.assertEqual(len(self.cursor.execute.mock_calls), 1)
+        self.log_handler.check(('fred_pain.sharding', 'INFO', 'Shard key 1234 is locked by another process.'))
+
+    def test_other_vendor(self):
+        self.connection.vendor = 'sqlite'
+        locks = ShardLocks()
+        self.assertTrue(locks.acquire('1234'))
+        locks.release()
+        self.connection.cursor.assert_not_called()
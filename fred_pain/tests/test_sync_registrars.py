@@ -0,0 +1,58 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain_sync_registrars command."""
+from io import StringIO
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.test import TestCase
+from fred_idl.Registry import Accounting
+
+from fred_pain.corba import ACCOUNTING
+from fred_pain.models import Registrar
+
+
+@patch('fred_pain.corba.ACCOUNTING.client')
+class TestSyncRegistrarsCommand(TestCase):
+    """Test fred_pain_sync_registrars command."""
+
+    def setUp(self):
+        Registrar.objects.create(handle='BG', name='Battlestar Galactica', handle_search='bg',
+                                 name_search='battlestar galactica')
+
+    def _set_references(self):
+        ACCOUNTING.get_registrar_references.return_value = (
+            Accounting.RegistrarReference(handle='SW', name='Star Wars'),
+            Accounting.RegistrarReference(handle='ST', name='Star Trek'),
+        )
+
+    def test_sync(self, corba_mock):
+        self._set_references()
+        out = StringIO()
+        call_command('fred_pain_sync_registrars', stdout=out)
+        self.assertEqual(out.getvalue(), '2 registrars created, 0 updated and 1 deleted.\n')
+        self.assertQuerysetEqual(Registrar.objects.order_by('handle').values_list('handle', flat=True),
+                                 ['ST', 'SW'], transform=str)
+
+    def test_sync_dry_run(self, corba_mock):
+        self._set_references()
+        out = StringIO()
+        call_command('fred_pain_sync_registrars', '--dry-run', stdout=out)
+        self.assertEqual(out.getvalue(), '2 registrars would be created, 0 updated and 1 deleted.\n')
+        self.assertQuerysetEqual(Registrar.objects.values_list('handle', flat=True), ['BG'], transform=str)
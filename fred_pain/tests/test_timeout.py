@@ -0,0 +1,133 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain timeouts."""
+from unittest.mock import Mock, call, patch, sentinel
+
+from django.test import SimpleTestCase, override_settings
+from omniORB import CORBA
+
+from fred_pain.timeout import DeadlineExceeded, TimeoutClient, call_deadline, get_deadline, get_timeout, is_expired
+
+
+def transient():
+    return CORBA.TRANSIENT(0, CORBA.COMPLETED_NO)
+
+
+@patch('fred_pain.timeout.monotonic', return_value=100)
+class TestDeadline(SimpleTestCase):
+    """Test deadline functions."""
+
+    def test_get_deadline(self, monotonic_mock):
+        self.assertEqual(get_deadline(10), 110)
+        self.assertIsNone(get_deadline(0))
+
+    def test_is_expired(self, monotonic_mock):
+        self.assertFalse(is_expired(None))
+        self.assertFalse(is_expired(101))
+        self.assertTrue(is_expired(100))
+
+
+@override_settings(FRED_PAIN_CORBA_TIMEOUT=5, FRED_PAIN_CORBA_METHOD_TIMEOUTS={'slow_method': 60})
+@patch('fred_pain.timeout.omniORB.setClientThreadCallTimeout')
+@patch('fred_pain.timeout.monotonic', return_value=100)
+class TestTimeoutClient(SimpleTestCase):
+    """Test TimeoutClient."""
+
+    def setUp(self):
+        self.client = Mock()
+        self.client.method.return_value = sentinel.result
+        self.client.slow_method.return_value = sentinel.result
+        self.client.import_method.return_value = sentinel.result
+        self.wrapper = TimeoutClient(self.client, (CORBA.TRANSIENT, ), ('method', 'slow_method'))
+
+    def test_get_timeout(self, monotonic_mock, timeout_mock):
+        self.assertEqual(get_timeout('method'), 5)
+        self.assertEqual(get_timeout('slow_method'), 60)
+
+    def test_timeout(self, monotonic_mock, timeout_mock):
+        self.assertEqual(self.wrapper.method(sentinel.arg), sentinel.result)
+        self.assertEqual(self.wrapper.slow_method(), sentinel.result)
+        self.client.method.assert_called_once_with(sentinel.arg)
+        self.assertEqual(timeout_mock.mock_calls, [call(5000), call(0), call(60000), call(0)])
+
+    @override_settings(FRED_PAIN_CORBA_TIMEOUT=0, FRED_PAIN_CORBA_METHOD_TIMEOUTS={})
+    def test_no_timeout(self, monotonic_mock, timeout_mock):
+        self.assertEqual(self.wrapper.method(), sentinel.result)
+        timeout_mock.assert_not_called()
+
+    def test_deadline(self, monotonic_mock, timeout_mock):
+        with call_deadline(102.5):
+            self.assertEqual(self.wrapper.method(), sentinel.result)
+            self.assertEqual(self.wrapper.slow_method(), sentinel.result)
+        with override_settings(FRED_PAIN_CORBA_TIMEOUT=0):
+            with call_deadline(110):
+                self.assertEqual(self.wrapper.method(), sentinel.result)
+        self.assertEqual(timeout_mock.mock_calls, [call(2500), call(0), call(2500), call(0), call(10000), call(0)])
+
+    def test_deadline_nested(self, monotonic_mock, timeout_mock):
+        with call_deadline(101):
+            with call_deadline(None):
+                self.wrapper.method()
+            self.wrapper.method()
+        self.wrapper.method()
+        self.assertEqual(timeout_mock.mock_calls, [call(5000), call(0), call(1000), call(0), call(5000), call(0)])
+
+    def test_deadline_expired(self, monotonic_mock, timeout_mock):
+        with call_deadline(100):
+            with self.assertRaisesRegex(DeadlineExceeded, 'Deadline expired before call of method.'):
+                self.wrapper.method()
+        self.client.method.assert_not_called()
+        timeout_mock.assert_not_called()
+
+    def test_deadline_expired_during_call(self, monotonic_mock, timeout_mock):
+        def method():
+            monotonic_mock.return_value = 110
+            raise transient()
+
+        self.client.method.side_effect = method
+        with call_deadline(110):
+            with self.assertRaisesRegex(DeadlineExceeded, 'Deadline expired during call of method.'):
+                self.wrapper.method()
+        self.assertEqual(timeout_mock.mock_calls, [call(5000), call(0)])
+
+    def test_deadline_not_interruptible(self, monotonic_mock, timeout_mock):
+        def import_method():
+            monotonic_mock.return_value = 110
+            raise transient()
+
+        with call_deadline(102.5):
+            self.assertEqual(self.wrapper.import_method(), sentinel.result)
+        self.client.import_method.side_effect = import_method
+        with call_deadline(102.5):
+            with self.assertRaises(CORBA.TRANSIENT):
+                self.wrapper.import_method()
+        self.assertEqual(timeout_mock.mock_calls, [call(5000), call(0), call(5000), call(0)])
+
+    def test_deadline_expired_not_interruptible(self, monotonic_mock, timeout_mock):
+        with call_deadline(100):
+            with self.assertRaisesRegex(DeadlineExceeded, 'Deadline expired before call of import_method.'):
+                self.wrapper.import_method()
+        self.client.import_method.assert_not_called()
+
+    def test_error(self, monotonic_mock, timeout_mock):
+        self.client.method.side_effect = transient()
+        with call_deadline(110):
+            with self.assertRaises(CORBA.TRANSIENT):
+                self.wrapper.method()
+        self.assertEqual(timeout_mock.mock_calls, [call(5000), call(0)])
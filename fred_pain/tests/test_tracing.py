@@ -0,0 +1,164 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Test fred_pain tracing of payment processing."""
+from typing import cast
+from unittest.mock import Mock, patch, sentinel
+from uuid import UUID
+
+from django.test import SimpleTestCase, override_settings
+from django_pain.models import BankPayment
+from testfixtures import LogCapture
+
+from fred_pain.tracing import PaymentTrace, Tracer, TracingClient, get_trace, tracing
+
+
+@patch('fred_pain.tracing.monotonic', return_value=10)
+class TestPaymentTrace(SimpleTestCase):
+    """Test PaymentTrace."""
+
+    def test_breakdown(self, monotonic_mock):
+        trace = PaymentTrace('uuid')
+        trace.add('call', 3)
+        trace.add('corba', 2)
+        trace.merge({'call': 1, 'orm': 1.5})
+        monotonic_mock.return_value = 20
+        self.assertEqual(trace.breakdown(), {'wall': 10, 'corba': 2, 'recoding': 2, 'orm': 1.5, 'other': 4.5})
+        trace.end = 16
+        self.assertEqual(trace.breakdown()['wall'], 6)
+
+    def test_breakdown_concurrent(self, monotonic_mock):
+        trace = PaymentTrace('uuid')
+        trace.add('call', 8)
+        trace.add('corba', 7)
+        trace.end = 15
+        self.assertEqual(trace.breakdown(), {'wall': 5, 'corba': 7, 'recoding': 1, 'orm': 0, 'other': 0})
+
+
+@patch('fred_pain.tracing.monotonic', side_effect=[0, 10, 10.5])
+class TestTracingClient(SimpleTestCase):
+    """Test TracingClient and tracing context."""
+
+    def setUp(self):
+        self.client_mock = Mock()
+        self.client_mock.method.return_value = sentinel.result
+        self.client = TracingClient(self.client_mock, 'corba')
+
+    def test_disabled(self, monotonic_mock):
+        self.assertEqual(self.client.method(sentinel.arg), sentinel.result)
+        self.client_mock.method.assert_called_once_with(sentinel.arg)
+        monotonic_mock.assert_not_called()
+
+    def test_tracing(self, monotonic_mock):
+        trace = PaymentTrace('uuid')
+        with tracing(trace):
+            self.assertIs(get_trace(), trace)
+            self.assertEqual(self.client.method(sentinel.arg), sentinel.result)
+        self.assertIsNone(get_trace())
+        self.assertEqual(trace.durations['corba'], 0.5)
+
+    def test_tracing_error(self, monotonic_mock):
+        self.client_mock.method.side_effect = ValueError
+        trace = PaymentTrace('uuid')
+        with tracing(trace):
+            with self.assertRaises(ValueError):
+                self.client.method()
+        self.assertEqual(trace.durations['corba'], 0.5)
+
+
+@override_settings(FRED_PAIN_TRACING=True, FRED_PAIN_TRACING_SLOW_THRESHOLD=1)
+@patch('fred_pain.tracing.monotonic', return_value=10)
+class TestTracer(SimpleTestCase):
+    """Test Tracer."""
+
+    def setUp(self):
+        self.payments = [BankPayment(uuid=UUID(int=i)) for i in range(3)]
+        self.log_handler = LogCapture('fred_pain.tracing', propagate=False)
+        self.addCleanup(self.log_handler.uninstall)
+
+    @override_settings(FRED_PAIN_TRACING=False)
+    def test_disabled(self, monotonic_mock):
+        tracer = Tracer()
+        self.assertIsNone(tracer.start(self.payments[0]))
+        self.assertIsNone(tracer.get(self.payments[0]))
+        with tracer.storing(self.payments):
+            pass
+        tracer.report()
+        monotonic_mock.assert_not_called()
+        self.log_handler.check()
+
+    def test_storing(self, monotonic_mock):
+        tracer = Tracer()
+        first = cast(PaymentTrace, tracer.start(self.payments[0]))
+        second = cast(PaymentTrace, tracer.start(self.payments[1]))
+        first.add('corba', 0.5)
+        second.add('call', 0.2)
+        monotonic_mock.side_effect = [11, 12]
+        with tracer.storing(self.payments):
+            pass
+        self.assertEqual(tracer.get(self.payments[0]), first)
+        self.assertIsNone(tracer.get(self.payments[2]))
+        self.assertEqual(first.breakdown(), {'wall': 2, 'corba': 0.5, 'recoding': 0, 'orm': 0.5, 'other': 1})
+        self.assertEqual(second.breakdown(), {'wall': 2, 'corba': 0, 'recoding': 0.2, 'orm': 0.5, 'other': 1.3})
+        self.log_handler.check(
+            ('fred_pain.tracing', 'WARNING', 'Payment 00000000-0000-0000-0000-000000000000 took 2.000 s '
+                                             '(corba 0.500 s, recoding 0.000 s, orm 0.500 s, other 1.000 s).'),
+            ('fred_pain.tracing', 'WARNING', 'Payment 00000000-0000-0000-0000-000000000001 took 2.000 s '
+                                             '(corba 0.000 s, recoding 0.200 s, orm 0.500 s, other 1.300 s).'),
+        )
+
+    def test_storing_fast(self, monotonic_mock):
+        tracer = Tracer()
+        tracer.start(self.payments[0])
+        with tracer.storing(self.payments):
+            pass
+        self.log_handler.check()
+
+    @override_settings(FRED_PAIN_TRACING_SLOW_THRESHOLD=0)
+    def test_storing_no_threshold(self, monotonic_mock):
+        tracer = Tracer()
+        tracer.start(self.payments[0])
+        monotonic_mock.return_value = 100
+        with tracer.storing(self.payments):
+            pass
+        self.log_handler.check()
+
+    @override_settings(FRED_PAIN_TRACING_SLOW_THRESHOLD=0)
+    def test_report(self, monotonic_mock):
+        tracer = Tracer()
+        for payment in self.payments:
+            cast(PaymentTrace, tracer.start(payment)).add('corba', 0.25)
+        monotonic_mock.return_value = 11
+        with tracer.storing(self.payments[:1]):
+            pass
+        monotonic_mock.return_value = 13
+        with tracer.storing(self.payments[1:2]):
+            pass
+        self.assertEqual(tracer.summary(), {
+            'count': 2, 'wall': 4, 'max_wall': 3, 'slowest': '00000000-0000-0000-0000-000000000001',
+            'corba': 0.5, 'recoding': 0, 'orm': 0, 'other': 3.5})
+        tracer.report()
+        self.log_handler.check(
+            ('fred_pain.tracing', 'INFO',
+             'Traced 2 payments in 4.000 s (corba 0.500 s, recoding 0.000 s, orm 0.000 s, other 3.500 s), '
+             'the slowest payment 00000000-0000-0000-0000-000000000001 took 3.000 s.'),
+        )
+
+    def test_report_empty(self, monotonic_mock):
+        Tracer().report()
+        self.log_handler.check()
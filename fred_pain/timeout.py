@@ -0,0 +1,111 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Timeouts and deadlines of CORBA calls."""
+import threading
+from contextlib import contextmanager
+from math import ceil
+from time import monotonic
+from typing import Any, Callable, Iterable, Iterator, Optional, Tuple, Type
+
+import omniORB
+
+from fred_pain.client import CorbaClientWrapper
+from fred_pain.settings import SETTINGS
+
+_LOCAL = threading.local()
+
+
+class DeadlineExceeded(Exception):
+    """Deadline of CORBA calls expired."""
+
+
+def get_deadline(budget: float) -> Optional[float]:
+    """Return deadline in `budget` seconds or `None` if budget isn't set."""
+    return monotonic() + budget if budget else None
+
+
+def is_expired(deadline: Optional[float]) -> bool:
+    """Return whether the deadline expired."""
+    return deadline is not None and deadline <= monotonic()
+
+
+@contextmanager
+def call_deadline(deadline: Optional[float]) -> Iterator[None]:
+    """
+    Limit CORBA calls made by the current thread to end before the deadline.
+
+    Deadline is a value of `time.monotonic`. If it's `None`, calls are not limited.
+    """
+    previous = getattr(_LOCAL, 'deadline', None)
+    _LOCAL.deadline = deadline
+    try:
+        yield
+    finally:
+        _LOCAL.deadline = previous
+
+
+def get_call_deadline() -> Optional[float]:
+    """Return deadline of CORBA calls of the current thread."""
+    return getattr(_LOCAL, 'deadline', None)
+
+
+def get_timeout(name: str) -> float:
+    """Return timeout of the CORBA method in seconds, zero for no timeout."""
+    return SETTINGS.corba_method_timeouts.get(name, SETTINGS.corba_timeout)
+
+
+class TimeoutClient(CorbaClientWrapper):
+    """
+    CORBA client wrapper which limits duration of the calls.
+
+    Calls are limited by the timeout of the method and they are not started after the deadline of the current thread.
+    Calls of `interruptible` methods, which may be safely abandoned, are also interrupted by the deadline
+    and their transport errors are raised as `DeadlineExceeded`. Other calls, e.g. payment imports which the server
+    may complete anyway, are never cut short by the deadline.
+    """
+
+    def __init__(self, client: Any, errors: Tuple[Type[BaseException], ...], interruptible: Iterable[str] = ()):
+        super().__init__(client)
+        self.errors = errors
+        self.interruptible = frozenset(interruptible)
+
+    def call(self, name: str, method: Callable, *args: Any) -> Any:
+        """Call the method with the timeout of the current thread set."""
+        timeout = get_timeout(name)
+        deadline = get_call_deadline()
+        if deadline is not None:
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                raise DeadlineExceeded('Deadline expired before call of {}.'.format(name))
+            if name not in self.interruptible:
+                deadline = None
+            else:
+                timeout = min(timeout, remaining) if timeout else remaining
+        if not timeout:
+            return method(*args)
+
+        omniORB.setClientThreadCallTimeout(int(ceil(timeout * 1000)))
+        try:
+            return method(*args)
+        except self.errors as error:
+            if is_expired(deadline):
+                raise DeadlineExceeded('Deadline expired during call of {}.'.format(name)) from error
+            raise
+        finally:
+            omniORB.setClientThreadCallTimeout(0)
@@ -0,0 +1,175 @@
+#
+# Copyright (C) 2026  CZ.NIC, z. s. p. o.
+#
+# This file is part of FRED.
+#
+# FRED is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# FRED is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with FRED.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tracing of payment processing."""
+import logging
+import threading
+from contextlib import contextmanager
+from time import monotonic
+from typing import Any, Callable, Dict, Iterator, Optional, Sequence
+
+from django_pain.models import BankPayment
+
+from fred_pain.client import CorbaClientWrapper
+from fred_pain.settings import SETTINGS
+
+LOGGER = logging.getLogger(__name__)
+
+_LOCAL = threading.local()
+
+# Phases of processing of a payment.
+PHASES = ('corba', 'recoding', 'orm', 'other')
+
+
+class PaymentTrace(object):
+    """
+    Timing record of a payment.
+
+    Wall time of the payment from start of its sending to end of its storing is split into phases: CORBA calls
+    in the ORB, recoding of their arguments and results, database writes and the rest, e.g. waiting for a worker.
+    Durations of concurrent calls are summed.
+    """
+
+    def __init__(self, payment_uuid: str):
+        self.uuid = payment_uuid
+        self.start = monotonic()
+        self.end = None  # type: Optional[float]
+        self.durations = {'call': 0.0, 'corba': 0.0, 'orm': 0.0}
+        self._lock = threading.Lock()
+
+    def add(self, phase: str, duration: float) -> None:
+        """Add duration of the phase."""
+        with self._lock:
+            self.durations[phase] += duration
+
+    def merge(self, durations: Dict[str, float]) -> None:
+        """Add durations of phases recorded elsewhere, e.g. in a worker process."""
+        for phase, duration in durations.items():
+            self.add(phase, duration)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Return wall time of the payment and durations of its phases in seconds."""
+        wall = (monotonic() if self.end is None else self.end) - self.start
+        corba = self.durations['corba']
+        recoding = max(self.durations['call'] - corba, 0.0)
+        orm = self.durations['orm']
+        return {'wall': wall, 'corba': corba, 'recoding': recoding, 'orm': orm,
+                'other': max(wall - corba - recoding - orm, 0.0)}
+
+
+def get_trace() -> Optional[PaymentTrace]:
+    """Return trace of the current thread."""
+    return getattr(_LOCAL, 'trace', None)
+
+
+@contextmanager
+def tracing(trace: Optional[PaymentTrace]) -> Iterator[None]:
+    """Record CORBA calls made by the current thread to the trace. If it's `None`, calls are not recorded."""
+    previous = getattr(_LOCAL, 'trace', None)
+    _LOCAL.trace = trace
+    try:
+        yield
+    finally:
+        _LOCAL.trace = previous
+
+
+class TracingClient(CorbaClientWrapper):
+    """CORBA client wrapper which adds durations of calls to the phase of the trace of the current thread."""
+
+    def __init__(self, client: Any, phase: str):
+        super().__init__(client)
+        self.phase = phase
+
+    def call(self, name: str, method: Callable, *args: Any) -> Any:
+        """Call the method and record its duration."""
+        trace = getattr(_LOCAL, 'trace', None)
+        if trace is None:
+            return method(*args)
+        start = monotonic()
+        try:
+            return method(*args)
+        finally:
+            trace.add(self.phase, monotonic() - start)
+
+
+class Tracer(object):
+    """
+    Traces of payments processed together.
+
+    Tracing is enabled by `FRED_PAIN_TRACING`. Breakdown of time of payments which take longer than
+    `FRED_PAIN_TRACING_SLOW_THRESHOLD` seconds is logged when they are stored and `report` logs summary of all
+    traced payments. If tracing is disabled, no traces are created and the methods do nothing.
+    """
+
+    def __init__(self):
+        self.enabled = SETTINGS.tracing
+        self.threshold = SETTINGS.tracing_slow_threshold
+        self.traces = {}  # type: Dict[Any, PaymentTrace]
+
+    def start(self, payment: BankPayment) -> Optional[PaymentTrace]:
+        """Start trace of the payment. Return `None` if tracing is disabled."""
+        if not self.enabled:
+            return None
+        trace = self.traces[payment.uuid] = PaymentTrace(str(payment.uuid))
+        return trace
+
+    def get(self, payment: BankPayment) -> Optional[PaymentTrace]:
+        """Return trace of the payment, if it's traced."""
+        return self.traces.get(payment.uuid)
+
+    @contextmanager
+    def storing(self, payments: Sequence[BankPayment]) -> Iterator[None]:
+        """Record the context as database writes of the payments, split equally, and finish their traces."""
+        traces = [self.traces[payment.uuid] for payment in payments if payment.uuid in self.traces]
+        if not traces:
+            yield
+            return
+        start = monotonic()
+        yield
+        end = monotonic()
+        for trace in traces:
+            trace.add('orm', (end - start) / len(traces))
+            trace.end = end
+            breakdown = trace.breakdown()
+            if self.threshold and breakdown['wall'] > self.threshold:
+                LOGGER.warning('Payment %s took %.3f s (corba %.3f s, recoding %.3f s, orm %.3f s, other %.3f s).',
+                               trace.uuid, breakdown['wall'], *(breakdown[phase] for phase in PHASES))
+
+    def summary(self) -> Dict[str, Any]:
+        """Return number of finished traces, their total and maximal wall time and total durations of phases."""
+        summary = dict.fromkeys(('wall', 'max_wall') + PHASES, 0.0)  # type: Dict[str, Any]
+        summary.update(count=0, slowest=None)
+        for trace in self.traces.values():
+            if trace.end is None:
+                continue
+            breakdown = trace.breakdown()
+            summary['count'] += 1
+            for key in ('wall', ) + PHASES:
+                summary[key] += breakdown[key]
+            if breakdown['wall'] > summary['max_wall'] or summary['slowest'] is None:
+                summary.update(max_wall=breakdown['wall'], slowest=trace.uuid)
+        return summary
+
+    def report(self) -> None:
+        """Log summary of traced payments."""
+        summary = self.summary()
+        if not summary['count']:
+            return
+        LOGGER.info('Traced %s payments in %.3f s (corba %.3f s, recoding %.3f s, orm %.3f s, other %.3f s), '
+                    'the slowest payment %s took %.3f s.', summary['count'], summary['wall'],
+                    *([summary[phase] for phase in PHASES] + [summary['slowest'], summary['max_wall']]))